@@ -0,0 +1,88 @@
+"""Benchmark del arranque de un worker: import de src.main y lifespan.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_arranque
+    python -m benchmarks.bench_arranque --repeticiones 10
+
+Cada medición corre en un intérprete nuevo, como un worker recién lanzado, y
+reporta la mediana de cada escenario:
+    base_nueva      base vacía: el lifespan crea el esquema
+    esquema_al_dia  la versión de la base coincide con los modelos: sin DDL
+    ddl_siempre     comportamiento anterior: create_all e índices en cada arranque
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ESCENARIOS = ("base_nueva", "esquema_al_dia", "ddl_siempre")
+
+
+def medir_en_proceso(escenario: str) -> dict:
+    """Corre dentro del intérprete hijo; el entorno ya viene preparado por el padre."""
+    inicio = time.perf_counter()
+    from src.main import app
+
+    importar = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    if escenario == "ddl_siempre":
+        from src.database import engine
+        from src.migraciones import migrar
+
+        migrar(engine)
+
+    async def levantar():
+        async with app.router.lifespan_context(app):
+            pass
+
+    asyncio.run(levantar())
+    return {"import_ms": importar * 1000, "lifespan_ms": (time.perf_counter() - inicio) * 1000}
+
+
+def medir(escenario: str, directorio: str) -> dict:
+    base = os.path.join(directorio, "arranque.db")
+    if escenario == "base_nueva" and os.path.exists(base):
+        os.remove(base)
+    entorno = dict(os.environ, DB_URL=f"sqlite:///{base}")
+    salida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_arranque", "--hijo", escenario],
+        env=entorno, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de arranque: import y lifespan de la app.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--hijo", choices=ESCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(medir_en_proceso(args.hijo)))
+        return 0
+
+    from benchmarks.suite import preparar_entorno
+
+    directorio = tempfile.mkdtemp(prefix="bench_arranque_")
+    preparar_entorno(directorio)
+    # sin refresco de tasas ni trabajos programados que compitan con la medición
+    os.environ["TASAS_INTERVALO_REFRESCO"] = "0"
+    os.environ["LIMPIEZA_CRON"] = ""
+    os.environ["CIERRE_CRON"] = ""
+
+    print(f"{'escenario':<16} {'import ms':>10} {'lifespan ms':>12} {'total ms':>10}")
+    for escenario in ESCENARIOS:
+        medidas = [medir(escenario, directorio) for _ in range(args.repeticiones)]
+        importar = statistics.median(m["import_ms"] for m in medidas)
+        lifespan = statistics.median(m["lifespan_ms"] for m in medidas)
+        print(f"{escenario:<16} {importar:>10.1f} {lifespan:>12.1f} {importar + lifespan:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Microbenchmark de get_current_user en sus tres modos (db, cache, stateless).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_auth
+"""
+import os
+import time
+
+os.environ.setdefault("DB_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.auth import dependencies
+from src.models import BaseModel
+from src.gestion.models import Usuario
+from src.utils.jwt import create_access_token
+
+ITERACIONES = 20_000
+
+
+def main():
+    engine = create_engine("sqlite:///bench_auth.db")
+    BaseModel.metadata.drop_all(bind=engine)
+    BaseModel.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        usuario = Usuario(nombre="bench", email="bench@example.com", hashed_password="x")
+        db.add(usuario)
+        db.commit()
+        token = create_access_token({"sub": str(usuario.id), "email": usuario.email, "name": usuario.nombre})
+
+    consultas = 0
+
+    def contar(*args):
+        nonlocal consultas
+        consultas += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    print(f"{'modo':>10} {'us/request':>12} {'consultas':>10}")
+    for modo in ("db", "cache", "stateless"):
+        dependencies.AUTH_MODO = modo
+        dependencies.usuarios_cache.clear()
+        consultas = 0
+        with Session() as db:
+            inicio = time.perf_counter()
+            for _ in range(ITERACIONES):
+                dependencies.get_current_user(token, db)
+            duracion = time.perf_counter() - inicio
+        print(f"{modo:>10} {duracion / ITERACIONES * 1e6:>12.1f} {consultas:>10}")
+    engine.dispose()
+    os.remove("bench_auth.db")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark de la conversión de montos multimoneda a pesos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_conversion
+    python -m benchmarks.bench_conversion --filas 1000000
+
+Compara el loop original (conversión float por fila y suma en float) contra
+dinero.convertir, que acumula centavos enteros por moneda y convierte una vez
+por moneda. Para cada tamaño informa el tiempo y la diferencia contra una
+referencia exacta en Decimal (centavos sumados por moneda y redondeo final).
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from src.gestion.services import MONEDA_A_CODIGO
+from src.utils import dinero
+
+TASAS = {"USD": 1.0, "ARS": 1012.37, "EUR": 0.9213}
+NOMBRES = list(MONEDA_A_CODIGO)
+TAMANIOS = [1_000, 10_000, 100_000]
+
+
+def generar(cantidad: int, semilla: int = 7):
+    azar = random.Random(semilla)
+    return [(azar.choice(NOMBRES), round(azar.uniform(0.01, 50_000), 2)) for _ in range(cantidad)]
+
+
+def referencia(filas) -> Decimal:
+    """Resultado exacto: la misma definición que el kernel, pero sin atajos."""
+    por_moneda = {}
+    for nombre, monto in filas:
+        por_moneda[nombre] = por_moneda.get(nombre, Decimal(0)) + Decimal(repr(monto))
+    total = Decimal(0)
+    tasa_pesos = Decimal(str(TASAS["ARS"]))
+    for nombre, suma in por_moneda.items():
+        codigo = MONEDA_A_CODIGO[nombre]
+        convertido = suma if codigo == "ARS" else suma * tasa_pesos / Decimal(str(TASAS[codigo]))
+        total += convertido.quantize(dinero.CENTAVO, rounding="ROUND_HALF_EVEN")
+    return total
+
+
+def convertir_float(monto: float, nombre: str) -> float:
+    """La conversión por fila que se usaba antes del kernel: moneda -> USD -> ARS en float."""
+    if nombre == "Pesos":
+        return monto
+    return monto / TASAS[MONEDA_A_CODIGO[nombre]] * TASAS["ARS"]
+
+
+def loop_float(filas) -> float:
+    total = 0.0
+    for nombre, monto in filas:
+        total += convertir_float(monto, nombre)
+    return total
+
+
+def kernel(filas) -> Decimal:
+    return dinero.convertir(((MONEDA_A_CODIGO[nombre], monto) for nombre, monto in filas), TASAS)
+
+
+def medir(funcion, filas):
+    inicio = time.perf_counter()
+    resultado = funcion(filas)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversión de montos: loop float vs kernel exacto.")
+    parser.add_argument("--filas", type=int, nargs="*", default=TAMANIOS)
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'loop ms':>10} {'kernel ms':>10} {'error loop':>14} {'error kernel':>14}")
+    for cantidad in args.filas:
+        filas = generar(cantidad)
+        exacto = referencia(filas)
+        total_loop, t_loop = medir(loop_float, filas)
+        total_kernel, t_kernel = medir(kernel, filas)
+        error_loop = abs(Decimal(repr(total_loop)) - exacto)
+        error_kernel = abs(total_kernel - exacto)
+        print(f"{cantidad:>10} {t_loop * 1000:>10.1f} {t_kernel * 1000:>10.1f} {error_loop:>14.6f} {error_kernel:>14.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compara crear_gasto fila por fila contra importar_gastos en lotes (SQLite en disco).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_importacion [cantidad]
+"""
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models import BaseModel
+from src.gestion import schemas
+from src.gestion.models import Usuario, CategoriaGasto
+from src.gestion.services import crear_gasto, importar_gastos
+
+RUTA_DB = "bench_importacion.db"
+
+
+def nueva_sesion():
+    if os.path.exists(RUTA_DB):
+        os.remove(RUTA_DB)
+    engine = create_engine(f"sqlite:///{RUTA_DB}")
+    BaseModel.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([Usuario(nombre="bench", email="bench@example.com", hashed_password="x"), CategoriaGasto(nombre="Varios")])
+    db.commit()
+    return engine, db
+
+
+def filas(cantidad: int):
+    return [
+        {"id_usuario": 1, "id_categoria": 1, "monto": 10.0 + i % 100, "fecha": f"2024-{1 + i % 12:02d}-15T12:00:00"}
+        for i in range(cantidad)
+    ]
+
+
+def main(cantidad: int):
+    datos = filas(cantidad)
+
+    engine, db = nueva_sesion()
+    inicio = time.perf_counter()
+    for fila in datos:
+        crear_gasto(db, schemas.GastoCreate(**fila))
+    fila_por_fila = time.perf_counter() - inicio
+    db.close()
+    engine.dispose()
+
+    engine, db = nueva_sesion()
+    contenido = json.dumps(datos).encode()
+    inicio = time.perf_counter()
+    resultado = importar_gastos(db, contenido, "application/json")
+    en_lotes = time.perf_counter() - inicio
+    assert resultado["insertados"] == cantidad, resultado["errores"][:5]
+    db.close()
+    engine.dispose()
+    os.remove(RUTA_DB)
+
+    print(f"filas: {cantidad}")
+    print(f"fila por fila: {cantidad / fila_por_fila:>10.0f} filas/s")
+    print(f"en lotes:      {cantidad / en_lotes:>10.0f} filas/s")
+    print(f"mejora:        {fila_por_fila / en_lotes:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
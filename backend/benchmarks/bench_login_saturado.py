@@ -0,0 +1,110 @@
+"""Latencia de un endpoint sin autenticación mientras los logins saturan bcrypt.
+
+Mide /categorias/ primero en reposo y después con muchos logins concurrentes.
+Con el hash en un pool acotado (PASSWORD_WORKERS) la latencia debería
+mantenerse estable aunque los logins hagan cola.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_login_saturado [--logins 32] [--duracion 10]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+from benchmarks.carga_async import puerto_libre
+
+load_dotenv()
+
+
+def preparar_base(ruta: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.models import BaseModel
+    from src.gestion.models import Usuario, CategoriaGasto
+
+    engine = create_engine(f"sqlite:///{ruta}")
+    BaseModel.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    usuario = Usuario(nombre="login", email="login@example.com")
+    usuario.set_password("password123")
+    db.add_all([usuario, CategoriaGasto(nombre="Varios")])
+    db.commit()
+    db.close()
+    engine.dispose()
+
+
+def percentil(valores, p: float) -> float:
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+async def medir(url_base: str, logins_concurrentes: int, duracion: float):
+    latencias = []
+    logins = 0
+    fin = time.perf_counter() + duracion
+
+    async with httpx.AsyncClient(base_url=url_base, timeout=60.0) as cliente:
+        async def sondear():
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                await cliente.get("/categorias/")
+                latencias.append(time.perf_counter() - inicio)
+                await asyncio.sleep(0.01)
+
+        async def loguear():
+            nonlocal logins
+            while time.perf_counter() < fin:
+                await cliente.post("/login", json={"email": "login@example.com", "password": "password123"})
+                logins += 1
+
+        await asyncio.gather(sondear(), *(loguear() for _ in range(logins_concurrentes)))
+    return latencias, logins / duracion
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32, help="Logins concurrentes en la fase saturada")
+    parser.add_argument("--duracion", type=float, default=10.0)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, "login.db")
+    preparar_base(ruta)
+    puerto = puerto_libre()
+    entorno = {**os.environ, "DB_URL": f"sqlite:///{ruta}", "TASAS_SNAPSHOT": ""}
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(puerto), "--log-level", "warning"],
+        env=entorno,
+    )
+    try:
+        url_base = f"http://127.0.0.1:{puerto}"
+        for _ in range(100):
+            try:
+                httpx.get(f"{url_base}/categorias/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        print(f"{'fase':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'logins/s':>9}")
+        for fase, logins in (("reposo", 0), ("saturado", args.logins)):
+            latencias, tasa_logins = asyncio.run(medir(url_base, logins, args.duracion))
+            print(
+                f"{fase:>10} {statistics.median(latencias) * 1000:>8.1f} "
+                f"{percentil(latencias, 0.95) * 1000:>8.1f} {percentil(latencias, 0.99) * 1000:>8.1f} "
+                f"{tasa_logins:>9.1f}"
+            )
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compara actualizar_monto_actual presupuesto por presupuesto contra recalcular_montos en lote.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_presupuestos [presupuestos] [gastos]
+
+El recálculo uno por uno se mide sobre una muestra y se extrapola al total.
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models import BaseModel
+from src.gestion.models import Usuario, CategoriaGasto, Moneda, Presupuesto, Gasto
+from src.gestion.presupuestos import recalcular_montos
+from src.gestion.services import actualizar_monto_actual
+
+RUTA_DB = "bench_presupuestos.db"
+USUARIOS = 1_000
+CATEGORIAS = 10
+MUESTRA = 1_000
+
+
+def preparar(cantidad_presupuestos: int, cantidad_gastos: int):
+    if os.path.exists(RUTA_DB):
+        os.remove(RUTA_DB)
+    engine = create_engine(f"sqlite:///{RUTA_DB}")
+    BaseModel.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    azar = random.Random(42)
+
+    db.add(Moneda(nombre="Pesos"))
+    db.add_all(CategoriaGasto(nombre=f"Categoria {i}") for i in range(CATEGORIAS))
+    db.add_all(Usuario(nombre=f"u{i}", email=f"u{i}@example.com", hashed_password="x") for i in range(USUARIOS))
+    db.flush()
+
+    inicio = datetime(2024, 1, 1)
+    db.bulk_insert_mappings(Gasto, [
+        {
+            "id_usuario": 1 + azar.randrange(USUARIOS),
+            "id_categoria": 1 + azar.randrange(CATEGORIAS),
+            "monto": azar.uniform(1, 500),
+            "fecha": inicio + timedelta(days=azar.randrange(365)),
+        }
+        for _ in range(cantidad_gastos)
+    ])
+    db.bulk_insert_mappings(Presupuesto, [
+        {
+            "id_usuario": 1 + i % USUARIOS,
+            "id_categoria": 1 + azar.randrange(CATEGORIAS),
+            "id_moneda": 1,
+            "monto_objetivo": 10_000.0,
+            "monto_actual": 0.0,
+            "periodo": "mensual",
+            "fecha_inicio": datetime(2024, 1 + i % 12, 1),
+            "fecha_fin": datetime(2024, 1 + i % 12, 28),
+        }
+        for i in range(cantidad_presupuestos)
+    ])
+    db.commit()
+    return engine, db
+
+
+def main(cantidad_presupuestos: int, cantidad_gastos: int):
+    engine, db = preparar(cantidad_presupuestos, cantidad_gastos)
+
+    inicio = time.perf_counter()
+    for id_presupuesto in range(1, MUESTRA + 1):
+        actualizar_monto_actual(db, id_presupuesto)
+    uno_por_uno = (time.perf_counter() - inicio) / MUESTRA * cantidad_presupuestos
+
+    inicio = time.perf_counter()
+    actualizados = recalcular_montos(db, solo_activos=False)
+    lote = time.perf_counter() - inicio
+
+    db.close()
+    engine.dispose()
+    os.remove(RUTA_DB)
+
+    print(f"presupuestos={cantidad_presupuestos} gastos={cantidad_gastos}")
+    print(f"  uno por uno (extrapolado): {uno_por_uno:8.2f} s")
+    print(f"  en lote:                   {lote:8.2f} s  ({actualizados} actualizados)")
+    print(f"  aceleración:               {uno_por_uno / lote:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200_000,
+    )
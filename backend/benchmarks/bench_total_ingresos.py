@@ -0,0 +1,73 @@
+"""Benchmark de calcular_totales_mes a medida que crece la cantidad de ingresos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_total_ingresos
+
+Para cada tamaño se mide la latencia media y la cantidad de consultas SQL del
+cálculo que usa el resumen: lee la tabla de totales incrementales y convierte
+con sumar_en_pesos, así que ambas deberían mantenerse constantes.
+"""
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.models import BaseModel
+from src.gestion.models import Usuario, Ingreso, Moneda
+from src.gestion.services import calcular_totales_mes
+from src.gestion.totales import reconstruir_totales
+
+TAMANIOS = [10, 100, 1_000, 10_000]
+REPETICIONES = 20
+TASAS = {"USD": 1.0, "ARS": 1000.0, "EUR": 0.9}
+
+
+def preparar_db(cantidad: int):
+    engine = create_engine("sqlite://")
+    BaseModel.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    monedas = [Moneda(nombre=n) for n in ("Pesos", "Dolar", "Euro")]
+    db.add_all(monedas + [Usuario(nombre="bench", email="bench@example.com", hashed_password="x")])
+    db.flush()
+    fecha = datetime(2024, 5, 15)
+    db.bulk_insert_mappings(Ingreso, [
+        {
+            "id_usuario": 1,
+            "monto": 100.0 + i,
+            "id_moneda": monedas[i % 3].id_moneda,
+            "fuente": "bench",
+            "fecha": fecha,
+        }
+        for i in range(cantidad)
+    ])
+    db.commit()
+    # la carga masiva no pasa por los deltas: se arman los totales desde cero
+    reconstruir_totales(db)
+    return engine, db
+
+
+def medir(cantidad: int):
+    engine, db = preparar_db(cantidad)
+    consultas = 0
+
+    def contar(*args):
+        nonlocal consultas
+        consultas += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        calcular_totales_mes(db, 1, 5, 2024, TASAS)
+    duracion = (time.perf_counter() - inicio) / REPETICIONES
+    event.remove(engine, "before_cursor_execute", contar)
+    db.close()
+    return duracion, consultas / REPETICIONES
+
+
+if __name__ == "__main__":
+    print(f"{'ingresos':>10} {'ms/llamada':>12} {'consultas':>10}")
+    for cantidad in TAMANIOS:
+        duracion, consultas = medir(cantidad)
+        print(f"{cantidad:>10} {duracion * 1000:>12.3f} {consultas:>10.1f}")
@@ -0,0 +1,133 @@
+"""Prueba de carga: compara requests/segundo con la sesión sync y con AsyncSession.
+
+Levanta uvicorn dos veces sobre una base SQLite temporal (DB_ASYNC=false y
+DB_ASYNC=true) y dispara requests concurrentes contra rutas de lectura.
+
+Uso (desde backend/):
+    python -m benchmarks.carga_async [--concurrencia 64] [--duracion 10]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RUTAS = ["/categorias/", "/gastos/1/paginado", "/resumen/{usuario}/{mes}/{anio}"]
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def preparar_base(ruta: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.models import BaseModel
+    from src.gestion.models import Usuario, CategoriaGasto, Moneda, Gasto, Ingreso
+    from src.gestion.totales import reconstruir_totales
+    from datetime import datetime
+
+    engine = create_engine(f"sqlite:///{ruta}")
+    BaseModel.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Usuario(nombre="carga", email="carga@example.com", hashed_password="x"),
+        CategoriaGasto(nombre="Varios"),
+        Moneda(nombre="Pesos"),
+    ])
+    db.flush()
+    ahora = datetime.now()
+    db.add_all(Gasto(id_usuario=1, id_categoria=1, monto=i, fecha=ahora) for i in range(1, 500))
+    db.add_all(Ingreso(id_usuario=1, id_moneda=1, monto=i, fuente="x", fecha=ahora) for i in range(1, 500))
+    db.commit()
+    reconstruir_totales(db)
+    db.close()
+    engine.dispose()
+
+
+async def disparar(url_base: str, token: str, concurrencia: int, duracion: float):
+    ahora = time.localtime()
+    rutas = [r.format(usuario=1, mes=ahora.tm_mon, anio=ahora.tm_year) for r in RUTAS]
+    completados = 0
+    errores = 0
+    fin = time.perf_counter() + duracion
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+
+    async with httpx.AsyncClient(
+        base_url=url_base, limits=limites, timeout=30.0, headers={"Authorization": f"Bearer {token}"}
+    ) as cliente:
+        async def trabajador(n: int):
+            nonlocal completados, errores
+            i = n
+            while time.perf_counter() < fin:
+                respuesta = await cliente.get(rutas[i % len(rutas)])
+                i += 1
+                if respuesta.status_code == 200:
+                    completados += 1
+                else:
+                    errores += 1
+
+        await asyncio.gather(*(trabajador(n) for n in range(concurrencia)))
+    return completados / duracion, errores
+
+
+def medir(modo_async: bool, concurrencia: int, duracion: float) -> tuple:
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, "carga.db")
+    preparar_base(ruta)
+    puerto = puerto_libre()
+    entorno = {
+        **os.environ,
+        "DB_URL": f"sqlite:///{ruta}",
+        "DB_ASYNC": "true" if modo_async else "false",
+        "AUTH_MODO": "stateless",
+        "TASAS_BACKEND": "archivo",
+        "TASAS_ARCHIVO": os.path.join(directorio, "tasas.json"),
+        "TASAS_SNAPSHOT": "",
+    }
+    with open(entorno["TASAS_ARCHIVO"], "w") as f:
+        f.write('{"rates": {"USD": 1, "ARS": 1000, "EUR": 0.9}}')
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(puerto), "--log-level", "warning"],
+        env=entorno,
+    )
+    try:
+        url_base = f"http://127.0.0.1:{puerto}"
+        for _ in range(100):
+            try:
+                httpx.get(f"{url_base}/categorias/")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        from src.utils.jwt import create_access_token
+        token = create_access_token({"sub": "1", "email": "carga@example.com", "name": "carga"})
+        return asyncio.run(disparar(url_base, token, concurrencia, duracion))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrencia", type=int, default=64)
+    parser.add_argument("--duracion", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'modo':>6} {'req/s':>10} {'errores':>8}")
+    for modo_async in (False, True):
+        rps, errores = medir(modo_async, args.concurrencia, args.duracion)
+        print(f"{'async' if modo_async else 'sync':>6} {rps:>10.1f} {errores:>8}")
+
+
+if __name__ == "__main__":
+    main()
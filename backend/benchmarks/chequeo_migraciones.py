@@ -0,0 +1,105 @@
+"""Chequeo de punta a punta: migrar los montos a centavos y volver a arrancar la app.
+
+Uso (desde backend/):
+    python -m benchmarks.chequeo_migraciones
+
+Cada paso corre en un intérprete nuevo, porque DINERO_MODO se lee al importar:
+    crear          DINERO_MODO=float: el lifespan crea el esquema y se guarda un gasto
+    migrar_dinero  python -m src.gestion.migrar_dinero --a centavos (en SQLite las
+                   columnas siguen siendo FLOAT); además se marca la versión del
+                   esquema como vieja, como después de actualizar los modelos
+    arrancar       DINERO_MODO=centavos: el lifespan migra el esquema y el gasto
+                   se lee con el mismo monto
+
+Termina con código distinto de cero si algún paso falla, así se puede correr
+como chequeo en CI.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+PASOS = (("crear", "float"), ("migrar_dinero", "centavos"), ("arrancar", "centavos"))
+MONTO = "12.34"
+
+
+def levantar_app():
+    from src.main import app
+
+    async def levantar():
+        async with app.router.lifespan_context(app):
+            pass
+
+    asyncio.run(levantar())
+
+
+def correr_paso(paso: str):
+    """Corre dentro del intérprete hijo; el entorno ya viene preparado por el padre."""
+    from src.database import SessionLocal
+
+    if paso == "crear":
+        levantar_app()
+        from src.gestion.models import CategoriaGasto, Gasto, Usuario
+
+        with SessionLocal() as db:
+            db.add(Usuario(nombre="chequeo", email="chequeo@example.com", hashed_password="x"))
+            db.add(CategoriaGasto(nombre="General"))
+            db.flush()
+            db.add(Gasto(id_usuario=1, id_categoria=1, monto=float(MONTO), fecha=datetime(2024, 5, 10)))
+            db.commit()
+    elif paso == "migrar_dinero":
+        from src.gestion import migrar_dinero
+        from src.migraciones import CLAVE_VERSION
+        from src.models import Parametro
+
+        if migrar_dinero.main(["--a", "centavos"]) != 0:
+            raise SystemExit(1)
+        with SessionLocal() as db:
+            Parametro.escribir(db, CLAVE_VERSION, "anterior")
+            db.commit()
+    else:
+        levantar_app()
+        from src.gestion.models import Gasto
+
+        with SessionLocal() as db:
+            monto = db.query(Gasto.monto).scalar()
+        if monto != Decimal(MONTO):
+            raise SystemExit(f"El gasto se lee como {monto!r}, se esperaba {MONTO}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migración a centavos seguida de un arranque de la app.")
+    parser.add_argument("--paso", choices=[paso for paso, _ in PASOS], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.paso:
+        correr_paso(args.paso)
+        return 0
+
+    from benchmarks.suite import preparar_entorno
+
+    directorio = tempfile.mkdtemp(prefix="chequeo_migraciones_")
+    preparar_entorno(directorio)
+    # sin trabajos programados que toquen la base entre pasos
+    os.environ["TASAS_INTERVALO_REFRESCO"] = "0"
+    os.environ["LIMPIEZA_CRON"] = ""
+    os.environ["CIERRE_CRON"] = ""
+
+    for paso, modo in PASOS:
+        salida = subprocess.run(
+            [sys.executable, "-m", "benchmarks.chequeo_migraciones", "--paso", paso],
+            env=dict(os.environ, DINERO_MODO=modo), capture_output=True, text=True,
+        )
+        print(f"[{'OK' if salida.returncode == 0 else 'FALLA'}] {paso} (DINERO_MODO={modo})")
+        if salida.returncode != 0:
+            print(salida.stderr.strip().splitlines()[-1] if salida.stderr.strip() else salida.stdout)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Chequeo: resúmenes con el proveedor de tasas caído y registro de las tasas del día.
+
+Uso (desde backend/):
+    python -m benchmarks.chequeo_tasas
+
+Arma una base temporal con ingresos en dólares de meses anteriores y su
+historial de tasas, reemplaza el proveedor por uno que siempre falla y pide:
+    resumen_mes     /resumen de un mes pasado                      -> 200
+    rango_pasado    /resumen/rango sólo con meses pasados          -> 200
+    rango_actual    /resumen/rango que incluye el mes en curso     -> 503
+
+Después simula refrescos del proveedor sobre el historial:
+    primer_refresco  guarda las tasas de hoy e invalida el índice
+    sin_cambios      no escribe ni invalida
+    con_cambios      escribe sólo la moneda que cambió y actualiza el índice en el lugar
+
+Termina con código distinto de cero si alguna respuesta no es la esperada, así
+se puede correr como chequeo en CI.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+
+class BackendQueFalla:
+    def obtener(self) -> dict:
+        raise ConnectionError("proveedor de tasas caído")
+
+
+def _inicio_de_mes(fecha: datetime, meses_atras: int) -> datetime:
+    mes = fecha.month - 1 - meses_atras
+    return datetime(fecha.year + mes // 12, mes % 12 + 1, 1)
+
+
+def sembrar(db, ahora: datetime):
+    from src.gestion import tasas_historicas
+    from src.gestion.models import Ingreso, Moneda, Usuario
+
+    db.add(Usuario(nombre="chequeo", email="chequeo@example.com", hashed_password="x"))
+    db.add_all([Moneda(nombre="Pesos"), Moneda(nombre="Dolar")])
+    db.flush()
+    for meses_atras in (3, 2, 1):
+        fecha = _inicio_de_mes(ahora, meses_atras) + timedelta(days=9)
+        db.add(Ingreso(id_usuario=1, id_moneda=2, monto=100, fecha=fecha, fuente="Sueldo"))
+    db.commit()
+    primer_dia = _inicio_de_mes(ahora, 3).date()
+    tasas_historicas.guardar(db, [
+        (primer_dia + timedelta(days=d), codigo, tasa)
+        for d in range((date.today() - primer_dia).days)
+        for codigo, tasa in (("USD", 1.0), ("ARS", 1000.0))
+    ])
+
+
+async def pedir(ahora: datetime) -> list:
+    import httpx
+    from src.main import app
+    from src.utils.jwt import create_access_token
+    from src.utils.tasas_cambio import ProveedorTasas, configurar_proveedor
+
+    desde = _inicio_de_mes(ahora, 3).date().isoformat()
+    hasta_pasado = _inicio_de_mes(ahora, 0).date().isoformat()
+    hasta_actual = _inicio_de_mes(ahora, -1).date().isoformat()
+    anterior = _inicio_de_mes(ahora, 1)
+    pedidos = [
+        ("resumen_mes", f"/resumen/1/{anterior.month}/{anterior.year}", 200),
+        ("rango_pasado", f"/resumen/1/rango?desde={desde}&hasta={hasta_pasado}", 200),
+        ("rango_actual", f"/resumen/1/rango?desde={desde}&hasta={hasta_actual}", 503),
+    ]
+    token = create_access_token({"sub": "1", "email": "chequeo@example.com", "name": "chequeo"})
+    resultados = []
+    async with app.router.lifespan_context(app):
+        configurar_proveedor(ProveedorTasas(BackendQueFalla(), ruta_snapshot=None))
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://chequeo",
+            headers={"Authorization": f"Bearer {token}"},
+        ) as cliente:
+            for nombre, url, esperado in pedidos:
+                respuesta = await cliente.get(url)
+                resultados.append((nombre, esperado, respuesta.status_code, respuesta.text))
+    return resultados
+
+
+def chequear_registro(db) -> list:
+    """(nombre, ok, detalle) de cada refresco simulado."""
+    from src.gestion import tasas_historicas
+    from src.gestion.models import TasaCambio
+
+    hoy = date.today()
+    db.query(TasaCambio).filter(TasaCambio.fecha == hoy).delete()
+    db.commit()
+    tasas_historicas.obtener_indice(db)  # índice cargado antes del primer refresco del día
+    resultados = []
+
+    escritas = tasas_historicas.guardar_del_dia(db, hoy, {"USD": 1.0, "ARS": 1000.0})
+    invalidado = tasas_historicas.vigente() is None
+    resultados.append(("primer_refresco", escritas == 2 and invalidado, f"{escritas} escrita(s), invalidado={invalidado}"))
+
+    indice = tasas_historicas.obtener_indice(db)
+    escritas = tasas_historicas.guardar_del_dia(db, hoy, {"USD": 1.0, "ARS": 1000.0})
+    mismo = tasas_historicas.vigente() is indice
+    resultados.append(("sin_cambios", escritas == 0 and mismo, f"{escritas} escrita(s), mismo índice={mismo}"))
+
+    escritas = tasas_historicas.guardar_del_dia(db, hoy, {"USD": 1.0, "ARS": 1010.0})
+    mismo = tasas_historicas.vigente() is indice
+    tasa = indice.tasa("ARS", hoy)
+    resultados.append((
+        "con_cambios", escritas == 1 and mismo and tasa == 1010.0,
+        f"{escritas} escrita(s), mismo índice={mismo}, ARS={tasa}",
+    ))
+    return resultados
+
+
+def main() -> int:
+    from benchmarks.suite import preparar_entorno
+
+    directorio = tempfile.mkdtemp(prefix="chequeo_tasas_")
+    preparar_entorno(directorio)
+    # sin trabajos programados: el refresco de tasas reemplazaría el proveedor caído
+    os.environ["TASAS_INTERVALO_REFRESCO"] = "0"
+    os.environ["LIMPIEZA_CRON"] = ""
+    os.environ["CIERRE_CRON"] = ""
+
+    from src.database import SessionLocal, engine
+    from src.migraciones import migrar
+
+    ahora = datetime.now()
+    migrar(engine)
+    with SessionLocal() as db:
+        sembrar(db, ahora)
+
+    fallas = 0
+    for nombre, esperado, obtenido, cuerpo in asyncio.run(pedir(ahora)):
+        ok = obtenido == esperado
+        fallas += not ok
+        print(f"[{'OK' if ok else 'FALLA'}] {nombre}: {obtenido} (se esperaba {esperado})")
+        if not ok:
+            print(f"    {cuerpo[:200]}")
+    with SessionLocal() as db:
+        for nombre, ok, detalle in chequear_registro(db):
+            fallas += not ok
+            print(f"[{'OK' if ok else 'FALLA'}] {nombre}: {detalle}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Generador reproducible de datos sintéticos de hogares para benchmarks.
+
+Crea usuarios con ingresos, gastos y presupuestos repartidos en los últimos
+`meses` meses (el actual incluido), usando las clases de src.gestion.models,
+y el historial diario de tasas de cambio que cubre esas fechas (sin él los
+resúmenes de meses anteriores con ingresos en otras monedas devuelven 404).
+Con la misma escala y semilla siempre se generan los mismos datos.
+
+Uso (desde backend/):
+    python -m benchmarks.datos sqlite:///bench.db --usuarios 100 --gastos 1000
+"""
+import argparse
+import random
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from src.gestion.models import CategoriaGasto, Gasto, Ingreso, Moneda, Presupuesto, TasaCambio, Usuario
+from src.gestion.presupuestos import recalcular_montos
+from src.gestion.totales import reconstruir_totales
+
+MONEDAS = ("Pesos", "Dolar", "Euro")
+# tasa inicial relativa al USD de cada moneda de MONEDAS (mismo orden)
+TASAS = (("ARS", 900.0), ("USD", 1.0), ("EUR", 0.92))
+FUENTES = ("Sueldo", "Freelance", "Alquiler", "Venta", "Intereses")
+PASSWORD = "benchmark123"
+TAMANIO_LOTE = 5_000
+
+
+@dataclass
+class Escala:
+    usuarios: int = 50
+    ingresos: int = 100  # por usuario
+    gastos: int = 400  # por usuario
+    categorias: int = 12
+    monedas: int = 3
+    presupuestos: int = 5  # por usuario, mensuales
+    meses: int = 12
+    semilla: int = 42
+
+    @classmethod
+    def agregar_argumentos(cls, parser: argparse.ArgumentParser):
+        for campo in fields(cls):
+            parser.add_argument(f"--{campo.name}", type=int, default=campo.default)
+
+    @classmethod
+    def desde_argumentos(cls, args) -> "Escala":
+        return cls(**{campo.name: getattr(args, campo.name) for campo in fields(cls)})
+
+
+def email(indice: int) -> str:
+    return f"usuario{indice}@bench.local"
+
+
+def _inicio_de_mes(fecha: datetime, meses_atras: int) -> datetime:
+    mes = fecha.month - 1 - meses_atras
+    return datetime(fecha.year + mes // 12, mes % 12 + 1, 1)
+
+
+def _insertar(db: Session, modelo, filas):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= TAMANIO_LOTE:
+            db.execute(insert(modelo), lote)
+            lote = []
+    if lote:
+        db.execute(insert(modelo), lote)
+
+
+def _tasas_diarias(azar: random.Random, escala: Escala, desde: date, hasta: date):
+    """Una tasa por día y moneda de `desde` a `hasta` inclusive, con una deriva chica diaria."""
+    tasas = dict(TASAS[:escala.monedas])
+    for dias in range((hasta - desde).days + 1):
+        for codigo, tasa in tasas.items():
+            if codigo != "USD":
+                tasas[codigo] = round(tasa * (1 + azar.uniform(-0.004, 0.006)), 4)
+            yield {"fecha": desde + timedelta(days=dias), "codigo": codigo, "tasa": tasas[codigo]}
+
+
+def generar(db: Session, escala: Escala, hashed_password: str, ahora: datetime = None):
+    """Llena una base vacía. Todos los usuarios comparten la contraseña PASSWORD."""
+    azar = random.Random(escala.semilla)
+    ahora = ahora or datetime.now()
+    primer_mes = _inicio_de_mes(ahora, escala.meses - 1)
+    dias = max((ahora - primer_mes).days, 1)
+
+    def fecha_al_azar() -> datetime:
+        return primer_mes + timedelta(days=azar.randrange(dias), seconds=azar.randrange(86_400))
+
+    db.add_all(Moneda(nombre=nombre) for nombre in MONEDAS[:escala.monedas])
+    db.add_all(CategoriaGasto(nombre=f"Categoría {i}") for i in range(1, escala.categorias + 1))
+    db.flush()
+    _insertar(db, Usuario, (
+        {"nombre": f"Usuario {i}", "email": email(i), "hashed_password": hashed_password}
+        for i in range(1, escala.usuarios + 1)
+    ))
+    _insertar(db, Ingreso, (
+        {
+            "id_usuario": u,
+            "monto": round(azar.lognormvariate(11, 0.6), 2),
+            "id_moneda": 1 + azar.randrange(escala.monedas),
+            "fuente": azar.choice(FUENTES),
+            "fecha": fecha_al_azar(),
+        }
+        for u in range(1, escala.usuarios + 1)
+        for _ in range(escala.ingresos)
+    ))
+    _insertar(db, Gasto, (
+        {
+            "id_usuario": u,
+            "monto": round(azar.lognormvariate(8, 1.0), 2),
+            "id_categoria": 1 + azar.randrange(escala.categorias),
+            "fecha": fecha_al_azar(),
+        }
+        for u in range(1, escala.usuarios + 1)
+        for _ in range(escala.gastos)
+    ))
+    _insertar(db, Presupuesto, (
+        {
+            "id_usuario": u,
+            "id_categoria": 1 + azar.randrange(escala.categorias),
+            "id_moneda": 1,
+            "monto_objetivo": round(azar.uniform(50_000, 500_000), 2),
+            "monto_actual": 0.0,
+            "periodo": "mensual",
+            "fecha_inicio": inicio,
+            "fecha_fin": _inicio_de_mes(inicio, -1) - timedelta(microseconds=1),
+        }
+        for u in range(1, escala.usuarios + 1)
+        for inicio in [_inicio_de_mes(ahora, azar.randrange(escala.meses)) for _ in range(escala.presupuestos)]
+    ))
+    _insertar(db, TasaCambio, _tasas_diarias(azar, escala, primer_mes.date(), ahora.date()))
+    db.commit()
+    # los inserts en bloque no pasan por los servicios: se reconstruyen los derivados
+    reconstruir_totales(db)
+    recalcular_montos(db, solo_activos=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una base con datos sintéticos.")
+    parser.add_argument("url", help="URL de SQLAlchemy de una base vacía")
+    Escala.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.auth.passwords import contexto
+    from src.models import BaseModel
+
+    engine = create_engine(args.url)
+    BaseModel.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        generar(db, Escala.desde_argumentos(args), contexto().hash(PASSWORD))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
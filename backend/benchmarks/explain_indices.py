@@ -0,0 +1,125 @@
+"""Verifica con EXPLAIN QUERY PLAN que las consultas por período usan los índices.
+
+Uso (desde backend/):
+    python -m benchmarks.explain_indices
+
+No arma consultas de ejemplo: llama a las funciones de services (resumen del
+mes, rango, desglose, paginación por cursor) sobre una base SQLite en memoria,
+captura cada SELECT que ejecutan y pide su plan. En las tablas de movimientos
+cada acceso tiene que ser un SEARCH por índice, y si la sentencia filtra por
+fecha el rango tiene que formar parte de la búsqueda (predicado sargable, sin
+extract() sobre la columna). Termina con código distinto de cero si alguna
+consulta no cumple, así se puede correr como chequeo en CI.
+"""
+import os
+import re
+import sys
+from datetime import date, datetime
+
+os.environ.setdefault("DB_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.models import BaseModel
+from src.gestion import services, tasas_historicas
+from src.gestion.models import CategoriaGasto, Gasto, Ingreso, Moneda, Presupuesto, Usuario
+from src.utils.tasas_cambio import ProveedorTasas, configurar_proveedor
+
+TASAS = {"USD": 1.0, "ARS": 1000.0, "EUR": 0.9}
+# tablas que crecen con el uso: nunca se recorren enteras
+TABLAS_MOVIMIENTOS = ("ingresos", "gastos", "resumen", "totales_mensuales", "presupuestos")
+
+
+class BackendFijo:
+    def obtener(self) -> dict:
+        return TASAS
+
+
+def sembrar(db):
+    db.add_all([Moneda(nombre=n) for n in ("Pesos", "Dolar", "Euro")])
+    db.add(CategoriaGasto(nombre="General"))
+    db.add(Usuario(nombre="explain", email="explain@example.com", hashed_password="x"))
+    db.flush()
+    for dia in (3, 10, 20):
+        db.add(Ingreso(id_usuario=1, monto=100.0, fuente="x", id_moneda=1, fecha=datetime(2024, 5, dia)))
+        db.add(Gasto(id_usuario=1, monto=10.0, id_categoria=1, fecha=datetime(2024, 5, dia)))
+        db.add(Presupuesto(
+            id_usuario=1, id_categoria=1, id_moneda=1, monto_objetivo=1.0, monto_actual=0.0,
+            periodo="mensual", fecha_inicio=datetime(2024, 5, dia), fecha_fin=datetime(2024, 6, dia),
+        ))
+    db.commit()
+    from src.gestion.totales import reconstruir_totales
+
+    reconstruir_totales(db)
+    tasas_historicas.guardar(db, [(date(2024, 5, 31), codigo, tasa) for codigo, tasa in TASAS.items()])
+    # el rango lee los meses cerrados de la tabla resumen
+    services.cerrar_mes(db, 4, 2024)
+
+
+def llamadas(db):
+    """(nombre, función) de los servicios cuyos SELECT se revisan."""
+    _, cursor_gastos = services.obtener_gastos_paginados(db, 1, limit=1)
+    _, cursor_presupuestos = services.obtener_presupuestos_paginados(db, 1, limit=1)
+    return [
+        ("obtener_resumen", lambda: services.calcular_totales_mes(db, 1, 5, 2024, TASAS)),
+        ("obtener_resumen", lambda: services.obtener_resumen(db, 1, 5, 2024)),
+        ("obtener_resumen_rango", lambda: services.obtener_resumen_rango(
+            db, 1, datetime(2024, 1, 1), datetime(2024, 7, 1))),
+        ("obtener_desglose_categorias", lambda: services.obtener_desglose_categorias(db, 1, 5, 2024)),
+        ("obtener_desglose_categorias_rango", lambda: services.obtener_desglose_categorias_rango(
+            db, 1, datetime(2024, 4, 15), datetime(2024, 6, 1))),
+        ("obtener_gastos_paginados", lambda: services.obtener_gastos_paginados(
+            db, 1, cursor=cursor_gastos, limit=1, desde=datetime(2024, 5, 1), hasta=datetime(2024, 6, 1))),
+        ("obtener_ingresos_paginados", lambda: services.obtener_ingresos_paginados(
+            db, 1, limit=1, desde=datetime(2024, 5, 1), hasta=datetime(2024, 6, 1))),
+        ("obtener_presupuestos_paginados", lambda: services.obtener_presupuestos_paginados(
+            db, 1, cursor=cursor_presupuestos, limit=1)),
+    ]
+
+
+def problemas_del_plan(sentencia: str, plan: list) -> list:
+    problemas = []
+    for linea in plan:
+        coincidencia = re.match(r"(SCAN|SEARCH) (\w+)", linea)
+        if not coincidencia or coincidencia.group(2) not in TABLAS_MOVIMIENTOS:
+            continue
+        tipo, tabla = coincidencia.groups()
+        if tipo == "SCAN":
+            problemas.append(f"recorre toda la tabla {tabla}: {linea}")
+        elif re.search(rf"\b{tabla}\.fecha\s*[<>]", sentencia) and "fecha" not in linea.split("(", 1)[-1]:
+            problemas.append(f"el rango de fechas de {tabla} no usa el índice: {linea}")
+    return problemas
+
+
+def main() -> int:
+    engine = create_engine("sqlite://")
+    BaseModel.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    configurar_proveedor(ProveedorTasas(BackendFijo(), ruta_snapshot=None))
+    sembrar(db)
+
+    capturadas = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, parameters))
+
+    errores = 0
+    for nombre, llamada in llamadas(db):
+        capturadas.clear()
+        llamada()
+        for sentencia, parametros in list(capturadas):
+            if not any(tabla in sentencia for tabla in TABLAS_MOVIMIENTOS):
+                continue
+            with engine.connect() as conexion:
+                plan = [fila[-1] for fila in conexion.exec_driver_sql(f"EXPLAIN QUERY PLAN {sentencia}", parametros)]
+            problemas = problemas_del_plan(sentencia, plan)
+            print(f"[{'FALLA' if problemas else 'OK'}] {nombre}\n    " + "\n    ".join(problemas or plan))
+            errores += bool(problemas)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
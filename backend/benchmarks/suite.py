@@ -0,0 +1,226 @@
+"""Suite de benchmarks de endpoints, en proceso sobre la app ASGI.
+
+Genera una base SQLite temporal con benchmarks.datos, levanta la app (lifespan
+incluido) y le envía requests con httpx.ASGITransport, sin red ni uvicorn. Por
+escenario reporta requests/segundo y percentiles de latencia.
+
+Uso (desde backend/):
+    python -m benchmarks.suite                                   # escala por defecto
+    python -m benchmarks.suite --usuarios 200 --gastos 1000 --requests 500
+    python -m benchmarks.suite --guardar benchmarks/baseline.json
+    python -m benchmarks.suite --comparar benchmarks/baseline.json --umbral 0.2
+
+Termina con código 1 si algún escenario tuvo respuestas con error (y en ese
+caso no guarda el baseline), o con --comparar si algún escenario empeora más
+que el umbral (p50 o p95 más altos, o menos requests/segundo). Los baselines
+sólo son comparables en la misma máquina y con la misma escala.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+
+from benchmarks.datos import PASSWORD, Escala, email
+
+# (nombre, método, ruta, fracción de --requests)
+ESCENARIOS = [
+    ("resumen_mes", "GET", "/resumen/{usuario}/{mes}/{anio}", 1.0),
+    ("resumen_rango", "GET", "/resumen/{usuario}/rango?desde={desde}&hasta={hasta}", 1.0),
+    ("desglose_categorias", "GET", "/resumen/{usuario}/categorias/{mes}/{anio}", 1.0),
+    ("gastos_paginado", "GET", "/gastos/{usuario}/paginado?limit=50", 1.0),
+    ("ingresos_listado", "GET", "/ingresos/{usuario}?limit=50", 1.0),
+    ("categorias", "GET", "/categorias/", 1.0),
+    ("recalcular_presupuestos", "POST", "/presupuestos/{usuario}/recalcular-montos?incluir_vencidos=true", 0.5),
+    ("login", "POST", "/login", 0.1),  # bcrypt domina: menos requests
+]
+
+
+def preparar_entorno(directorio: str):
+    """Variables que src lee al importarse; se fijan antes de importar la app."""
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    os.environ["TASAS_BACKEND"] = "archivo"
+    os.environ["TASAS_ARCHIVO"] = os.path.join(directorio, "tasas.json")
+    os.environ["TASAS_SNAPSHOT"] = ""
+    os.environ["CACHE_BACKEND"] = "memoria"
+    os.environ.setdefault("ENV", "dev")
+    os.environ.setdefault(f"ROOT_PATH_{os.environ['ENV'].upper()}", "")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    with open(os.environ["TASAS_ARCHIVO"], "w") as f:
+        json.dump({"rates": {"USD": 1, "ARS": 1000, "EUR": 0.9}}, f)
+
+
+def sembrar(escala: Escala):
+    from src.auth.passwords import contexto
+    from src.database import SessionLocal, engine
+    from src.migraciones import migrar
+    from benchmarks.datos import generar
+
+    migrar(engine)
+    inicio = time.perf_counter()
+    with SessionLocal() as db:
+        generar(db, escala, contexto().hash(PASSWORD))
+    return time.perf_counter() - inicio
+
+
+def percentil(valores, p: int) -> float:
+    if len(valores) < 2:
+        return valores[0] if valores else 0.0
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+async def correr_escenario(cliente, escala: Escala, metodo: str, ruta: str, cantidad: int, concurrencia: int, azar):
+    ahora = datetime.now()
+    desde = datetime(ahora.year - 1, ahora.month, 1).date().isoformat()
+
+    def armar():
+        usuario = 1 + azar.randrange(escala.usuarios)
+        url = ruta.format(usuario=usuario, mes=ahora.month, anio=ahora.year, desde=desde, hasta=ahora.date().isoformat())
+        cuerpo = {"email": email(usuario), "password": PASSWORD} if ruta == "/login" else None
+        return url, cuerpo
+
+    pedidos = [armar() for _ in range(cantidad)]
+    latencias = []
+    errores = 0
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def uno(url, cuerpo):
+        nonlocal errores
+        async with semaforo:
+            t0 = time.perf_counter()
+            respuesta = await cliente.request(metodo, url, json=cuerpo)
+            latencias.append(time.perf_counter() - t0)
+            if respuesta.status_code >= 400:
+                errores += 1
+
+    # calentamiento: primeras lecturas de caches y de páginas de SQLite
+    await asyncio.gather(*(uno(*p) for p in pedidos[: max(1, cantidad // 10)]))
+    latencias.clear()
+    errores = 0
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uno(*p) for p in pedidos))
+    duracion = time.perf_counter() - inicio
+    return {
+        "requests": cantidad,
+        "errores": errores,
+        "rps": round(cantidad / duracion, 2),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+    }
+
+
+async def correr(escala: Escala, requests: int, concurrencia: int, nombres) -> dict:
+    import httpx
+    from src.main import app
+    from src.utils.jwt import create_access_token
+
+    token = create_access_token({"sub": "1", "email": email(1), "name": "Usuario 1"})
+    azar = random.Random(escala.semilla)
+    resultados = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=60.0,
+        ) as cliente:
+            for nombre, metodo, ruta, fraccion in ESCENARIOS:
+                if nombres and nombre not in nombres:
+                    continue
+                cantidad = max(10, int(requests * fraccion))
+                resultados[nombre] = await correr_escenario(
+                    cliente, escala, metodo, ruta, cantidad, concurrencia, azar
+                )
+                r = resultados[nombre]
+                print(
+                    f"{nombre:<26} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                    f"{r['p99_ms']:>9.2f} {r['errores']:>7}"
+                )
+    return resultados
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> list:
+    """Lista de regresiones: (escenario, métrica, valor base, valor actual)."""
+    regresiones = []
+    for nombre, r in actual["escenarios"].items():
+        b = base["escenarios"].get(nombre)
+        if b is None:
+            continue
+        for metrica in ("p50_ms", "p95_ms"):
+            if r[metrica] > b[metrica] * (1 + umbral):
+                regresiones.append((nombre, metrica, b[metrica], r[metrica]))
+        if r["rps"] < b["rps"] * (1 - umbral):
+            regresiones.append((nombre, "rps", b["rps"], r["rps"]))
+    return regresiones
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de endpoints sobre datos sintéticos.")
+    Escala.agregar_argumentos(parser)
+    parser.add_argument("--requests", type=int, default=200, help="Requests por escenario (antes de su fracción)")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--escenarios", help="Lista separada por comas; por defecto todos")
+    parser.add_argument("--guardar", help="Escribe los resultados como baseline JSON")
+    parser.add_argument("--comparar", help="Baseline JSON contra el que comparar")
+    parser.add_argument("--umbral", type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    escala = Escala.desde_argumentos(args)
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        if base["escala"] != asdict(escala) or base["concurrencia"] != args.concurrencia:
+            print("El baseline se generó con otra escala o concurrencia; no es comparable.", file=sys.stderr)
+            return 2
+
+    directorio = tempfile.mkdtemp(prefix="bench_")
+    preparar_entorno(directorio)
+    print(f"Generando datos: {asdict(escala)}")
+    print(f"  listo en {sembrar(escala):.1f} s")
+    print(f"{'escenario':<26} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>7}")
+    nombres = set(args.escenarios.split(",")) if args.escenarios else None
+    escenarios = asyncio.run(correr(escala, args.requests, args.concurrencia, nombres))
+
+    resultado = {
+        "escala": asdict(escala),
+        "concurrencia": args.concurrencia,
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "escenarios": escenarios,
+    }
+    # un escenario que responde errores mide otra cosa: no sirve como resultado ni como baseline
+    con_errores = [nombre for nombre, r in escenarios.items() if r["errores"]]
+    for nombre in con_errores:
+        print(f"ERRORES {nombre}: {escenarios[nombre]['errores']} respuesta(s) con error")
+    if con_errores:
+        return 1
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"Baseline guardado en {args.guardar}")
+
+    if base is not None:
+        regresiones = comparar(resultado, base, args.umbral)
+        for nombre, metrica, antes, ahora in regresiones:
+            print(f"REGRESIÓN {nombre} {metrica}: {antes} -> {ahora}")
+        if regresiones:
+            return 1
+        print(f"Sin regresiones por encima del {args.umbral:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
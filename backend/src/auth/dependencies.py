@@ -1,29 +1,149 @@
+import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from typing import Optional, Set
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+from sqlalchemy.ext.asyncio import AsyncSession
 from jwt import PyJWTError
-from src.database import get_db
+from src.database import get_db, get_async_db
+from src.gestion import schemas
 from src.gestion.models import Usuario
+from src.utils.cache import crear_cache
 from src.utils.jwt import decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+# "db": consulta el usuario en cada request (comportamiento original)
+# "cache": consulta el usuario una vez y lo guarda en una cache LRU con TTL
+# "stateless": confía en los claims del token (sub, email, name) luego de verificar la firma
+AUTH_MODO = os.getenv("AUTH_MODO", "db")
+AUTH_CACHE_MAX_ITEMS = int(os.getenv("AUTH_CACHE_MAX_ITEMS", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+
+usuarios_cache = crear_cache("usuarios", max_items=AUTH_CACHE_MAX_ITEMS, ttl=AUTH_CACHE_TTL)
+
+
+def invalidar_usuario(id_usuario: int):
+    usuarios_cache.delete(int(id_usuario))
+
+
+# Cualquier cambio de un usuario (por ORM) invalida su entrada en la cache
+@event.listens_for(Usuario, "after_update")
+@event.listens_for(Usuario, "after_delete")
+def _invalidar_usuario_modificado(mapper, connection, target):
+    invalidar_usuario(target.id)
+
+
+def _ids_en_criterio(criterio) -> Optional[Set[int]]:
+    """ids fijados por `Usuario.id == x` o `Usuario.id.in_([...])` en el WHERE; None si no se pueden saber."""
+    if criterio is None:
+        return None
+    if isinstance(criterio, BooleanClauseList) and criterio.operator is operators.and_:
+        condiciones = criterio.clauses
+    else:
+        condiciones = [criterio]
+    for condicion in condiciones:
+        if not isinstance(condicion, BinaryExpression) or not isinstance(condicion.right, BindParameter):
+            continue
+        columna = condicion.left
+        if getattr(columna, "table", None) is not Usuario.__table__ or columna.name != "id":
+            continue
+        if condicion.operator is operators.eq:
+            return {int(condicion.right.value)}
+        if condicion.operator is operators.in_op:
+            return {int(valor) for valor in condicion.right.value}
+    return None
+
+
+# Los updates/deletes masivos (ej. BaseModel.update) no disparan los eventos del mapper
+@event.listens_for(Session, "do_orm_execute")
+def _invalidar_en_sentencia_masiva(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete) or mapper is None or mapper.class_ is not Usuario:
+        return
+    sentencia = orm_execute_state.statement
+    if orm_execute_state.is_update:
+        columnas = {getattr(columna, "key", columna) for columna in sentencia._values or ()}
+        if columnas and not columnas & schemas.Usuario.model_fields.keys():
+            return  # ej. el hash de la contraseña: no forma parte de lo cacheado
+    ids = _ids_en_criterio(sentencia.whereclause)
+    if ids is None:
+        usuarios_cache.clear()
+        return
+    for id_usuario in ids:
+        invalidar_usuario(id_usuario)
+
+
+def _usuario_desde_claims(payload: dict) -> schemas.Usuario:
+    # model_construct evita revalidar el email en cada request: el token ya está firmado
+    return schemas.Usuario.model_construct(
+        id=int(payload["sub"]), nombre=payload.get("name"), email=payload.get("email")
+    )
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _validar_token(token: str) -> dict:
     try:
         payload = decode_access_token(token)
         if payload is None:
-            raise credentials_exception
+            raise _credentials_exception()
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except PyJWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return payload
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    payload = _validar_token(token)
+    user_id = payload["sub"]
+
+    if AUTH_MODO == "stateless":
+        return _usuario_desde_claims(payload)
+
+    if AUTH_MODO == "cache":
+        user = usuarios_cache.get(int(user_id))
+        if user is not None:
+            return user
+
     user = db.query(Usuario).filter(Usuario.id == user_id).first()
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+
+    if AUTH_MODO == "cache":
+        user = schemas.Usuario.model_validate(user)
+        usuarios_cache.set(user.id, user)
+    return user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    payload = _validar_token(token)
+    user_id = payload["sub"]
+
+    if AUTH_MODO == "stateless":
+        return _usuario_desde_claims(payload)
+
+    if AUTH_MODO == "cache":
+        user = usuarios_cache.get(int(user_id))
+        if user is not None:
+            return user
+
+    user = await db.get(Usuario, int(user_id))
+    if user is None:
+        raise _credentials_exception()
+
+    if AUTH_MODO == "cache":
+        user = schemas.Usuario.model_validate(user)
+        usuarios_cache.set(user.id, user)
+    return user
@@ -0,0 +1,55 @@
+"""Hash y verificación de contraseñas en un pool de hilos propio y acotado.
+
+bcrypt es intencionalmente lento y consume CPU; si corre en el threadpool
+compartido de Starlette, una ráfaga de logins deja sin hilos al resto de los
+endpoints. Acá se limita a PASSWORD_WORKERS operaciones simultáneas y el
+request espera de forma async sin ocupar un hilo.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Por defecto la mitad de los núcleos, para dejar CPU libre al resto de los requests
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+_contexto = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def contexto():
+    """CryptContext de bcrypt, creado al primer uso para no cargar passlib en el arranque."""
+    global _contexto
+    if _contexto is None:
+        from passlib.context import CryptContext
+
+        # Los hashes con otro costo se marcan para actualizar al verificarse
+        _contexto = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _contexto
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="passwords")
+    return _executor
+
+
+async def hashear(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_obtener_executor(), contexto().hash, password)
+
+
+async def verificar(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Devuelve (es_valida, nuevo_hash); nuevo_hash no es None si hay que actualizar el costo."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _obtener_executor(), contexto().verify_and_update, password, hashed_password
+    )
+
+
+def cerrar():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
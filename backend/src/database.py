@@ -1,12 +1,108 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 load_dotenv()
 
-engine = create_engine(os.getenv("DB_URL"), connect_args={"check_same_thread": False})
+DB_URL = os.getenv("DB_URL")
+# Con DB_ASYNC=true las rutas de lectura y alta usan AsyncSession (aiosqlite / asyncpg)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+# Configuración del pool de conexiones
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))  # segundos, -1 = nunca
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+# Pragmas de SQLite aplicados al abrir cada conexión
+DB_SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "true").lower() == "true"
+DB_SQLITE_SYNCHRONOUS = os.getenv("DB_SQLITE_SYNCHRONOUS", "NORMAL")
+
+
+class MetricasPool:
+    """Contadores de uso del pool: esperas por una conexión, timeouts y overflow."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.timeouts = 0
+        self.overflow_maximo = 0
+
+    def registrar_espera(self, segundos: float, overflow: int):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+            self.overflow_maximo = max(self.overflow_maximo, overflow)
+
+    def registrar_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+metricas_pool = MetricasPool()
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión libre."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            metricas_pool.registrar_timeout()
+            raise
+        metricas_pool.registrar_espera(time.perf_counter() - inicio, max(self.overflow(), 0))
+        return conexion
+
+
+def _es_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite"
+
+
+def _es_sqlite_en_memoria(url) -> bool:
+    return _es_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def _argumentos_engine(url) -> dict:
+    argumentos = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if _es_sqlite(url):
+        argumentos["connect_args"] = {"check_same_thread": False}
+    if not _es_sqlite_en_memoria(url):
+        # SQLite en memoria usa un pool propio de una sola conexión
+        argumentos.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return argumentos
+
+
+def _configurar_sqlite(engine_sync, url):
+    if not _es_sqlite(url) or _es_sqlite_en_memoria(url):
+        return
+
+    @event.listens_for(engine_sync, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if DB_SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={DB_SQLITE_SYNCHRONOUS}")
+        cursor.close()
+
+
+_url = make_url(DB_URL)
+_argumentos = _argumentos_engine(_url)
+if not _es_sqlite_en_memoria(_url):
+    _argumentos["poolclass"] = QueuePoolMedido
+engine = create_engine(DB_URL, **_argumentos)
+_configurar_sqlite(engine, _url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Dependency
@@ -15,4 +111,79 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def estadisticas_pool() -> dict:
+    """Estado actual del pool sync más los contadores acumulados de espera."""
+    pool = engine.pool
+    estado = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update(
+            tamanio=pool.size(),
+            conexiones_en_uso=pool.checkedout(),
+            conexiones_libres=pool.checkedin(),
+            overflow_actual=max(pool.overflow(), 0),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    estado.update(
+        checkouts=metricas_pool.checkouts,
+        espera_total_segundos=round(metricas_pool.espera_total, 6),
+        espera_maxima_segundos=round(metricas_pool.espera_maxima, 6),
+        espera_media_segundos=round(metricas_pool.espera_total / metricas_pool.checkouts, 6)
+        if metricas_pool.checkouts else 0.0,
+        timeouts=metricas_pool.timeouts,
+        overflow_maximo=metricas_pool.overflow_maximo,
+    )
+    return estado
+
+
+DRIVERS_ASYNC = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def url_async(url: str) -> str:
+    """Traduce la URL sync al driver async equivalente (DB_ASYNC_URL tiene prioridad)."""
+    if os.getenv("DB_ASYNC_URL"):
+        return os.getenv("DB_ASYNC_URL")
+    esquema, resto = url.split("://", 1)
+    esquema = esquema.split("+")[0]
+    return f"{DRIVERS_ASYNC.get(esquema, esquema)}://{resto}"
+
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_sessionmaker():
+    # Se crea a demanda para no exigir aiosqlite/asyncpg cuando DB_ASYNC está apagado
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = make_url(url_async(DB_URL))
+        argumentos = _argumentos_engine(url)
+        if _es_sqlite(url):
+            argumentos.pop("connect_args")
+        if not _es_sqlite_en_memoria(url):
+            # aiosqlite usa NullPool por defecto; con un pool se respetan los mismos límites que en sync
+            argumentos["poolclass"] = AsyncAdaptedQueuePool
+        _async_engine = create_async_engine(url, **argumentos)
+        _configurar_sqlite(_async_engine.sync_engine, url)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _AsyncSessionLocal
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def cerrar_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -0,0 +1,146 @@
+"""Cierre mensual: resúmenes finales de todos los usuarios para los meses terminados.
+
+Cerrar un mes guarda un `Resumen` por usuario, convertido con las tasas del
+historial al último día del mes, y avanza la marca `ultimo_mes_cerrado` de la
+tabla `parametros`. Desde entonces el mes no admite altas, bajas ni
+modificaciones, así que su resumen se puede servir con cache HTTP inmutable.
+
+Cierre manual (desde backend/):
+    python -m src.gestion.cierres                  # todos los meses terminados sin cerrar
+    python -m src.gestion.cierres --hasta 2024-05
+
+El cierre automático es opcional: el planificador (src/tareas.py) lo corre sólo
+si se configura CIERRE_CRON (ej. "5 0 1 * *", el día 1 de cada mes a las 00:05)
+o CIERRE_INTERVALO en segundos. Un mes cerrado rechaza con 409 los PUT/DELETE
+de sus ingresos y gastos. Si la base nunca se cerró, la primera corrida
+automática cierra sólo los últimos CIERRE_MESES_INICIALES meses terminados (por
+defecto el anterior); el historial previo sigue editable. El CLI, en cambio,
+cierra todo lo pendiente.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.gestion import exceptions
+from src.models import Parametro
+
+CIERRE_CRON = os.getenv("CIERRE_CRON", "")  # vacío = sin cierre automático por cron
+CIERRE_INTERVALO = float(os.getenv("CIERRE_INTERVALO", "0"))  # segundos; si es mayor a 0 reemplaza a CIERRE_CRON
+CIERRE_MESES_INICIALES = int(os.getenv("CIERRE_MESES_INICIALES", "1"))  # primera corrida automática
+CIERRES_CACHE_TTL = float(os.getenv("CIERRES_CACHE_TTL", "60"))
+
+CLAVE_ULTIMO_CIERRE = "ultimo_mes_cerrado"
+# primer mes cerrado: los anteriores siguen abiertos (ver CIERRE_MESES_INICIALES).
+# Las bases cerradas antes de existir esta marca no la tienen: todo hasta el último está cerrado.
+CLAVE_PRIMER_CIERRE = "primer_mes_cerrado"
+CACHE_CONTROL_CERRADO = "private, max-age=31536000, immutable"
+CACHE_CONTROL_ABIERTO = "private, no-cache"
+
+Mes = Tuple[int, int]
+Periodo = Tuple[Optional[Mes], Mes]  # (primero o None, último)
+
+_periodo: Optional[Periodo] = None
+_leido = float("-inf")
+
+
+def _leer_mes(db: Session, clave: str) -> Optional[Mes]:
+    valor = Parametro.leer(db, clave)
+    if not valor:
+        return None
+    anio, mes = valor.split("-")
+    return int(anio), int(mes)
+
+
+def _leer(db: Session) -> Optional[Periodo]:
+    ultimo = _leer_mes(db, CLAVE_ULTIMO_CIERRE)
+    if ultimo is None:
+        return None
+    return _leer_mes(db, CLAVE_PRIMER_CIERRE), ultimo
+
+
+def periodo_cerrado(db: Session, usar_cache: bool = True) -> Optional[Periodo]:
+    """(primero, último) de los meses cerrados. Con cache puede atrasarse hasta CIERRES_CACHE_TTL."""
+    global _periodo, _leido
+    if not usar_cache or not cache_vigente():
+        _periodo, _leido = _leer(db), time.monotonic()
+    return _periodo
+
+
+def ultimo_mes_cerrado(db: Session, usar_cache: bool = True) -> Optional[Mes]:
+    """(anio, mes) del último mes cerrado. Con cache puede atrasarse hasta CIERRES_CACHE_TTL."""
+    periodo = periodo_cerrado(db, usar_cache)
+    return periodo[1] if periodo else None
+
+
+def cache_vigente() -> bool:
+    """True si la marca en memoria no venció: periodo_cerrado con cache no toca la base."""
+    return time.monotonic() - _leido <= CIERRES_CACHE_TTL
+
+
+def en_periodo(periodo: Optional[Periodo], mes: int, anio: int) -> bool:
+    if periodo is None:
+        return False
+    primero, ultimo = periodo
+    return (primero is None or primero <= (anio, mes)) and (anio, mes) <= ultimo
+
+
+def mes_cerrado(db: Session, mes: int, anio: int, usar_cache: bool = True) -> bool:
+    return en_periodo(periodo_cerrado(db, usar_cache), mes, anio)
+
+
+def verificar_mes_abierto(db: Session, fecha: datetime):
+    """Rechaza escrituras en meses cerrados. Lee la marca de la base, sin cache."""
+    if mes_cerrado(db, fecha.month, fecha.year, usar_cache=False):
+        raise exceptions.MesCerrado()
+
+
+def cache_control(db: Session, mes: int, anio: int) -> str:
+    return CACHE_CONTROL_CERRADO if mes_cerrado(db, mes, anio) else CACHE_CONTROL_ABIERTO
+
+
+def registrar_cierre(db: Session, mes: int, anio: int):
+    """Extiende el período cerrado hasta incluir el mes (no hace commit)."""
+    global _leido
+    periodo = _leer(db)
+    valor = f"{anio:04d}-{mes:02d}"
+    if periodo is None:
+        Parametro.escribir(db, CLAVE_PRIMER_CIERRE, valor)
+    elif periodo[0] is not None and (anio, mes) < periodo[0]:
+        Parametro.escribir(db, CLAVE_PRIMER_CIERRE, valor)
+    if periodo is None or (anio, mes) > periodo[1]:
+        Parametro.escribir(db, CLAVE_ULTIMO_CIERRE, valor)
+    _leido = float("-inf")
+
+
+def _mes(valor: str) -> Tuple[int, int]:
+    anio, mes = valor.split("-")
+    return int(anio), int(mes)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cierra los meses terminados y guarda sus resúmenes.")
+    parser.add_argument("--hasta", type=_mes, help="Último mes a cerrar (AAAA-MM); por defecto el anterior al actual.")
+    args = parser.parse_args(argv)
+
+    from src.database import SessionLocal
+    from src.gestion.services import cerrar_meses_vencidos
+
+    with SessionLocal() as db:
+        try:
+            cerrados = cerrar_meses_vencidos(db, hasta=args.hasta)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+    for anio, mes, cantidad in cerrados:
+        print(f"{anio:04d}-{mes:02d}: {cantidad} resumen(es)")
+    print(f"{len(cerrados)} mes(es) cerrado(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,4 +12,11 @@ class ErrorCode:
     GASTO_YA_REGISTRADO = "El gasto ya se encuentra registrado."
     INGRESO_NO_PERTENECE_A_USUARIO = "El ingreso no pertenece al usuario."
     RESUMEN_NO_ENCONTRADO = "El resumen no fue encontrado."
-    CATEGORIA_NO_ENCONTRADA = "La categoría no fue encontrada."
\ No newline at end of file
+    CATEGORIA_NO_ENCONTRADA = "La categoría no fue encontrada."
+    TASAS_CAMBIO_NO_DISPONIBLES = "No se pudieron obtener las tasas de cambio."
+    TASAS_HISTORICAS_NO_DISPONIBLES = "No hay tasas de cambio históricas para convertir los ingresos de ese mes."
+    CURSOR_INVALIDO = "El cursor de paginación no es válido."
+    FORMATO_IMPORTACION_INVALIDO = "El contenido a importar no tiene un formato válido (JSON, NDJSON o CSV)."
+    RANGO_FECHAS_INVALIDO = "La fecha 'desde' debe ser anterior a 'hasta'."
+    RANGO_FECHAS_DEMASIADO_LARGO = "El rango no puede abarcar más de 120 meses."
+    MES_CERRADO = "El mes ya fue cerrado: no admite altas, bajas ni modificaciones."
@@ -1,6 +1,6 @@
 from typing import Dict, Any, List, Union
 from src.gestion.constants import ErrorCode
-from src.exceptions import NotFound, BadRequest, PermissionDenied
+from src.exceptions import NotFound, BadRequest, Conflict, PermissionDenied, ServiceUnavailable
 
 class UsuarioNoEncontrado(NotFound):
     DETAIL = ErrorCode.USUARIO_NO_ENCONTRADO
@@ -42,4 +42,25 @@ class ResumenNoEncontrado(NotFound):
     DETAIL = ErrorCode.RESUMEN_NO_ENCONTRADO
     
 class CategoriaNoEncontrada(NotFound):
-    DETAIL = ErrorCode.CATEGORIA_NO_ENCONTRADA
\ No newline at end of file
+    DETAIL = ErrorCode.CATEGORIA_NO_ENCONTRADA
+
+class TasasCambioNoDisponibles(ServiceUnavailable):
+    DETAIL = ErrorCode.TASAS_CAMBIO_NO_DISPONIBLES
+
+class TasasHistoricasNoDisponibles(NotFound):
+    DETAIL = ErrorCode.TASAS_HISTORICAS_NO_DISPONIBLES
+
+class CursorInvalido(BadRequest):
+    DETAIL = ErrorCode.CURSOR_INVALIDO
+
+class FormatoImportacionInvalido(BadRequest):
+    DETAIL = ErrorCode.FORMATO_IMPORTACION_INVALIDO
+
+class RangoFechasInvalido(BadRequest):
+    DETAIL = ErrorCode.RANGO_FECHAS_INVALIDO
+
+class RangoFechasDemasiadoLargo(RangoFechasInvalido):
+    DETAIL = ErrorCode.RANGO_FECHAS_DEMASIADO_LARGO
+
+class MesCerrado(Conflict):
+    DETAIL = ErrorCode.MES_CERRADO
@@ -0,0 +1,124 @@
+"""Migración de los montos entre los modos de DINERO_MODO (float <-> centavos).
+
+La base recuerda en qué modo guardó los montos (tabla `parametros`); al arrancar,
+la app se niega a usar una base en un modo distinto al configurado. Las bases
+anteriores a este registro se consideran en modo float.
+
+Uso (desde backend/, con la app detenida):
+    python -m src.gestion.migrar_dinero --estado
+    python -m src.gestion.migrar_dinero --a centavos
+    python -m src.gestion.migrar_dinero --a float
+
+Después de migrar hay que arrancar la app con el DINERO_MODO nuevo.
+"""
+import argparse
+import sys
+from typing import List
+
+from sqlalchemy import Column, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from src.models import BaseModel, Parametro
+from src.utils.dinero import DINERO_MODO, MODOS, Dinero
+
+CLAVE_MODO = "dinero_modo"
+
+
+class ModoDineroIncompatible(RuntimeError):
+    """La base guarda los montos en un modo distinto al de DINERO_MODO."""
+
+
+def columnas_de_dinero() -> List[Column]:
+    import src.gestion.models  # noqa: F401 registra las tablas en la metadata
+
+    return [
+        columna
+        for tabla in BaseModel.metadata.sorted_tables
+        for columna in tabla.columns
+        if isinstance(columna.type, Dinero)
+    ]
+
+
+def _hay_montos(db: Session) -> bool:
+    tablas = {columna.table for columna in columnas_de_dinero()}
+    return any(db.execute(select(1).select_from(tabla).limit(1)).first() for tabla in tablas)
+
+
+def modo_registrado(db: Session) -> str:
+    return Parametro.leer(db, CLAVE_MODO) or "float"
+
+
+def verificar_modo(db: Session, modo: str = DINERO_MODO):
+    """Se llama al arrancar: registra el modo en bases nuevas y rechaza un modo distinto al guardado."""
+    registrado = Parametro.leer(db, CLAVE_MODO)
+    if registrado is None:
+        registrado = "float" if _hay_montos(db) else modo
+        Parametro.escribir(db, CLAVE_MODO, registrado)
+        db.commit()
+    if registrado != modo:
+        raise ModoDineroIncompatible(
+            f"La base guarda los montos en modo '{registrado}' y DINERO_MODO='{modo}'. "
+            f"Migrar con: python -m src.gestion.migrar_dinero --a {modo}"
+        )
+
+
+def _convertir_columna(conexion: Connection, columna: Column, destino: str):
+    tabla, nombre = columna.table.name, columna.name
+    if conexion.dialect.name == "postgresql":
+        if destino == "centavos":
+            sql = f"ALTER TABLE {tabla} ALTER COLUMN {nombre} TYPE BIGINT USING round({nombre} * 100)::bigint"
+        else:
+            sql = f"ALTER TABLE {tabla} ALTER COLUMN {nombre} TYPE DOUBLE PRECISION USING {nombre} / 100.0"
+    else:
+        # SQLite no cambia tipos de columna: basta con reescribir los valores
+        if destino == "centavos":
+            sql = f"UPDATE {tabla} SET {nombre} = ROUND({nombre} * 100)"
+        else:
+            sql = f"UPDATE {tabla} SET {nombre} = {nombre} / 100.0"
+    conexion.execute(text(sql))
+
+
+def migrar(engine: Engine, destino: str) -> bool:
+    """Convierte todas las columnas de montos al modo `destino` en una transacción. False si ya estaba."""
+    if destino not in MODOS:
+        raise ValueError(f"Modo desconocido: {destino}")
+    with engine.begin() as conexion:
+        Parametro.__table__.create(bind=conexion, checkfirst=True)
+        db = Session(bind=conexion)
+        if modo_registrado(db) == destino:
+            return False
+        for columna in columnas_de_dinero():
+            if conexion.dialect.has_table(conexion, columna.table.name):
+                _convertir_columna(conexion, columna, destino)
+        Parametro.escribir(db, CLAVE_MODO, destino)
+        db.flush()
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Migra los montos entre los modos float y centavos.")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--a", dest="destino", choices=MODOS, help="Modo al que convertir la base.")
+    grupo.add_argument("--estado", action="store_true", help="Muestra el modo registrado en la base.")
+    args = parser.parse_args(argv)
+
+    from src.database import engine
+
+    if args.estado:
+        with Session(engine) as db:
+            registrado = Parametro.leer(db, CLAVE_MODO) if engine.dialect.has_table(db.connection(), "parametros") else None
+        print(f"Modo registrado: {registrado or 'float (sin registro)'}; DINERO_MODO={DINERO_MODO}")
+        return 0
+
+    if migrar(engine, args.destino):
+        print(f"Montos convertidos a modo {args.destino} en {len(columnas_de_dinero())} columnas.")
+    else:
+        print(f"La base ya estaba en modo {args.destino}.")
+    if args.destino != DINERO_MODO:
+        print(f"Recordá arrancar la app con DINERO_MODO={args.destino}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
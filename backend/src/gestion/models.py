@@ -1,11 +1,10 @@
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, Index, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from datetime import datetime, UTC
+from datetime import date, datetime, UTC
 from src.models import BaseModel
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.auth import passwords
+from src.utils.dinero import Dinero
 
 class Usuario(BaseModel):
     __tablename__ = "usuarios"
@@ -28,10 +27,10 @@ class Usuario(BaseModel):
     )
 
     def set_password(self, password: str):
-        self.hashed_password = pwd_context.hash(password)
+        self.hashed_password = passwords.contexto().hash(password)
 
     def verify_password(self, password: str) -> bool:
-        return pwd_context.verify(password, self.hashed_password)
+        return passwords.contexto().verify(password, self.hashed_password)
 
 class CategoriaGasto(BaseModel):
     __tablename__ = "categorias_gasto"
@@ -44,10 +43,12 @@ class CategoriaGasto(BaseModel):
 
 class Ingreso(BaseModel):
     __tablename__ = "ingresos"
+    # Las consultas mensuales filtran por usuario y rango de fechas
+    __table_args__ = (Index("ix_ingresos_usuario_fecha", "id_usuario", "fecha"),)
 
     id_ingreso: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     id_usuario: Mapped[int] = mapped_column(ForeignKey("usuarios.id"), nullable=False)
-    monto: Mapped[float] = mapped_column(Float, nullable=False)
+    monto: Mapped[float] = mapped_column(Dinero, nullable=False)
     id_moneda: Mapped[int] = mapped_column(ForeignKey("monedas.id_moneda"), nullable=False)
     fuente: Mapped[str] = mapped_column(String, nullable=False)
     fecha: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
@@ -58,11 +59,16 @@ class Ingreso(BaseModel):
 
 class Gasto(BaseModel):
     __tablename__ = "gastos"
+    __table_args__ = (
+        Index("ix_gastos_usuario_fecha", "id_usuario", "fecha"),
+        # suma por presupuesto (usuario, categoría, período)
+        Index("ix_gastos_usuario_categoria_fecha", "id_usuario", "id_categoria", "fecha"),
+    )
 
     id_gasto: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     id_usuario: Mapped[int] = mapped_column(ForeignKey("usuarios.id"), nullable=False)
     id_categoria: Mapped[int] = mapped_column(ForeignKey("categorias_gasto.id_categoria"), nullable=False)
-    monto: Mapped[float] = mapped_column(Float, nullable=False)
+    monto: Mapped[float] = mapped_column(Dinero, nullable=False)
     fecha: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
 
     # Relaciones
@@ -71,12 +77,13 @@ class Gasto(BaseModel):
 
 class Resumen(BaseModel):
     __tablename__ = "resumen"
+    __table_args__ = (Index("ix_resumen_usuario_fecha", "id_usuario", "fecha"),)
 
     id_resumen: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     id_usuario: Mapped[int] = mapped_column(ForeignKey("usuarios.id"), nullable=False)
-    total_ingresos: Mapped[float] = mapped_column(Float, nullable=False)
-    total_gastos: Mapped[float] = mapped_column(Float, nullable=False)
-    balance: Mapped[float] = mapped_column(Float, nullable=False)
+    total_ingresos: Mapped[float] = mapped_column(Dinero, nullable=False)
+    total_gastos: Mapped[float] = mapped_column(Dinero, nullable=False)
+    balance: Mapped[float] = mapped_column(Dinero, nullable=False)
     fecha: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
 
     # Relación con Usuario
@@ -93,13 +100,18 @@ class Moneda(BaseModel):
 
 class Presupuesto(BaseModel):
     __tablename__ = "presupuestos"
+    __table_args__ = (
+        Index("ix_presupuestos_usuario_fecha_inicio", "id_usuario", "fecha_inicio"),
+        # presupuestos afectados por un gasto
+        Index("ix_presupuestos_usuario_categoria_periodo", "id_usuario", "id_categoria", "fecha_inicio", "fecha_fin"),
+    )
 
     id_presupuesto: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     id_usuario: Mapped[int] = mapped_column(ForeignKey("usuarios.id"), nullable=False)
     id_categoria: Mapped[int] = mapped_column(ForeignKey("categorias_gasto.id_categoria"), nullable=False)
     id_moneda: Mapped[int] = mapped_column(ForeignKey("monedas.id_moneda"), nullable=False)
-    monto_objetivo: Mapped[float] = mapped_column(Float, nullable=False)
-    monto_actual: Mapped[float] = mapped_column(Float, default=0.0)
+    monto_objetivo: Mapped[float] = mapped_column(Dinero, nullable=False)
+    monto_actual: Mapped[float] = mapped_column(Dinero, default=0.0)
     periodo: Mapped[str] = mapped_column(String, nullable=False)  # Ej: "mensual", "trimestral", "anual"
     fecha_inicio: Mapped[datetime] = mapped_column(DateTime)
     fecha_fin: Mapped[datetime] = mapped_column(DateTime)
@@ -107,4 +119,39 @@ class Presupuesto(BaseModel):
     # Relaciones
     usuario: Mapped["Usuario"] = relationship("Usuario")
     categoria: Mapped["CategoriaGasto"] = relationship("CategoriaGasto")
-    moneda: Mapped["Moneda"] = relationship("Moneda")
\ No newline at end of file
+    moneda: Mapped["Moneda"] = relationship("Moneda")
+
+class TotalMensual(BaseModel):
+    """Totales acumulados por usuario, mes y moneda, mantenidos con deltas en cada escritura.
+
+    Los gastos no tienen moneda: se acumulan en la fila con id_moneda = NULL.
+    Hay una sola fila por (usuario, año, mes, moneda), ver `ux_totales_mensuales_clave`.
+    """
+    __tablename__ = "totales_mensuales"
+
+    id_total: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id_usuario: Mapped[int] = mapped_column(ForeignKey("usuarios.id"), nullable=False)
+    anio: Mapped[int] = mapped_column(Integer, nullable=False)
+    mes: Mapped[int] = mapped_column(Integer, nullable=False)
+    id_moneda: Mapped[Optional[int]] = mapped_column(ForeignKey("monedas.id_moneda"), nullable=True)
+    total_ingresos: Mapped[float] = mapped_column(Dinero, default=0.0, nullable=False)
+    cantidad_ingresos: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_gastos: Mapped[float] = mapped_column(Dinero, default=0.0, nullable=False)
+    cantidad_gastos: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+# NULL no choca en un índice único: la fila sin moneda (gastos) se indexa como moneda 0
+MONEDA_O_CERO = func.coalesce(TotalMensual.id_moneda, literal_column("0"))
+# también sirve para las búsquedas por (usuario, año, mes) del resumen
+Index(
+    "ux_totales_mensuales_clave",
+    TotalMensual.id_usuario, TotalMensual.anio, TotalMensual.mes, MONEDA_O_CERO,
+    unique=True,
+)
+
+class TasaCambio(BaseModel):
+    """Tasa diaria de una moneda relativa al USD (historial para convertir a una fecha dada)."""
+    __tablename__ = "tasas_cambio"
+
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    codigo: Mapped[str] = mapped_column(String(3), primary_key=True)
+    tasa: Mapped[float] = mapped_column(Float, nullable=False)
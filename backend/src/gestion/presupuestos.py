@@ -0,0 +1,214 @@
+"""Seguimiento de `Presupuesto.monto_actual`.
+
+Cada alta, modificación o baja de gastos ajusta en la misma transacción el
+monto de los presupuestos que la cubren (mismo usuario y categoría, fecha dentro
+del período). Cuando un presupuesto pasa su monto objetivo se emite un evento
+de umbral a los suscriptores registrados con `suscribir_umbral`, luego del commit.
+
+Para reconstruir desde cero, un único UPDATE con una subconsulta correlacionada
+suma los gastos de cada presupuesto (mismo usuario, misma categoría, dentro de
+su período), así el costo no crece con la cantidad de consultas sino con el
+trabajo del motor.
+
+Como tarea programada (desde backend/):
+    python -m src.gestion.presupuestos                 # presupuestos activos de todos los usuarios
+    python -m src.gestion.presupuestos --usuario 3
+    python -m src.gestion.presupuestos --todos         # incluye presupuestos vencidos
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from src.gestion.models import Gasto, Presupuesto
+from src.utils.dinero import CERO, Monto, normalizar
+
+logger = logging.getLogger(__name__)
+
+# 0 desactiva el recálculo periódico dentro de la app
+PRESUPUESTOS_INTERVALO_RECALCULO = float(os.getenv("PRESUPUESTOS_INTERVALO_RECALCULO", "0"))
+# (usuario, categoría) por consulta de candidatos; SQLite limita la profundidad de los OR
+CLAVES_POR_CONSULTA = 200
+
+Movimiento = Tuple[int, int, datetime, float]  # (id_usuario, id_categoria, fecha, monto con signo)
+
+_suscriptores_umbral: List[Callable[[dict], None]] = []
+
+
+def suscribir_umbral(funcion: Callable[[dict], None]):
+    """Registra una función que recibe el evento cuando un presupuesto supera su objetivo."""
+    _suscriptores_umbral.append(funcion)
+    return funcion
+
+
+@suscribir_umbral
+def _loguear_umbral(evento: dict):
+    logger.info(
+        "Presupuesto %s del usuario %s superó su objetivo: %.2f de %.2f",
+        evento["id_presupuesto"], evento["id_usuario"], evento["monto_actual"], evento["monto_objetivo"],
+    )
+
+
+# Los eventos se acumulan en la sesión y se emiten solo si la transacción se confirma
+@event.listens_for(Session, "after_commit")
+def _emitir_eventos(session):
+    eventos = session.info.pop("eventos_presupuesto", None)
+    for evento in eventos or ():
+        for funcion in _suscriptores_umbral:
+            try:
+                funcion(evento)
+            except Exception as e:
+                logger.warning("Falló un suscriptor de umbral de presupuesto: %s", e)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_eventos(session):
+    session.info.pop("eventos_presupuesto", None)
+
+
+def _sin_zona(fecha: datetime) -> datetime:
+    # las fechas de los presupuestos se guardan sin zona horaria
+    return fecha.replace(tzinfo=None) if fecha.tzinfo else fecha
+
+
+def aplicar_movimientos(db: Session, movimientos: Iterable[Movimiento]):
+    """Suma cada monto a los presupuestos que cubren su fecha. No hace commit."""
+    movimientos = [(u, c, _sin_zona(f), m) for u, c, f, m in movimientos if m]
+    if not movimientos:
+        return
+
+    # Presupuestos candidatos por (usuario, categoría) y rango de fechas del lote,
+    # resueltos con ix_presupuestos_usuario_categoria_periodo
+    rangos: Dict[Tuple[int, int], list] = {}
+    for id_usuario, id_categoria, fecha, _ in movimientos:
+        rango = rangos.setdefault((id_usuario, id_categoria), [fecha, fecha])
+        rango[0], rango[1] = min(rango[0], fecha), max(rango[1], fecha)
+    claves = list(rangos.items())
+    candidatos = []
+    for i in range(0, len(claves), CLAVES_POR_CONSULTA):
+        candidatos.extend(db.execute(
+            select(
+                Presupuesto.id_presupuesto, Presupuesto.id_usuario, Presupuesto.id_categoria,
+                Presupuesto.fecha_inicio, Presupuesto.fecha_fin,
+                Presupuesto.monto_actual, Presupuesto.monto_objetivo,
+            ).where(or_(*(
+                (Presupuesto.id_usuario == id_usuario)
+                & (Presupuesto.id_categoria == id_categoria)
+                & (Presupuesto.fecha_inicio <= hasta)
+                & (Presupuesto.fecha_fin >= desde)
+                for (id_usuario, id_categoria), (desde, hasta) in claves[i:i + CLAVES_POR_CONSULTA]
+            )))
+        ))
+    if not candidatos:
+        return
+
+    por_clave: Dict[Tuple[int, int], list] = {}
+    for candidato in candidatos:
+        por_clave.setdefault((candidato.id_usuario, candidato.id_categoria), []).append(candidato)
+    deltas: Dict[int, Monto] = {}
+    for id_usuario, id_categoria, fecha, monto in movimientos:
+        for candidato in por_clave.get((id_usuario, id_categoria), ()):
+            if candidato.fecha_inicio <= fecha <= candidato.fecha_fin:
+                deltas[candidato.id_presupuesto] = deltas.get(candidato.id_presupuesto, CERO) + normalizar(monto)
+    if not deltas:
+        return
+
+    # sentencia Core: con executemany el UPDATE del ORM exigiría la clave primaria en cada fila
+    tabla = Presupuesto.__table__
+    db.execute(
+        update(tabla)
+        .where(tabla.c.id_presupuesto == bindparam("id"))
+        .values(monto_actual=tabla.c.monto_actual + bindparam("delta")),
+        [{"id": id_presupuesto, "delta": delta} for id_presupuesto, delta in deltas.items()],
+    )
+
+    eventos = db.info.setdefault("eventos_presupuesto", [])
+    for candidato in candidatos:
+        if candidato.id_presupuesto not in deltas:
+            continue
+        monto_actual = candidato.monto_actual or CERO
+        monto_nuevo = monto_actual + deltas[candidato.id_presupuesto]
+        if monto_actual <= candidato.monto_objetivo < monto_nuevo:
+            eventos.append({
+                "id_presupuesto": candidato.id_presupuesto,
+                "id_usuario": candidato.id_usuario,
+                "id_categoria": candidato.id_categoria,
+                "monto_objetivo": candidato.monto_objetivo,
+                "monto_actual": monto_nuevo,
+            })
+
+
+def registrar_gasto(db: Session, gasto: Gasto, signo: int = 1):
+    """Suma (signo=1) o resta (signo=-1) el gasto de sus presupuestos. No hace commit."""
+    aplicar_movimientos(db, [(gasto.id_usuario, gasto.id_categoria, gasto.fecha, signo * gasto.monto)])
+
+
+def registrar_lote_gastos(db: Session, filas: List[dict]):
+    """Aplica un lote de gastos insertados en bloque con una sola búsqueda de presupuestos."""
+    aplicar_movimientos(db, ((f["id_usuario"], f["id_categoria"], f["fecha"], f["monto"]) for f in filas))
+
+
+def _suma_gastos():
+    """Subconsulta correlacionada: total gastado en la categoría y período de cada presupuesto."""
+    return (
+        select(func.coalesce(func.sum(Gasto.monto), 0.0))
+        .where(
+            Gasto.id_usuario == Presupuesto.id_usuario,
+            Gasto.id_categoria == Presupuesto.id_categoria,
+            Gasto.fecha >= Presupuesto.fecha_inicio,
+            Gasto.fecha <= Presupuesto.fecha_fin,
+        )
+        .scalar_subquery()
+    )
+
+
+def recalcular_montos(
+    db: Session,
+    id_usuario: Optional[int] = None,
+    solo_activos: bool = True,
+    ahora: Optional[datetime] = None,
+    id_presupuesto: Optional[int] = None,
+) -> int:
+    """Recalcula monto_actual en una sola sentencia y devuelve cuántos presupuestos se actualizaron.
+
+    Sin id_usuario abarca todos los usuarios; con solo_activos se omiten los ya vencidos.
+    """
+    filtros = []
+    if id_usuario is not None:
+        filtros.append(Presupuesto.id_usuario == id_usuario)
+    if id_presupuesto is not None:
+        filtros.append(Presupuesto.id_presupuesto == id_presupuesto)
+    if solo_activos:
+        filtros.append(Presupuesto.fecha_fin >= (ahora or datetime.now()))
+
+    resultado = db.execute(
+        update(Presupuesto)
+        .where(*filtros)
+        .values(monto_actual=_suma_gastos())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return resultado.rowcount
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recalcula monto_actual de los presupuestos.")
+    parser.add_argument("--usuario", type=int, help="Solo los presupuestos de este usuario.")
+    parser.add_argument("--todos", action="store_true", help="Incluye presupuestos con el período vencido.")
+    args = parser.parse_args(argv)
+
+    from src.database import SessionLocal
+
+    with SessionLocal() as db:
+        actualizados = recalcular_montos(db, id_usuario=args.usuario, solo_activos=not args.todos)
+    print(f"{actualizados} presupuesto(s) recalculado(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
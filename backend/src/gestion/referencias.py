@@ -0,0 +1,145 @@
+"""Cache en proceso de los datos de referencia (categorías de gasto y monedas).
+
+Las tablas se cargan completas al iniciar la app y se vuelven a leer sólo
+cuando las invalida un alta, modificación o baja (o al vencer el TTL). La
+invalidación cambia un token guardado en la cache compartida
+(`src.utils.cache`), así los demás workers detectan que su foto quedó vieja.
+Cada foto tiene una versión derivada de su contenido que se usa como ETag de
+los listados.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Response
+from sqlalchemy.orm import Session
+
+from src.gestion import schemas
+from src.gestion.models import CategoriaGasto, Moneda
+from src.utils.cache import crear_cache
+
+REFERENCIAS_CACHE_TTL = float(os.getenv("REFERENCIAS_CACHE_TTL", "300"))
+# cantidad de combinaciones (skip, limit) serializadas que se guardan por foto
+MAX_CUERPOS = 64
+
+CATEGORIAS = "categorias"
+MONEDAS = "monedas"
+
+_TABLAS = {
+    CATEGORIAS: (CategoriaGasto, "id_categoria", schemas.CategoriaGasto),
+    MONEDAS: (Moneda, "id_moneda", schemas.Moneda),
+}
+
+
+class Listado:
+    """Foto inmutable de una tabla de referencia."""
+
+    def __init__(self, filas: List[dict], campo_id: str, token: str):
+        self.filas = filas
+        self.token = token
+        self.por_id = {fila[campo_id]: fila for fila in filas}
+        contenido = json.dumps(filas, sort_keys=True, ensure_ascii=False).encode()
+        self.version = hashlib.sha1(contenido).hexdigest()[:16]
+        self.cargado = time.monotonic()
+        self._cuerpos: Dict[Tuple[int, int], bytes] = {}
+
+    def pagina(self, skip: int, limit: int) -> List[dict]:
+        skip = max(skip, 0)
+        return self.filas[skip:skip + max(limit, 0)]
+
+    def etag(self, skip: int, limit: int) -> str:
+        return f'"{self.version}-{skip}-{limit}"'
+
+    def cuerpo(self, skip: int, limit: int) -> bytes:
+        """La página ya serializada a JSON, memorizada por (skip, limit)."""
+        cuerpo = self._cuerpos.get((skip, limit))
+        if cuerpo is None:
+            cuerpo = json.dumps(self.pagina(skip, limit), ensure_ascii=False, separators=(",", ":")).encode()
+            if len(self._cuerpos) < MAX_CUERPOS:
+                self._cuerpos[(skip, limit)] = cuerpo
+        return cuerpo
+
+
+_listados: Dict[str, Listado] = {}
+# token por tabla, compartido entre workers; cambia en cada invalidación
+_tokens = crear_cache("referencias", max_items=len(_TABLAS), ttl=7 * 24 * 3600)
+_lock = threading.Lock()
+
+
+def token(tabla: str) -> str:
+    """Token vigente de la tabla en la cache compartida (lo crea si no hay)."""
+    with _lock:
+        actual = _tokens.get(tabla)
+        if actual is None:
+            actual = uuid.uuid4().hex
+            _tokens.set(tabla, actual)
+        return actual
+
+
+def cargar_tabla(db: Session, tabla: str, token_tabla: Optional[str] = None) -> Listado:
+    """Lee la tabla y guarda su foto. `token_tabla` permite resolver el token fuera de la sesión."""
+    modelo, campo_id, schema = _TABLAS[tabla]
+    # el token se lee antes de consultar: si se invalida mientras tanto, la foto
+    # queda con el token viejo y se vuelve a leer en el próximo acceso
+    token_tabla = token_tabla or token(tabla)
+    filas = [
+        schema.model_validate(fila).model_dump()
+        for fila in db.query(modelo).order_by(getattr(modelo, campo_id))
+    ]
+    listado = Listado(filas, campo_id, token_tabla)
+    _listados[tabla] = listado
+    return listado
+
+
+def vigente(tabla: str) -> Optional[Listado]:
+    """La foto en cache si no venció ni fue invalidada, sin tocar la base."""
+    listado = _listados.get(tabla)
+    if listado is None or time.monotonic() - listado.cargado > REFERENCIAS_CACHE_TTL:
+        return None
+    if _tokens.get(tabla) != listado.token:
+        return None
+    return listado
+
+
+def obtener(db: Session, tabla: str) -> Listado:
+    return vigente(tabla) or cargar_tabla(db, tabla)
+
+
+def invalidar(tabla: str):
+    """Descarta la foto de la tabla en todos los workers. Llamar después del commit."""
+    _tokens.set(tabla, uuid.uuid4().hex)
+    _listados.pop(tabla, None)
+
+
+def cargar(db: Session):
+    """Carga todas las tablas de referencia (lifespan de la app)."""
+    for tabla in _TABLAS:
+        cargar_tabla(db, tabla)
+
+
+def _coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    etiquetas = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+
+def respuesta(listado: Listado, skip: int, limit: int, if_none_match: Optional[str]) -> Response:
+    """304 si el cliente ya tiene esta versión; si no, la página serializada con su ETag."""
+    etag = listado.etag(skip, limit)
+    encabezados = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _coincide_etag(if_none_match, etag):
+        return Response(status_code=304, headers=encabezados)
+    return Response(content=listado.cuerpo(skip, limit), media_type="application/json", headers=encabezados)
+
+
+def nombre_moneda(db: Session, id_moneda: int) -> Optional[str]:
+    fila = obtener(db, MONEDAS).por_id.get(id_moneda)
+    if fila is None:
+        # puede haberla creado otro proceso: se relee una vez antes de darla por inexistente
+        fila = cargar_tabla(db, MONEDAS).por_id.get(id_moneda)
+    return fila["nombre"] if fila else None
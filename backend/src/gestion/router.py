@@ -1,24 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import anyio.from_thread
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from src.database import get_db
-from src.gestion import schemas, services
+from src.database import get_db, SessionLocal, estadisticas_pool
+from src.gestion import schemas, services, referencias, cierres
+from src.gestion.constants import ErrorCode
 from src.auth.dependencies import get_current_user
-from typing import List
+from src.utils.exportacion import TIPOS_CONTENIDO
+from src.utils.tasas_cambio import obtener_proveedor
+from src.utils.metricas import limite_consultas
+from typing import List, Literal, Optional
+from datetime import datetime
 
 router = APIRouter()
 
+# altas, bajas y modificaciones con fecha en un mes ya cerrado (ver src/gestion/cierres.py)
+RESPUESTA_MES_CERRADO = {409: {"description": ErrorCode.MES_CERRADO}}
+
+def _bloques_del_cuerpo(request: Request):
+    """Itera el cuerpo de la petición desde el threadpool, bloque por bloque, sin bufferearlo."""
+    bloques = request.stream().__aiter__()
+    while True:
+        try:
+            yield anyio.from_thread.run(bloques.__anext__)
+        except StopAsyncIteration:
+            return
+
 # Rutas para Usuarios
 @router.post("/register", response_model=schemas.Usuario)
-def register(usuario: schemas.UsuarioCreate, db: Session = Depends(get_db)):
-    return services.registrar_usuario(db, usuario)
+async def register(usuario: schemas.UsuarioCreate, db: Session = Depends(get_db)):
+    return await services.registrar_usuario(db, usuario)
 
 @router.post("/login", response_model=schemas.Token)
-def login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
-    token = services.autenticar_usuario(db, request.email, request.password)
+async def login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
+    token = await services.autenticar_usuario(db, request.email, request.password)
     return {"access_token": token, "token_type": "bearer"}
 
 # Rutas para Ingresos
-@router.post("/ingresos/", response_model=schemas.IngresoResponse)
+@router.post("/ingresos/", response_model=schemas.IngresoResponse, responses=RESPUESTA_MES_CERRADO)
 def registrar_ingreso(
     ingreso: schemas.IngresoCreate,
     db: Session = Depends(get_db),
@@ -26,7 +46,23 @@ def registrar_ingreso(
 ):
     return services.crear_ingreso(db, ingreso)
 
+@router.post("/ingresos/bulk", response_model=schemas.ResultadoImportacion)
+async def importar_ingresos(
+    request: Request,
+    tamanio_lote: int = Query(services.IMPORTACION_TAMANIO_LOTE, ge=1, le=10000, description="Filas por transacción"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Importa ingresos en bloque. Acepta un arreglo JSON, NDJSON (application/x-ndjson)
+    o CSV con encabezado (text/csv). Devuelve el detalle de las filas con error.
+    """
+    return await run_in_threadpool(
+        services.importar_ingresos, db, _bloques_del_cuerpo(request), request.headers.get("content-type"), tamanio_lote
+    )
+
 @router.get("/ingresos/{id_usuario}", response_model=List[schemas.IngresoResponse])
+@limite_consultas(3)
 def listar_ingresos(
     id_usuario: int,
     skip: int = Query(0, description="Número de registros a saltar"),
@@ -39,7 +75,24 @@ def listar_ingresos(
         raise HTTPException(status_code=404, detail="No se encontraron ingresos para este usuario")
     return ingresos
 
-@router.delete("/ingresos/{id_ingreso}", response_model=schemas.IngresoResponse)
+@router.get("/ingresos/{id_usuario}/paginado", response_model=schemas.Pagina[schemas.IngresoResponse])
+@limite_consultas(3)
+def listar_ingresos_paginado(
+    id_usuario: int,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor por la página anterior"),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a devolver"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusive)"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Lista ingresos del más reciente al más antiguo, paginando por cursor sobre (fecha, id).
+    """
+    items, next_cursor = services.obtener_ingresos_paginados(db, id_usuario, cursor, limit, desde, hasta)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.delete("/ingresos/{id_ingreso}", response_model=schemas.IngresoResponse, responses=RESPUESTA_MES_CERRADO)
 def eliminar_ingreso(
     id_ingreso: int,
     db: Session = Depends(get_db),
@@ -50,7 +103,7 @@ def eliminar_ingreso(
         raise HTTPException(status_code=404, detail="Ingreso no encontrado")
     return ingreso
 
-@router.put("/ingresos/{id_ingreso}", response_model=schemas.IngresoResponse)
+@router.put("/ingresos/{id_ingreso}", response_model=schemas.IngresoResponse, responses=RESPUESTA_MES_CERRADO)
 def actualizar_ingreso(
     id_ingreso: int,
     ingreso: schemas.IngresoCreate,
@@ -60,7 +113,7 @@ def actualizar_ingreso(
     return services.actualizar_ingreso(db, id_ingreso, ingreso)
 
 # Rutas para Gastos
-@router.post("/gastos/", response_model=schemas.GastoResponse)
+@router.post("/gastos/", response_model=schemas.GastoResponse, responses=RESPUESTA_MES_CERRADO)
 def registrar_gasto(
     gasto: schemas.GastoCreate,
     db: Session = Depends(get_db),
@@ -68,7 +121,23 @@ def registrar_gasto(
 ):
     return services.crear_gasto(db, gasto)
 
+@router.post("/gastos/bulk", response_model=schemas.ResultadoImportacion)
+async def importar_gastos(
+    request: Request,
+    tamanio_lote: int = Query(services.IMPORTACION_TAMANIO_LOTE, ge=1, le=10000, description="Filas por transacción"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Importa gastos en bloque. Acepta un arreglo JSON, NDJSON (application/x-ndjson)
+    o CSV con encabezado (text/csv). Devuelve el detalle de las filas con error.
+    """
+    return await run_in_threadpool(
+        services.importar_gastos, db, _bloques_del_cuerpo(request), request.headers.get("content-type"), tamanio_lote
+    )
+
 @router.get("/gastos/{id_usuario}", response_model=List[schemas.GastoResponse])
+@limite_consultas(3)
 def listar_gastos(
     id_usuario: int,
     skip: int = Query(0, description="Número de registros a saltar"),
@@ -81,7 +150,25 @@ def listar_gastos(
         raise HTTPException(status_code=404, detail="No se encontraron gastos para este usuario")
     return gastos
 
-@router.delete("/gastos/{id_gasto}", response_model=schemas.GastoResponse)
+@router.get("/gastos/{id_usuario}/paginado", response_model=schemas.Pagina[schemas.GastoResponse])
+@limite_consultas(3)
+def listar_gastos_paginado(
+    id_usuario: int,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor por la página anterior"),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a devolver"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusive)"),
+    id_categoria: Optional[int] = Query(None, description="Filtrar por categoría"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Lista gastos del más reciente al más antiguo, paginando por cursor sobre (fecha, id).
+    """
+    items, next_cursor = services.obtener_gastos_paginados(db, id_usuario, cursor, limit, desde, hasta, id_categoria)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.delete("/gastos/{id_gasto}", response_model=schemas.GastoResponse, responses=RESPUESTA_MES_CERRADO)
 def eliminar_gasto(
     id_gasto: int,
     db: Session = Depends(get_db),
@@ -92,7 +179,7 @@ def eliminar_gasto(
         raise HTTPException(status_code=404, detail="Gasto no encontrado")
     return gasto
 
-@router.put("/gastos/{id_gasto}", response_model=schemas.GastoResponse)
+@router.put("/gastos/{id_gasto}", response_model=schemas.GastoResponse, responses=RESPUESTA_MES_CERRADO)
 def actualizar_gasto(
     id_gasto: int,
     gasto: schemas.GastoCreate,
@@ -101,16 +188,104 @@ def actualizar_gasto(
 ):
     return services.actualizar_gasto(db, id_gasto, gasto)
 
+# Exportación del historial
+@router.get("/exportar/{id_usuario}")
+def exportar_movimientos(
+    id_usuario: int,
+    formato: Literal["csv", "ndjson"] = Query("csv", description="Formato de salida"),
+    gzip: bool = Query(False, description="Comprimir la respuesta con gzip"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusive)"),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Descarga todos los ingresos y gastos del usuario. La respuesta se genera por
+    bloques a medida que se leen las filas, sin cargar el historial en memoria.
+    """
+    nombre = f"movimientos_{id_usuario}.{formato}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{nombre}"'}
+    media_type = TIPOS_CONTENIDO[formato]
+    if gzip:
+        media_type = "application/gzip"
+    return StreamingResponse(
+        services.exportar_movimientos(SessionLocal, id_usuario, formato, gzip, desde, hasta),
+        media_type=media_type,
+        headers=headers,
+    )
+
 # Rutas para Resumen
+@router.get("/resumen/{id_usuario}/rango", response_model=schemas.ResumenRango)
+@limite_consultas(6)
+def obtener_resumen_rango(
+    id_usuario: int,
+    desde: datetime = Query(..., description="Inicio del rango (inclusive)", example="2024-01-01"),
+    hasta: datetime = Query(..., description="Fin del rango (exclusive)", example="2025-01-01"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Ingresos, gastos y balance de cada mes del rango, calculados en una sola pasada.
+    """
+    return services.obtener_resumen_rango(db, id_usuario, desde, hasta)
+
+@router.get("/resumen/{id_usuario}/categorias", response_model=schemas.DesgloseGastosRango)
+@limite_consultas(3)
+def obtener_desglose_categorias_rango(
+    id_usuario: int,
+    desde: datetime = Query(..., description="Inicio del rango (inclusive)", example="2024-01-01"),
+    hasta: datetime = Query(..., description="Fin del rango (exclusive)", example="2024-04-01"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Gastos de la ventana agrupados por categoría (total, cantidad y porcentaje de la ventana).
+    """
+    return services.obtener_desglose_categorias_rango(db, id_usuario, desde, hasta)
+
+@router.get("/resumen/{id_usuario}/categorias/{mes}/{anio}", response_model=schemas.DesgloseGastos)
+@limite_consultas(3)
+def obtener_desglose_categorias(
+    id_usuario: int,
+    mes: int = Path(..., ge=1, le=12),
+    anio: int = Path(..., ge=1, le=9998),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Gastos del mes agrupados por categoría (total, cantidad y porcentaje del mes).
+    """
+    return services.obtener_desglose_categorias(db, id_usuario, mes, anio)
+
 @router.get("/resumen/{id_usuario}/{mes}/{anio}", response_model=schemas.ResumenResponse)
+@limite_consultas(8)
 def obtener_resumen(
     id_usuario: int,
-    mes: int,
-    anio: int,
+    response: Response,
+    mes: int = Path(..., ge=1, le=12),
+    anio: int = Path(..., ge=1, le=9998),
     db: Session = Depends(get_db),
     current_user: schemas.Usuario = Depends(get_current_user)
 ):
-    return services.obtener_resumen(db, id_usuario, mes, anio)
+    """
+    Resumen del mes. Los meses cerrados no cambian más y se sirven con cache inmutable.
+    """
+    resumen = services.obtener_resumen(db, id_usuario, mes, anio)
+    response.headers["Cache-Control"] = cierres.cache_control(db, mes, anio)
+    return resumen
+
+@router.get("/tasas-cambio/metricas")
+def metricas_tasas_cambio():
+    """
+    Estado de la cache de tasas de cambio (hits, edad, errores de refresco).
+    """
+    return obtener_proveedor().metricas()
+
+@router.get("/pool-db/metricas")
+def metricas_pool_db():
+    """
+    Estado del pool de conexiones: conexiones en uso, overflow y tiempos de espera.
+    """
+    return estadisticas_pool()
 
 # Rutas para Categorías
 @router.post("/categorias/", response_model=schemas.CategoriaGasto)
@@ -122,12 +297,18 @@ def crear_categoria(
     return services.crear_categoria(db, categoria)
 
 @router.get("/categorias/", response_model=List[schemas.CategoriaGasto])
+@limite_consultas(2)
 def listar_categorias(
     skip: int = Query(0, description="Número de registros a saltar"),
     limit: int = Query(10, description="Número máximo de registros a devolver"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    return services.obtener_categorias(db, skip, limit)
+    """
+    Lista servida desde la cache de referencia; con If-None-Match igual al ETag responde 304.
+    """
+    listado = referencias.obtener(db, referencias.CATEGORIAS)
+    return referencias.respuesta(listado, skip, limit, if_none_match)
 
 @router.put("/categorias/{id_categoria}", response_model=schemas.CategoriaGasto)
 def actualizar_categoria(
@@ -166,12 +347,18 @@ def crear_moneda(
     return services.crear_moneda(db, moneda)
 
 @router.get("/monedas/", response_model=List[schemas.Moneda])
+@limite_consultas(2)
 def listar_monedas(
     skip: int = Query(0, description="Número de registros a saltar"),
     limit: int = Query(10, description="Número máximo de registros a devolver"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    return services.obtener_monedas(db, skip, limit)
+    """
+    Lista servida desde la cache de referencia; con If-None-Match igual al ETag responde 304.
+    """
+    listado = referencias.obtener(db, referencias.MONEDAS)
+    return referencias.respuesta(listado, skip, limit, if_none_match)
 
 @router.put("/monedas/{id_moneda}", response_model=schemas.Moneda)
 def actualizar_moneda(
@@ -200,6 +387,7 @@ def crear_presupuesto(
     return services.crear_presupuesto(db, presupuesto)
 
 @router.get("/presupuestos/{id_usuario}", response_model=List[schemas.PresupuestoResponse])
+@limite_consultas(3)
 def listar_presupuestos(
     id_usuario: int,
     skip: int = Query(0, description="Número de registros a saltar"),
@@ -212,6 +400,24 @@ def listar_presupuestos(
         raise HTTPException(status_code=404, detail="No se encontraron presupuestos para este usuario")
     return presupuestos
 
+@router.get("/presupuestos/{id_usuario}/paginado", response_model=schemas.Pagina[schemas.PresupuestoResponse])
+@limite_consultas(3)
+def listar_presupuestos_paginado(
+    id_usuario: int,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor por la página anterior"),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a devolver"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusive)"),
+    id_categoria: Optional[int] = Query(None, description="Filtrar por categoría"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Lista presupuestos (por fecha de inicio) del más reciente al más antiguo, paginando por cursor sobre (fecha, id).
+    """
+    items, next_cursor = services.obtener_presupuestos_paginados(db, id_usuario, cursor, limit, desde, hasta, id_categoria)
+    return {"items": items, "next_cursor": next_cursor}
+
 @router.get("/presupuestos/detalle/{id_presupuesto}", response_model=schemas.PresupuestoResponse)
 def obtener_presupuesto(
     id_presupuesto: int,
@@ -264,4 +470,17 @@ def actualizar_monto_presupuesto(
     presupuesto = services.actualizar_monto_actual(db, id_presupuesto, current_user.id)
     if not presupuesto:
         raise HTTPException(status_code=404, detail="Presupuesto no encontrado")
-    return presupuesto
\ No newline at end of file
+    return presupuesto
+
+@router.post("/presupuestos/{id_usuario}/recalcular-montos", response_model=schemas.RecalculoPresupuestos)
+def recalcular_montos_presupuestos(
+    id_usuario: int,
+    incluir_vencidos: bool = Query(False, description="Recalcular también presupuestos con el período vencido"),
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Recalcula en una sola sentencia el monto actual de todos los presupuestos del usuario.
+    """
+    actualizados = services.recalcular_presupuestos_usuario(db, id_usuario, solo_activos=not incluir_vencidos)
+    return {"id_usuario": id_usuario, "actualizados": actualizados}
\ No newline at end of file
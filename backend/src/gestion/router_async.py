@@ -0,0 +1,180 @@
+"""Rutas async equivalentes a las de router.py, activas con DB_ASYNC=true.
+
+Se registran antes que el router sync, así que para los mismos path y método
+FastAPI resuelve primero estas. Las rutas que no están acá siguen atendidas por
+router.py con la sesión sync.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_async_db
+from src.gestion import schemas, referencias, services_async as services
+from src.auth.dependencies import get_current_user_async as get_current_user
+
+router = APIRouter()
+
+# Rutas para Ingresos
+@router.post("/ingresos/", response_model=schemas.IngresoResponse)
+async def registrar_ingreso(
+    ingreso: schemas.IngresoCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    return await services.crear_ingreso(db, ingreso)
+
+@router.get("/ingresos/{id_usuario}", response_model=List[schemas.IngresoResponse])
+async def listar_ingresos(
+    id_usuario: int,
+    skip: int = Query(0, description="Número de registros a saltar"),
+    limit: int = Query(10, description="Número máximo de registros a devolver"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    ingresos = await services.obtener_ingresos_por_usuario(db, id_usuario, skip, limit)
+    if not ingresos:
+        raise HTTPException(status_code=404, detail="No se encontraron ingresos para este usuario")
+    return ingresos
+
+@router.get("/ingresos/{id_usuario}/paginado", response_model=schemas.Pagina[schemas.IngresoResponse])
+async def listar_ingresos_paginado(
+    id_usuario: int,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor por la página anterior"),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a devolver"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusive)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    items, next_cursor = await services.obtener_ingresos_paginados(db, id_usuario, cursor, limit, desde, hasta)
+    return {"items": items, "next_cursor": next_cursor}
+
+# Rutas para Gastos
+@router.post("/gastos/", response_model=schemas.GastoResponse)
+async def registrar_gasto(
+    gasto: schemas.GastoCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    return await services.crear_gasto(db, gasto)
+
+@router.get("/gastos/{id_usuario}", response_model=List[schemas.GastoResponse])
+async def listar_gastos(
+    id_usuario: int,
+    skip: int = Query(0, description="Número de registros a saltar"),
+    limit: int = Query(10, description="Número máximo de registros a devolver"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    gastos = await services.obtener_gastos_por_usuario(db, id_usuario, skip, limit)
+    if not gastos:
+        raise HTTPException(status_code=404, detail="No se encontraron gastos para este usuario")
+    return gastos
+
+@router.get("/gastos/{id_usuario}/paginado", response_model=schemas.Pagina[schemas.GastoResponse])
+async def listar_gastos_paginado(
+    id_usuario: int,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor por la página anterior"),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a devolver"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusive)"),
+    id_categoria: Optional[int] = Query(None, description="Filtrar por categoría"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    items, next_cursor = await services.obtener_gastos_paginados(
+        db, id_usuario, cursor, limit, desde, hasta, id_categoria
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+# Rutas para Resumen
+@router.get("/resumen/{id_usuario}/{mes}/{anio}", response_model=schemas.ResumenResponse)
+async def obtener_resumen(
+    id_usuario: int,
+    response: Response,
+    mes: int = Path(..., ge=1, le=12),
+    anio: int = Path(..., ge=1, le=9998),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    resumen = await services.obtener_resumen(db, id_usuario, mes, anio)
+    response.headers["Cache-Control"] = await services.cache_control_resumen(db, mes, anio)
+    return resumen
+
+# Rutas para Categorías
+@router.get("/categorias/", response_model=List[schemas.CategoriaGasto])
+async def listar_categorias(
+    skip: int = Query(0, description="Número de registros a saltar"),
+    limit: int = Query(10, description="Número máximo de registros a devolver"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    listado = await services.obtener_listado_referencia(db, referencias.CATEGORIAS)
+    return referencias.respuesta(listado, skip, limit, if_none_match)
+
+@router.get("/categorias/{id_categoria}", response_model=schemas.CategoriaGasto)
+async def obtener_categoria(
+    id_categoria: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    categoria = await services.obtener_categoria_por_id(db, id_categoria)
+    if not categoria:
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    return categoria
+
+# Rutas para Monedas
+@router.get("/monedas/", response_model=List[schemas.Moneda])
+async def listar_monedas(
+    skip: int = Query(0, description="Número de registros a saltar"),
+    limit: int = Query(10, description="Número máximo de registros a devolver"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    listado = await services.obtener_listado_referencia(db, referencias.MONEDAS)
+    return referencias.respuesta(listado, skip, limit, if_none_match)
+
+# Rutas para Presupuestos
+@router.get("/presupuestos/{id_usuario}", response_model=List[schemas.PresupuestoResponse])
+async def listar_presupuestos(
+    id_usuario: int,
+    skip: int = Query(0, description="Número de registros a saltar"),
+    limit: int = Query(10, description="Número máximo de registros a devolver"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    presupuestos = await services.obtener_presupuestos_usuario(db, id_usuario, skip, limit)
+    if not presupuestos:
+        raise HTTPException(status_code=404, detail="No se encontraron presupuestos para este usuario")
+    return presupuestos
+
+@router.get("/presupuestos/{id_usuario}/paginado", response_model=schemas.Pagina[schemas.PresupuestoResponse])
+async def listar_presupuestos_paginado(
+    id_usuario: int,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor por la página anterior"),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a devolver"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusive)"),
+    id_categoria: Optional[int] = Query(None, description="Filtrar por categoría"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    items, next_cursor = await services.obtener_presupuestos_paginados(
+        db, id_usuario, cursor, limit, desde, hasta, id_categoria
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/presupuestos/detalle/{id_presupuesto}", response_model=schemas.PresupuestoResponse)
+async def obtener_presupuesto(
+    id_presupuesto: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Obtiene un presupuesto específico por su ID.
+    """
+    presupuesto = await services.obtener_presupuesto(db, id_presupuesto)
+    if not presupuesto or presupuesto.id_usuario != current_user.id:
+        raise HTTPException(status_code=404, detail="Presupuesto no encontrado")
+    return presupuesto
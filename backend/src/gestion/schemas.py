@@ -1,7 +1,17 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import List, Optional
+from typing import Generic, List, Optional, TypeVar
 from datetime import datetime, date
 
+T = TypeVar("T")
+
+# Envoltorio para listados paginados por cursor
+class Pagina(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Cursor para pedir la página siguiente. Es null en la última página."
+    )
+
 # Esquema base para fechas
 class FechaBase(BaseModel):
     fecha: Optional[datetime] = Field(
@@ -98,12 +108,50 @@ class ResumenCreate(ResumenBase):
     id_usuario: int = Field(..., example=1)
 
 class ResumenResponse(ResumenBase):
-    id_resumen: int = Field(..., example=1)
+    # None si el resumen se calculó al vuelo (mes en curso o mes terminado sin cerrar)
+    id_resumen: Optional[int] = Field(default=None, example=1)
     id_usuario: int = Field(..., example=1)
 
     class Config:
         from_attributes = True
         
+class ResumenMes(BaseModel):
+    anio: int = Field(..., example=2024)
+    mes: int = Field(..., example=1)
+    total_ingresos: float = Field(..., example=5000.0)
+    total_gastos: float = Field(..., example=3000.0)
+    balance: float = Field(..., example=2000.0)
+
+class ResumenRango(BaseModel):
+    id_usuario: int = Field(..., example=1)
+    desde: datetime
+    hasta: datetime
+    meses: List[ResumenMes]
+    total_ingresos: float = Field(..., example=60000.0)
+    total_gastos: float = Field(..., example=36000.0)
+    balance: float = Field(..., example=24000.0)
+        
+class DesgloseCategoria(BaseModel):
+    id_categoria: int = Field(..., example=1)
+    nombre: Optional[str] = Field(default=None, example="Comida")
+    total: float = Field(..., example=1500.0)
+    cantidad: int = Field(..., example=12)
+    porcentaje: float = Field(..., example=50.0, description="Porcentaje sobre el total de gastos del mes")
+
+class DesgloseGastos(BaseModel):
+    id_usuario: int = Field(..., example=1)
+    anio: int = Field(..., example=2024)
+    mes: int = Field(..., example=1)
+    total: float = Field(..., example=3000.0)
+    categorias: List[DesgloseCategoria]
+
+class DesgloseGastosRango(BaseModel):
+    id_usuario: int = Field(..., example=1)
+    desde: datetime
+    hasta: datetime
+    total: float = Field(..., example=9000.0)
+    categorias: List[DesgloseCategoria]
+        
 # Schemas de las categorias
 class CategoriaGastoBase(BaseModel):
     nombre: str = Field(..., example="Comida")
@@ -152,4 +200,18 @@ class PresupuestoResponse(BaseModel):
     fecha_fin: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class RecalculoPresupuestos(BaseModel):
+    id_usuario: int = Field(..., example=1)
+    actualizados: int = Field(..., example=4, description="Cantidad de presupuestos recalculados")
+
+# schemas para importación masiva
+class ErrorImportacion(BaseModel):
+    fila: int = Field(..., description="Número de fila en el contenido recibido (en CSV la 1 es el encabezado)")
+    error: str
+
+class ResultadoImportacion(BaseModel):
+    total: int = Field(..., description="Filas recibidas")
+    insertados: int = Field(..., description="Filas insertadas")
+    errores: List[ErrorImportacion] = []
@@ -1,37 +1,81 @@
-from typing import List
+import os
+from typing import Iterable, List, Optional, Union
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from src.gestion.models import Usuario, Ingreso, Gasto, Resumen, CategoriaGasto, Moneda, Presupuesto
-from src.gestion import schemas, exceptions
+from sqlalchemy import delete, extract, func, insert, literal, null, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from src.gestion.models import Usuario, Ingreso, Gasto, Resumen, CategoriaGasto, Moneda, Presupuesto, TotalMensual
+from src.gestion.constants import ErrorCode
+from src.gestion import schemas, exceptions, totales, presupuestos, referencias, tasas_historicas, cierres
 from src.utils.jwt import create_access_token
-from passlib.context import CryptContext
+from src.utils.fechas import rango_mes, meses_en_rango
+from src.utils.paginacion import paginar, CursorInvalido
+from src.utils.importacion import detectar_formato, leer_filas, FormatoInvalido
+from src.utils.exportacion import serializar
+from src.utils.cache import crear_cache
+from src.utils import dinero
 from datetime import datetime, UTC, timedelta
 from fastapi import HTTPException, status
-from src.utils.external_api import obtener_tasas_cambio 
+from fastapi.concurrency import run_in_threadpool
+from src.auth import passwords
+from src.utils.tasas_cambio import obtener_proveedor, TasasNoDisponibles
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+IMPORTACION_TAMANIO_LOTE = int(os.getenv("IMPORTACION_TAMANIO_LOTE", "1000"))
+RANGO_MAX_MESES = 120  # ver ErrorCode.RANGO_FECHAS_DEMASIADO_LARGO
+
+# Desglose de gastos por categoría, cacheado por (usuario, año, mes)
+desglose_cache = crear_cache(
+    "desglose",
+    max_items=int(os.getenv("DESGLOSE_CACHE_MAX_ITEMS", "10000")),
+    ttl=float(os.getenv("DESGLOSE_CACHE_TTL", "300")),
+)
+
+def invalidar_desglose(id_usuario: int, fecha: datetime):
+    desglose_cache.delete((id_usuario, fecha.year, fecha.month))
 
 # CRUD para Usuario
-def registrar_usuario(db: Session, usuario: schemas.UsuarioCreate) -> Usuario:
-    db_usuario = Usuario.get(db, email=usuario.email)
-    if db_usuario:
+# El hash de contraseñas corre en el pool acotado de src/auth/passwords.py y las
+# consultas en el threadpool, así que estas dos funciones son async. Antes de
+# esperar por bcrypt se cierra la transacción para devolver la conexión al pool.
+def _email_registrado(db: Session, email: str) -> bool:
+    registrado = Usuario.get(db, email=email) is not None
+    db.rollback()
+    return registrado
+
+async def registrar_usuario(db: Session, usuario: schemas.UsuarioCreate) -> Usuario:
+    if await run_in_threadpool(_email_registrado, db, usuario.email):
         raise exceptions.EmailYaRegistrado()
     nuevo_usuario = Usuario(
         nombre=usuario.nombre,
         email=usuario.email
     )
-    nuevo_usuario.set_password(usuario.password)
-    return nuevo_usuario.save(db)
+    nuevo_usuario.hashed_password = await passwords.hashear(usuario.password)
+    return await run_in_threadpool(nuevo_usuario.save, db)
 
-def autenticar_usuario(db: Session, email: str, password: str):
+def _buscar_usuario_por_email(db: Session, email: str):
     user = db.query(Usuario).filter(Usuario.email == email).first()
-    if not user or not user.verify_password(password):
+    if user:
+        db.expunge(user)
+    db.rollback()
+    return user
+
+def _actualizar_hash(db: Session, id_usuario: int, nuevo_hash: str):
+    db.execute(update(Usuario).where(Usuario.id == id_usuario).values(hashed_password=nuevo_hash))
+    db.commit()
+
+async def autenticar_usuario(db: Session, email: str, password: str):
+    user = await run_in_threadpool(_buscar_usuario_por_email, db, email)
+    valida, nuevo_hash = (await passwords.verificar(password, user.hashed_password)) if user else (False, None)
+    if not valida:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if nuevo_hash:
+        # el hash tenía otro costo de bcrypt: se guarda con el costo actual
+        await run_in_threadpool(_actualizar_hash, db, user.id, nuevo_hash)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id), "email": user.email, "name": user.nombre}, expires_delta=access_token_expires
@@ -47,7 +91,9 @@ def crear_ingreso(db: Session, ingreso: schemas.IngresoCreate):
         id_moneda=ingreso.id_moneda,
         fecha=ingreso.fecha or datetime.now(UTC)
     )
+    cierres.verificar_mes_abierto(db, nuevo_ingreso.fecha)
     db.add(nuevo_ingreso)
+    totales.registrar_ingreso(db, nuevo_ingreso)
     db.commit()
     db.refresh(nuevo_ingreso)
     return nuevo_ingreso
@@ -55,12 +101,38 @@ def crear_ingreso(db: Session, ingreso: schemas.IngresoCreate):
 def obtener_ingresos_por_usuario(db: Session, id_usuario: int, skip: int = 0, limit: int = 10):
     return db.query(Ingreso).filter(Ingreso.id_usuario == id_usuario).offset(skip).limit(limit).all()
 
+def _paginar(query, columna_fecha, columna_id, cursor: Optional[str], limit: int):
+    try:
+        return paginar(query, columna_fecha, columna_id, cursor, limit)
+    except CursorInvalido:
+        raise exceptions.CursorInvalido()
+
+def _filtrar_fechas(query, columna_fecha, desde: Optional[datetime], hasta: Optional[datetime]):
+    if desde:
+        query = query.filter(columna_fecha >= desde)
+    if hasta:
+        query = query.filter(columna_fecha < hasta)
+    return query
+
+def obtener_ingresos_paginados(
+    db: Session,
+    id_usuario: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+):
+    query = _filtrar_fechas(db.query(Ingreso).filter(Ingreso.id_usuario == id_usuario), Ingreso.fecha, desde, hasta)
+    return _paginar(query, Ingreso.fecha, Ingreso.id_ingreso, cursor, limit)
+
 def eliminar_ingreso(db: Session, id_ingreso: int):
     # Buscar el ingreso en la base de datos
     ingreso = db.query(Ingreso).filter(Ingreso.id_ingreso == id_ingreso).first()
     if not ingreso:
         return None  # Si no existe, retornar None
     # Eliminar el ingreso
+    cierres.verificar_mes_abierto(db, ingreso.fecha)
+    totales.registrar_ingreso(db, ingreso, signo=-1)
     db.delete(ingreso)
     db.commit()
     return ingreso
@@ -69,22 +141,34 @@ def actualizar_ingreso(db: Session, id_ingreso: int, ingreso: schemas.IngresoCre
     db_ingreso = db.query(Ingreso).filter(Ingreso.id_ingreso == id_ingreso).first()
     if not db_ingreso:
         raise exceptions.IngresoNoEncontrado()
+    cierres.verificar_mes_abierto(db, db_ingreso.fecha)
+    totales.registrar_ingreso(db, db_ingreso, signo=-1)
     db_ingreso.monto = ingreso.monto
     db_ingreso.fuente = ingreso.fuente
     db_ingreso.id_moneda = ingreso.id_moneda
+    totales.registrar_ingreso(db, db_ingreso)
     db.commit()
     db.refresh(db_ingreso)
     return db_ingreso
 
 # CRUD para Gastos
 def crear_gasto(db: Session, gasto: schemas.GastoCreate):
+    nuevo_gasto = insertar_gasto(db, gasto)
+    invalidar_desglose(nuevo_gasto.id_usuario, nuevo_gasto.fecha)
+    return nuevo_gasto
+
+def insertar_gasto(db: Session, gasto: schemas.GastoCreate):
+    """Alta del gasto con sus totales y presupuestos, sin invalidar el desglose cacheado."""
     nuevo_gasto = Gasto(
         id_usuario=gasto.id_usuario,
         monto=gasto.monto,
         id_categoria=gasto.id_categoria,
         fecha=gasto.fecha or datetime.now(UTC)
     )
+    cierres.verificar_mes_abierto(db, nuevo_gasto.fecha)
     db.add(nuevo_gasto)
+    totales.registrar_gasto(db, nuevo_gasto)
+    presupuestos.registrar_gasto(db, nuevo_gasto)
     db.commit()
     db.refresh(nuevo_gasto)
     return nuevo_gasto
@@ -92,146 +176,540 @@ def crear_gasto(db: Session, gasto: schemas.GastoCreate):
 def obtener_gastos_por_usuario(db: Session, id_usuario: int, skip: int = 0, limit: int = 10):
     return db.query(Gasto).filter(Gasto.id_usuario == id_usuario).offset(skip).limit(limit).all()
 
+def obtener_gastos_paginados(
+    db: Session,
+    id_usuario: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_categoria: Optional[int] = None,
+):
+    query = _filtrar_fechas(db.query(Gasto).filter(Gasto.id_usuario == id_usuario), Gasto.fecha, desde, hasta)
+    if id_categoria is not None:
+        query = query.filter(Gasto.id_categoria == id_categoria)
+    return _paginar(query, Gasto.fecha, Gasto.id_gasto, cursor, limit)
+
 def eliminar_gasto(db: Session, id_gasto: int):
     # Buscar el gasto en la base de datos
     gasto = db.query(Gasto).filter(Gasto.id_gasto == id_gasto).first()
     if not gasto:
         return None  # Si no existe, retornar None
     # Eliminar el gasto
+    cierres.verificar_mes_abierto(db, gasto.fecha)
+    totales.registrar_gasto(db, gasto, signo=-1)
+    presupuestos.registrar_gasto(db, gasto, signo=-1)
+    id_usuario, fecha = gasto.id_usuario, gasto.fecha
     db.delete(gasto)
     db.commit()
+    invalidar_desglose(id_usuario, fecha)
     return gasto
 
 def actualizar_gasto(db: Session, id_gasto: int, gasto: schemas.GastoCreate):
     db_gasto = db.query(Gasto).filter(Gasto.id_gasto == id_gasto).first()
     if not db_gasto:
         raise exceptions.GastoNoEncontrado()
+    cierres.verificar_mes_abierto(db, db_gasto.fecha)
+    totales.registrar_gasto(db, db_gasto, signo=-1)
+    presupuestos.registrar_gasto(db, db_gasto, signo=-1)
     db_gasto.monto = gasto.monto
     db_gasto.id_categoria = gasto.id_categoria
+    totales.registrar_gasto(db, db_gasto)
+    presupuestos.registrar_gasto(db, db_gasto)
     db.commit()
     db.refresh(db_gasto)
+    invalidar_desglose(db_gasto.id_usuario, db_gasto.fecha)
     return db_gasto
 
+# Importación masiva de ingresos/gastos
+def _describir_error_validacion(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in e['loc']) or 'fila'}: {e['msg']}" for e in error.errors()
+    )
+
+def _importar(
+    db: Session,
+    contenido: Union[bytes, Iterable[bytes]],
+    content_type: str,
+    schema,
+    modelo,
+    registrar_totales,
+    tamanio_lote: int,
+    despues_del_commit=None,
+):
+    try:
+        filas = leer_filas(contenido, detectar_formato(content_type))
+        periodo_cerrado = cierres.periodo_cerrado(db, usar_cache=False)
+        total = 0
+        insertados = 0
+        errores = []
+        lote, numeros = [], []
+
+        def insertar(registros):
+            db.execute(insert(modelo), registros)
+            registrar_totales(db, registros)
+            db.commit()
+            if despues_del_commit:
+                despues_del_commit(registros)
+
+        def volcar_lote():
+            # Un INSERT multi-fila y un commit por lote
+            nonlocal insertados
+            if not lote:
+                return
+            try:
+                insertar(lote)
+                insertados += len(lote)
+            except SQLAlchemyError:
+                db.rollback()
+                # se reintenta fila por fila para reportar sólo las que fallan
+                for numero, registro in zip(numeros, lote):
+                    try:
+                        insertar([registro])
+                        insertados += 1
+                    except SQLAlchemyError as e:
+                        db.rollback()
+                        errores.append({"fila": numero, "error": str(getattr(e, "orig", None) or e)})
+            lote.clear()
+            numeros.clear()
+
+        for numero, datos in filas:
+            total += 1
+            if isinstance(datos, Exception):
+                errores.append({"fila": numero, "error": f"No se pudo leer la fila: {datos}"})
+                continue
+            try:
+                registro = schema.model_validate(datos).model_dump()
+            except ValidationError as e:
+                errores.append({"fila": numero, "error": _describir_error_validacion(e)})
+                continue
+            registro["fecha"] = registro["fecha"] or datetime.now(UTC)
+            if cierres.en_periodo(periodo_cerrado, registro["fecha"].month, registro["fecha"].year):
+                errores.append({"fila": numero, "error": ErrorCode.MES_CERRADO})
+                continue
+            lote.append(registro)
+            numeros.append(numero)
+            if len(lote) >= tamanio_lote:
+                volcar_lote()
+        volcar_lote()
+    except FormatoInvalido:
+        raise exceptions.FormatoImportacionInvalido()
+
+    errores.sort(key=lambda error: error["fila"])
+    return {"total": total, "insertados": insertados, "errores": errores}
+
+def importar_ingresos(db: Session, contenido: Union[bytes, Iterable[bytes]], content_type: str, tamanio_lote: int = IMPORTACION_TAMANIO_LOTE):
+    return _importar(
+        db, contenido, content_type, schemas.IngresoCreate, Ingreso, totales.registrar_lote_ingresos, tamanio_lote
+    )
+
+def importar_gastos(db: Session, contenido: Union[bytes, Iterable[bytes]], content_type: str, tamanio_lote: int = IMPORTACION_TAMANIO_LOTE):
+    def registrar_lote(db: Session, lote):
+        totales.registrar_lote_gastos(db, lote)
+        presupuestos.registrar_lote_gastos(db, lote)
+
+    def invalidar_meses(lote):
+        for id_usuario, fecha in {(f["id_usuario"], datetime(f["fecha"].year, f["fecha"].month, 1)) for f in lote}:
+            invalidar_desglose(id_usuario, fecha)
+
+    return _importar(
+        db, contenido, content_type, schemas.GastoCreate, Gasto, registrar_lote, tamanio_lote,
+        despues_del_commit=invalidar_meses,
+    )
+
+# Exportación del historial de movimientos
+EXPORTACION_YIELD_PER = int(os.getenv("EXPORTACION_YIELD_PER", "1000"))
+COLUMNAS_EXPORTACION = ("tipo", "id", "fecha", "monto", "id_moneda", "fuente", "id_categoria")
+
+def _consultas_exportacion(id_usuario: int, desde: Optional[datetime], hasta: Optional[datetime]):
+    consulta_ingresos = select(
+        literal("ingreso"), Ingreso.id_ingreso, Ingreso.fecha, Ingreso.monto,
+        Ingreso.id_moneda, Ingreso.fuente, null(),
+    ).where(Ingreso.id_usuario == id_usuario)
+    consulta_gastos = select(
+        literal("gasto"), Gasto.id_gasto, Gasto.fecha, Gasto.monto,
+        null(), null(), Gasto.id_categoria,
+    ).where(Gasto.id_usuario == id_usuario)
+    consultas = []
+    for consulta, modelo in ((consulta_ingresos, Ingreso), (consulta_gastos, Gasto)):
+        if desde:
+            consulta = consulta.where(modelo.fecha >= desde)
+        if hasta:
+            consulta = consulta.where(modelo.fecha < hasta)
+        consultas.append(consulta.order_by(modelo.fecha, *modelo.__table__.primary_key.columns))
+    return consultas
+
+def exportar_movimientos(
+    crear_sesion,
+    id_usuario: int,
+    formato: str = "csv",
+    comprimir: bool = False,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+):
+    """Genera el historial del usuario en bloques de bytes (CSV o NDJSON).
+
+    Abre su propia sesión porque se consume mientras se envía la respuesta,
+    después de que las dependencias del request ya se cerraron.
+    """
+    def filas():
+        with crear_sesion() as db:
+            for consulta in _consultas_exportacion(id_usuario, desde, hasta):
+                resultado = db.execute(consulta.execution_options(yield_per=EXPORTACION_YIELD_PER))
+                for fila in resultado:
+                    yield tuple(fila)
+
+    return serializar(filas(), COLUMNAS_EXPORTACION, formato, comprimir)
+
 # CRUD para Resumen
-def obtener_resumen(db: Session, id_usuario: int, mes: int, anio: int) -> schemas.ResumenResponse:
-    # Obtener tasas de cambio
-    tasas_cambio = obtener_tasas_cambio()
-    if not tasas_cambio:
-        raise Exception("No se pudo obtener las tasas de cambio")
+def obtener_tasas_actuales() -> dict:
+    # Tasas de cambio cacheadas, ver src/utils/tasas_cambio.py
+    try:
+        return obtener_proveedor().obtener()
+    except TasasNoDisponibles:
+        raise exceptions.TasasCambioNoDisponibles()
+
+def tasas_historicas_del_mes(indice: tasas_historicas.IndiceTasas, mes: int, anio: int) -> dict:
+    """Tasas vigentes el último día del mes según el historial (vacío si no hay historial)."""
+    _, fin = rango_mes(mes, anio)
+    return indice.tasas_al(fin - timedelta(days=1))
+
+def _falta_tasa(es_mes_actual: bool):
+    """Error para una moneda sin tasa: la misma política en el resumen del mes y en el rango."""
+    if es_mes_actual:
+        return exceptions.TasasCambioNoDisponibles()
+    # sin historial de tasas para las monedas de ese mes no se puede calcular
+    return exceptions.TasasHistoricasNoDisponibles()
+
+def obtener_resumen(
+    db: Session, id_usuario: int, mes: int, anio: int, tasas_cambio: Optional[dict] = None
+) -> schemas.ResumenResponse:
+    """Resumen del mes, sin escribir en la base.
+
+    Los meses cerrados devuelven el resumen guardado por el cierre. El mes en
+    curso se calcula con las tasas actuales y los meses terminados sin cerrar
+    con las del historial a su último día. `tasas_cambio` evita resolverlas acá
+    (la versión async las obtiene fuera de la sesión).
+    """
+    inicio, fin = rango_mes(mes, anio)
 
     # Verificar si el usuario existe
-    usuario = db.query(Usuario).filter(Usuario.id == id_usuario).first()
+    usuario = db.query(Usuario.id).filter(Usuario.id == id_usuario).first()
     if not usuario:
         raise exceptions.UsuarioNoEncontrado()
 
-    # Obtener el resumen si ya existe
-    resumen = db.query(Resumen).filter(
-        Resumen.id_usuario == id_usuario,
-        extract("month", Resumen.fecha) == mes,
-        extract("year", Resumen.fecha) == anio
-    ).first()
-
     fecha_actual = datetime.now()
-    mes_actual = fecha_actual.month
-    anio_actual = fecha_actual.year
-
-    if resumen:
-        # Si el resumen es del mes y año actual, se actualiza
-        if mes == mes_actual and anio == anio_actual:
-            resumen.total_ingresos = calcular_total_ingresos(db, id_usuario, mes, anio, tasas_cambio)
-            resumen.total_gastos = (
-                db.query(func.sum(Gasto.monto))
-                .filter(
-                    Gasto.id_usuario == id_usuario,
-                    extract("month", Gasto.fecha) == mes,
-                    extract("year", Gasto.fecha) == anio
-                )
-                .scalar()
-            )
-            resumen.balance = resumen.total_ingresos - resumen.total_gastos
-            resumen.fecha = fecha_actual  # Se actualiza la fecha de modificación
-            db.commit()
-            db.refresh(resumen)
-        return resumen  # Retornar resumen ya existente (o actualizado si es mes/año actual)
-
-    # Si no existe y NO es el mes/año actual, lanzar error
-    if mes != mes_actual or anio != anio_actual:
+    es_mes_actual = mes == fecha_actual.month and anio == fecha_actual.year
+    if (anio, mes) > (fecha_actual.year, fecha_actual.month):
         raise exceptions.ResumenNoEncontrado()
 
-    # Si no existe pero ES el mes/año actual, se debe crear
-    total_ingresos = calcular_total_ingresos(db, id_usuario, mes, anio, tasas_cambio)
-    total_gastos = (
-        db.query(func.sum(Gasto.monto))
-        .filter(
-            Gasto.id_usuario == id_usuario,
-            extract("month", Gasto.fecha) == mes,
-            extract("year", Gasto.fecha) == anio
-        )
-        .scalar()
-    )
-    nuevo_resumen = Resumen(
+    # Resumen guardado (por el cierre del mes o por versiones anteriores)
+    resumen = db.query(Resumen).filter(
+        Resumen.id_usuario == id_usuario,
+        Resumen.fecha >= inicio,
+        Resumen.fecha < fin
+    ).first()
+    if resumen and not es_mes_actual:
+        return resumen
+
+    if tasas_cambio is None and es_mes_actual:
+        tasas_cambio = obtener_tasas_actuales()
+    elif tasas_cambio is None:
+        tasas_cambio = tasas_historicas_del_mes(tasas_historicas.obtener_indice(db), mes, anio)
+    fecha_resumen = fecha_actual if es_mes_actual else fin - timedelta(microseconds=1)
+
+    try:
+        total_ingresos, total_gastos = calcular_totales_mes(db, id_usuario, mes, anio, tasas_cambio)
+    except KeyError:
+        raise _falta_tasa(es_mes_actual)
+    return schemas.ResumenResponse(
+        id_resumen=resumen.id_resumen if resumen else None,
         id_usuario=id_usuario,
         total_ingresos=total_ingresos,
         total_gastos=total_gastos,
         balance=total_ingresos - total_gastos,
-        fecha=fecha_actual
+        fecha=fecha_resumen,
     )
-    db.add(nuevo_resumen)
+
+def cerrar_mes(db: Session, mes: int, anio: int) -> int:
+    """Guarda el resumen final del mes para todos los usuarios y lo marca como cerrado.
+
+    Una consulta agrupada sobre totales_mensuales y un INSERT en bloque; todo en
+    una transacción. Devuelve la cantidad de resúmenes guardados.
+    """
+    ahora = datetime.now()
+    if (anio, mes) >= (ahora.year, ahora.month):
+        raise ValueError(f"{anio:04d}-{mes:02d} todavía no terminó: sólo se cierran meses anteriores al actual.")
+    inicio, fin = rango_mes(mes, anio)
+    tasas_cambio = tasas_historicas_del_mes(tasas_historicas.obtener_indice(db), mes, anio)
+
+    ingresos = {}
+    gastos = {}
+    for id_usuario, id_moneda, total_ingresos, total_gastos in (
+        db.query(
+            TotalMensual.id_usuario,
+            TotalMensual.id_moneda,
+            func.sum(TotalMensual.total_ingresos),
+            func.sum(TotalMensual.total_gastos),
+        )
+        .filter(TotalMensual.anio == anio, TotalMensual.mes == mes)
+        .group_by(TotalMensual.id_usuario, TotalMensual.id_moneda)
+    ):
+        gastos[id_usuario] = gastos.get(id_usuario, dinero.CERO) + dinero.normalizar(total_gastos or 0)
+        if id_moneda is not None and total_ingresos:
+            moneda_nombre = referencias.nombre_moneda(db, id_moneda)
+            if moneda_nombre is None:
+                raise Exception(f"Moneda con id {id_moneda} no encontrada")
+            ingresos.setdefault(id_usuario, []).append((moneda_nombre, total_ingresos))
+
+    # usuarios que ya existían en el mes, más los que tienen movimientos en él
+    usuarios = sorted(set(gastos) | {
+        id_usuario for (id_usuario,) in db.query(Usuario.id).filter(
+            or_(Usuario.fecha_creacion.is_(None), Usuario.fecha_creacion < fin)
+        )
+    })
+    fecha_resumen = fin - timedelta(microseconds=1)
+    filas = []
+    for id_usuario in usuarios:
+        try:
+            total_ingresos = sumar_en_pesos(ingresos.get(id_usuario, []), tasas_cambio)
+        except KeyError as e:
+            raise ValueError(
+                f"No hay tasas históricas para cerrar {anio:04d}-{mes:02d} ({e.args[0]}). "
+                "Cargarlas con: python -m src.gestion.tasas_historicas cargar <archivo>"
+            ) from e
+        total_gastos = gastos.get(id_usuario, dinero.CERO)
+        filas.append({
+            "id_usuario": id_usuario,
+            "total_ingresos": total_ingresos,
+            "total_gastos": total_gastos,
+            "balance": total_ingresos - total_gastos,
+            "fecha": fecha_resumen,
+        })
+
+    db.execute(delete(Resumen).where(Resumen.fecha >= inicio, Resumen.fecha < fin))
+    if filas:
+        db.execute(insert(Resumen), filas)
+    cierres.registrar_cierre(db, mes, anio)
     db.commit()
-    db.refresh(nuevo_resumen)
+    return len(filas)
+
+def cerrar_meses_vencidos(db: Session, hasta=None, meses_iniciales: Optional[int] = None) -> list:
+    """Cierra en orden los meses terminados posteriores al último cierre, hasta `hasta` (anio, mes).
+
+    Sin cierres previos arranca en el primer mes con movimientos, o a lo sumo
+    `meses_iniciales` meses antes de `hasta` (incluido): los anteriores quedan
+    abiertos. Devuelve [(anio, mes, resúmenes guardados), ...].
+    """
+    ahora = datetime.now()
+    if hasta is None:
+        hasta = (ahora.year - 1, 12) if ahora.month == 1 else (ahora.year, ahora.month - 1)
+    if tuple(hasta) >= (ahora.year, ahora.month):
+        raise ValueError(f"{hasta[0]:04d}-{hasta[1]:02d} todavía no terminó: sólo se cierran meses anteriores al actual.")
+    ultimo = cierres.ultimo_mes_cerrado(db, usar_cache=False)
+    if ultimo is not None:
+        desde = datetime(ultimo[0] + ultimo[1] // 12, ultimo[1] % 12 + 1, 1)
+    else:
+        primero = db.query(func.min(TotalMensual.anio * 100 + TotalMensual.mes)).scalar()
+        desde = datetime(primero // 100, primero % 100, 1) if primero else datetime(hasta[0], hasta[1], 1)
+        if meses_iniciales is not None:
+            indice = hasta[0] * 12 + hasta[1] - 1 - (meses_iniciales - 1)
+            desde = max(desde, datetime(indice // 12, indice % 12 + 1, 1))
+    cerrados = []
+    for anio, mes in meses_en_rango(desde, datetime(hasta[0], hasta[1], 2)):
+        cerrados.append((anio, mes, cerrar_mes(db, mes, anio)))
+    return cerrados
+
+# Diccionario para mapear nombres de moneda a códigos
+MONEDA_A_CODIGO = {
+    'Pesos': 'ARS',  # Asumiendo que 'Pesos' es ARS
+    'Dolar': 'USD',
+    'Euro': 'EUR'
+}
+
+def sumar_en_pesos(montos, tasas_cambio: dict):
+    """Suma exacta de pares (nombre de moneda, monto) en pesos, en el tipo del modo de dinero.
+
+    Acumula en centavos por moneda y convierte una vez por moneda (ver dinero.convertir).
+    """
+    pares = []
+    for moneda_nombre, monto in montos:
+        codigo_moneda = MONEDA_A_CODIGO.get(moneda_nombre)
+        if not codigo_moneda:
+            raise Exception(f"Código no encontrado para la moneda: {moneda_nombre}")
+        pares.append((codigo_moneda, monto))
+    return dinero.normalizar(dinero.convertir(pares, tasas_cambio, MONEDA_A_CODIGO["Pesos"]))
+
+def calcular_totales_mes(db: Session, id_usuario: int, mes: int, anio: int, tasas_cambio: dict):
+    """Devuelve (total_ingresos, total_gastos) del mes leyendo la tabla de totales incrementales."""
+    ingresos_por_moneda = []
+    total_gastos = dinero.CERO
+    for id_moneda, moneda_nombre, ingresos, gastos in totales.obtener_totales_mes(db, id_usuario, mes, anio):
+        total_gastos += dinero.normalizar(gastos or 0)
+        if id_moneda is None or not ingresos:
+            continue
+        if moneda_nombre is None:
+            raise Exception(f"Moneda con id {id_moneda} no encontrada")
+        ingresos_por_moneda.append((moneda_nombre, ingresos))
+    return sumar_en_pesos(ingresos_por_moneda, tasas_cambio), total_gastos
+
+def obtener_resumen_rango(db: Session, id_usuario: int, desde: datetime, hasta: datetime) -> dict:
+    """Totales por mes en [desde, hasta): una consulta agrupada por tabla.
+
+    Los meses cerrados salen del resumen guardado por el cierre, igual que en
+    obtener_resumen. El mes en curso se convierte con las tasas actuales y los
+    anteriores con las del historial a su último día; si al historial le falta
+    una moneda del mes falla igual que obtener_resumen.
+    """
+    if desde >= hasta:
+        raise exceptions.RangoFechasInvalido()
+    try:
+        claves = meses_en_rango(desde, hasta, maximo=RANGO_MAX_MESES)
+    except ValueError:
+        raise exceptions.RangoFechasDemasiadoLargo()
+    if not db.query(Usuario.id).filter(Usuario.id == id_usuario).first():
+        raise exceptions.UsuarioNoEncontrado()
 
-    return nuevo_resumen
+    ingresos_por_mes = {clave: [] for clave in claves}
+    gastos_por_mes = {clave: dinero.CERO for clave in claves}
 
-def calcular_total_ingresos(db: Session, id_usuario: int, mes: int, anio: int, tasas_cambio: dict) -> float:
-    # Diccionario para mapear nombres de moneda a códigos
-    moneda_a_codigo = {
-        'Pesos': 'ARS',  # Asumiendo que 'Pesos' es ARS
-        'Dolar': 'USD',
-        'Euro': 'EUR'
+    anio_ingreso, mes_ingreso = extract("year", Ingreso.fecha), extract("month", Ingreso.fecha)
+    ingresos = (
+        db.query(anio_ingreso, mes_ingreso, Ingreso.id_moneda, Moneda.nombre, func.sum(Ingreso.monto))
+        .outerjoin(Moneda, Moneda.id_moneda == Ingreso.id_moneda)
+        .filter(Ingreso.id_usuario == id_usuario, Ingreso.fecha >= desde, Ingreso.fecha < hasta)
+        .group_by(anio_ingreso, mes_ingreso, Ingreso.id_moneda, Moneda.nombre)
+    )
+    for anio, mes, id_moneda, moneda_nombre, monto in ingresos:
+        if moneda_nombre is None:
+            raise Exception(f"Moneda con id {id_moneda} no encontrada")
+        ingresos_por_mes[(int(anio), int(mes))].append((moneda_nombre, monto))
+
+    anio_gasto, mes_gasto = extract("year", Gasto.fecha), extract("month", Gasto.fecha)
+    gastos = (
+        db.query(anio_gasto, mes_gasto, func.sum(Gasto.monto))
+        .filter(Gasto.id_usuario == id_usuario, Gasto.fecha >= desde, Gasto.fecha < hasta)
+        .group_by(anio_gasto, mes_gasto)
+    )
+    for anio, mes, monto in gastos:
+        gastos_por_mes[(int(anio), int(mes))] += dinero.normalizar(monto)
+
+    # los meses cerrados que entran completos en el rango salen del resumen guardado por el cierre
+    periodo_cerrado = cierres.periodo_cerrado(db)
+    cerrados = {}
+    if periodo_cerrado:
+        ultimo_cierre = periodo_cerrado[1]
+        fin_cierre = datetime(ultimo_cierre[0] + ultimo_cierre[1] // 12, ultimo_cierre[1] % 12 + 1, 1)
+        for resumen in db.query(Resumen).filter(
+            Resumen.id_usuario == id_usuario, Resumen.fecha >= desde, Resumen.fecha < min(hasta, fin_cierre)
+        ):
+            anio, mes = resumen.fecha.year, resumen.fecha.month
+            inicio_mes, fin_mes = rango_mes(mes, anio)
+            if desde <= inicio_mes and fin_mes <= hasta and cierres.en_periodo(periodo_cerrado, mes, anio):
+                cerrados[(anio, mes)] = resumen
+
+    ahora = datetime.now()
+    abiertos = [c for c in claves if c not in cerrados]
+    # las tasas actuales sólo hacen falta si el rango llega al mes en curso: un
+    # rango de meses pasados responde aunque el proveedor no esté disponible
+    tasas_cambio = None
+    if any(c >= (ahora.year, ahora.month) for c in abiertos):
+        tasas_cambio = obtener_tasas_actuales()
+    # un solo índice del historial para todos los meses anteriores que lo necesitan
+    indice = None
+    if any(ingresos_por_mes[c] for c in abiertos if c < (ahora.year, ahora.month)):
+        indice = tasas_historicas.obtener_indice(db)
+    resultado = []
+    for anio, mes in sorted(claves):
+        if (anio, mes) in cerrados:
+            resumen = cerrados[(anio, mes)]
+            resultado.append({
+                "anio": anio, "mes": mes, "total_ingresos": resumen.total_ingresos,
+                "total_gastos": resumen.total_gastos, "balance": resumen.balance,
+            })
+            continue
+        # los meses anteriores usan las tasas del historial a su último día
+        es_mes_actual = (anio, mes) >= (ahora.year, ahora.month)
+        tasas_mes = tasas_cambio
+        if not es_mes_actual and ingresos_por_mes[(anio, mes)]:
+            tasas_mes = tasas_historicas_del_mes(indice, mes, anio)
+        try:
+            ti = sumar_en_pesos(ingresos_por_mes[(anio, mes)], tasas_mes)
+        except KeyError:
+            raise _falta_tasa(es_mes_actual)
+        tg = gastos_por_mes[(anio, mes)]
+        resultado.append({"anio": anio, "mes": mes, "total_ingresos": ti, "total_gastos": tg, "balance": ti - tg})
+    total_ingresos = sum((m["total_ingresos"] for m in resultado), dinero.CERO)
+    total_gastos = sum((m["total_gastos"] for m in resultado), dinero.CERO)
+    return {
+        "id_usuario": id_usuario,
+        "desde": desde,
+        "hasta": hasta,
+        "meses": resultado,
+        "total_ingresos": total_ingresos,
+        "total_gastos": total_gastos,
+        "balance": total_ingresos - total_gastos,
     }
 
-    ingresos = db.query(Ingreso).filter(
-        Ingreso.id_usuario == id_usuario,
-        extract("month", Ingreso.fecha) == mes,
-        extract("year", Ingreso.fecha) == anio
-    ).all()
-
-    total_ingresos = 0.0
-
-    for ingreso in ingresos:
-        monto = ingreso.monto
-        moneda = db.query(Moneda).filter(Moneda.id_moneda == ingreso.id_moneda).first()
-        
-        if not moneda:
-            raise Exception(f"Moneda con id {ingreso.id_moneda} no encontrada")
-        
-        moneda_nombre = moneda.nombre
-        if moneda_nombre != "Pesos":
-            # Obtener código de la moneda (ej: 'Dolar' -> 'USD')
-            codigo_moneda = moneda_a_codigo.get('Pesos')
-            if not codigo_moneda:
-                raise Exception(f"Código no encontrado para la moneda: {moneda_nombre}")
-            
-            tasa = tasas_cambio.get(codigo_moneda)
-            if not tasa:
-                raise Exception(f"Tasa de cambio no encontrada para {codigo_moneda}")
-            
-            monto = monto * tasa
-        
-        total_ingresos += monto
-
-    return total_ingresos
+def _desglose_categorias(db: Session, id_usuario: int, desde: datetime, hasta: datetime):
+    """(total, categorías) de los gastos en [desde, hasta), agregados en una consulta."""
+    total_categoria = func.sum(Gasto.monto)
+    filas = (
+        db.query(Gasto.id_categoria, CategoriaGasto.nombre, total_categoria, func.count(Gasto.id_gasto))
+        .outerjoin(CategoriaGasto, CategoriaGasto.id_categoria == Gasto.id_categoria)
+        .filter(Gasto.id_usuario == id_usuario, Gasto.fecha >= desde, Gasto.fecha < hasta)
+        .group_by(Gasto.id_categoria, CategoriaGasto.nombre)
+        .order_by(total_categoria.desc())
+        .all()
+    )
+    total = sum(total for _, _, total, _ in filas)
+    categorias = [
+        {
+            "id_categoria": id_categoria,
+            "nombre": nombre,
+            "total": total_cat,
+            "cantidad": cantidad,
+            "porcentaje": round(total_cat / total * 100, 2) if total else 0.0,
+        }
+        for id_categoria, nombre, total_cat, cantidad in filas
+    ]
+    return total, categorias
+
+def obtener_desglose_categorias(db: Session, id_usuario: int, mes: int, anio: int) -> dict:
+    """Gastos del mes agrupados por categoría, con total, cantidad y porcentaje del total del mes."""
+    clave = (id_usuario, anio, mes)
+    desglose = desglose_cache.get(clave)
+    if desglose is not None:
+        return desglose
+
+    inicio, fin = rango_mes(mes, anio)
+    total_mes, categorias = _desglose_categorias(db, id_usuario, inicio, fin)
+    desglose = {"id_usuario": id_usuario, "anio": anio, "mes": mes, "total": total_mes, "categorias": categorias}
+    # los desgloses incluyen nombres de categoría
+    desglose_cache.set(clave, desglose, etiquetas=("categorias",))
+    return desglose
+
+def obtener_desglose_categorias_rango(db: Session, id_usuario: int, desde: datetime, hasta: datetime) -> dict:
+    """Desglose por categoría de una ventana arbitraria; el porcentaje es sobre el total de la ventana.
+
+    No se cachea: la cache (e invalidación) es por mes, ver obtener_desglose_categorias.
+    """
+    if desde >= hasta:
+        raise exceptions.RangoFechasInvalido()
+    total, categorias = _desglose_categorias(db, id_usuario, desde, hasta)
+    return {"id_usuario": id_usuario, "desde": desde, "hasta": hasta, "total": total, "categorias": categorias}
 
 #CRUD categorias
 def crear_categoria(db: Session, categoria: schemas.CategoriaGastoCreate):
     nueva_categoria = CategoriaGasto(nombre=categoria.nombre)
     db.add(nueva_categoria)
     db.commit()
+    referencias.invalidar(referencias.CATEGORIAS)
     db.refresh(nueva_categoria)
     return nueva_categoria
 
 def obtener_categorias(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(CategoriaGasto).offset(skip).limit(limit).all()
+    return referencias.obtener(db, referencias.CATEGORIAS).pagina(skip, limit)
 
 def obtener_categoria_por_id(db: Session, id_categoria: int):
     return db.query(CategoriaGasto).filter(CategoriaGasto.id_categoria == id_categoria).first()
@@ -242,6 +720,8 @@ def actualizar_categoria(db: Session, id_categoria: int, categoria: schemas.Cate
         raise exceptions.CategoriaNoEncontrada()
     db_categoria.nombre = categoria.nombre
     db.commit()
+    referencias.invalidar(referencias.CATEGORIAS)
+    desglose_cache.invalidar_etiqueta("categorias")
     db.refresh(db_categoria)
     return db_categoria
 
@@ -251,6 +731,8 @@ def eliminar_categoria(db: Session, id_categoria: int):
         raise exceptions.CategoriaNoEncontrada()
     db.delete(db_categoria)
     db.commit()
+    referencias.invalidar(referencias.CATEGORIAS)
+    desglose_cache.invalidar_etiqueta("categorias")
     return db_categoria
 
 #CRUD para Monedas
@@ -258,11 +740,12 @@ def crear_moneda(db: Session, moneda: schemas.MonedaCreate):
     nueva_moneda = Moneda(nombre=moneda.nombre)
     db.add(nueva_moneda)
     db.commit()
+    referencias.invalidar(referencias.MONEDAS)
     db.refresh(nueva_moneda)
     return nueva_moneda
 
 def obtener_monedas(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(Moneda).offset(skip).limit(limit).all()
+    return referencias.obtener(db, referencias.MONEDAS).pagina(skip, limit)
 
 def actualizar_moneda(db: Session, id_moneda: int, moneda: schemas.MonedaCreate):
     db_moneda = db.query(Moneda).filter(Moneda.id_moneda == id_moneda).first()
@@ -270,6 +753,7 @@ def actualizar_moneda(db: Session, id_moneda: int, moneda: schemas.MonedaCreate)
         raise exceptions.MonedaNoEncontrada()
     db_moneda.nombre = moneda.nombre
     db.commit()
+    referencias.invalidar(referencias.MONEDAS)
     db.refresh(db_moneda)
     return db_moneda
 
@@ -279,6 +763,7 @@ def eliminar_moneda(db: Session, id_moneda: int):
         raise exceptions.MonedaNoEncontrada()
     db.delete(db_moneda)
     db.commit()
+    referencias.invalidar(referencias.MONEDAS)
     return db_moneda
 
 # CRUD para Presupuestos
@@ -295,6 +780,8 @@ def crear_presupuesto(db: Session, presupuesto: schemas.PresupuestoCreate):
     )
     db.add(db_presupuesto)
     db.commit()
+    # a partir de acá los gastos lo mantienen al día; se parte de lo ya gastado en el período
+    presupuestos.recalcular_montos(db, id_presupuesto=db_presupuesto.id_presupuesto, solo_activos=False)
     db.refresh(db_presupuesto)
     return db_presupuesto
 
@@ -304,23 +791,38 @@ def obtener_presupuesto(db: Session, id_presupuesto: int):
 def obtener_presupuestos_usuario(db: Session, id_usuario: int, skip: int = 0, limit: int = 10):
     return db.query(Presupuesto).filter(Presupuesto.id_usuario == id_usuario).offset(skip).limit(limit).all()
 
-def actualizar_monto_actual(db: Session, id_presupuesto: int):
-    presupuesto = db.query(Presupuesto).filter(Presupuesto.id_presupuesto == id_presupuesto).first()
+def obtener_presupuestos_paginados(
+    db: Session,
+    id_usuario: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_categoria: Optional[int] = None,
+):
+    query = _filtrar_fechas(
+        db.query(Presupuesto).filter(Presupuesto.id_usuario == id_usuario), Presupuesto.fecha_inicio, desde, hasta
+    )
+    if id_categoria is not None:
+        query = query.filter(Presupuesto.id_categoria == id_categoria)
+    return _paginar(query, Presupuesto.fecha_inicio, Presupuesto.id_presupuesto, cursor, limit)
+
+def actualizar_monto_actual(db: Session, id_presupuesto: int, id_usuario: Optional[int] = None):
+    query = db.query(Presupuesto).filter(Presupuesto.id_presupuesto == id_presupuesto)
+    if id_usuario is not None:
+        query = query.filter(Presupuesto.id_usuario == id_usuario)
+    presupuesto = query.first()
     if not presupuesto:
         return None
 
-    # Sumar los gastos de la categoría en el período del presupuesto
-    monto_actual = db.query(func.sum(Gasto.monto)).filter(
-        Gasto.id_categoria == presupuesto.id_categoria,
-        Gasto.fecha >= presupuesto.fecha_inicio,
-        Gasto.fecha <= presupuesto.fecha_fin
-    ).scalar() or 0.0
-
-    presupuesto.monto_actual = monto_actual
-    db.commit()
+    # Sumar los gastos del usuario en la categoría y el período del presupuesto
+    presupuestos.recalcular_montos(db, id_presupuesto=id_presupuesto, solo_activos=False)
     db.refresh(presupuesto)
     return presupuesto
 
+def recalcular_presupuestos_usuario(db: Session, id_usuario: int, solo_activos: bool = True) -> int:
+    return presupuestos.recalcular_montos(db, id_usuario=id_usuario, solo_activos=solo_activos)
+
 def eliminar_presupuesto(db: Session, id_presupuesto: int):
     db_presupuesto = db.query(Presupuesto).filter(Presupuesto.id_presupuesto == id_presupuesto).first()
     if not db_presupuesto:
@@ -0,0 +1,141 @@
+"""Versiones async de los servicios, para usar con AsyncSession (DB_ASYNC=true).
+
+Las lecturas simples se escriben con `select` directamente; los servicios con
+más lógica (resumen, altas con totales incrementales, paginación) reutilizan la
+implementación sync a través de `AsyncSession.run_sync`. `run_sync` corre en el
+event loop (sólo la E/S de la base se vuelve asíncrona), así que todo lo que
+bloquea fuera de la base —el refresco de tasas por HTTP y sus suscriptores, la
+cache compartida de desgloses, referencias e historial de tasas— se resuelve
+antes o después en el threadpool y se le pasa ya resuelto al servicio sync.
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.gestion import schemas, services, referencias, cierres, tasas_historicas
+from src.gestion.models import Ingreso, Gasto, CategoriaGasto, Presupuesto
+
+
+# Ingresos
+async def crear_ingreso(db: AsyncSession, ingreso: schemas.IngresoCreate):
+    return await db.run_sync(services.crear_ingreso, ingreso)
+
+async def obtener_ingresos_por_usuario(db: AsyncSession, id_usuario: int, skip: int = 0, limit: int = 10):
+    resultado = await db.execute(
+        select(Ingreso).where(Ingreso.id_usuario == id_usuario).offset(skip).limit(limit)
+    )
+    return resultado.scalars().all()
+
+async def obtener_ingresos_paginados(
+    db: AsyncSession,
+    id_usuario: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+):
+    return await db.run_sync(services.obtener_ingresos_paginados, id_usuario, cursor, limit, desde, hasta)
+
+
+# Gastos
+async def crear_gasto(db: AsyncSession, gasto: schemas.GastoCreate):
+    nuevo_gasto = await db.run_sync(services.insertar_gasto, gasto)
+    await run_in_threadpool(services.invalidar_desglose, nuevo_gasto.id_usuario, nuevo_gasto.fecha)
+    return nuevo_gasto
+
+async def obtener_gastos_por_usuario(db: AsyncSession, id_usuario: int, skip: int = 0, limit: int = 10):
+    resultado = await db.execute(
+        select(Gasto).where(Gasto.id_usuario == id_usuario).offset(skip).limit(limit)
+    )
+    return resultado.scalars().all()
+
+async def obtener_gastos_paginados(
+    db: AsyncSession,
+    id_usuario: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_categoria: Optional[int] = None,
+):
+    return await db.run_sync(
+        services.obtener_gastos_paginados, id_usuario, cursor, limit, desde, hasta, id_categoria
+    )
+
+
+# Resumen
+async def _indice_tasas(db: AsyncSession) -> tasas_historicas.IndiceTasas:
+    indice = await run_in_threadpool(tasas_historicas.vigente)
+    if indice is None:
+        token = await run_in_threadpool(tasas_historicas.token)
+        indice = await db.run_sync(tasas_historicas.cargar_indice, token)
+    return indice
+
+async def obtener_resumen(db: AsyncSession, id_usuario: int, mes: int, anio: int):
+    ahora = datetime.now()
+    tasas_cambio = None
+    if (anio, mes) == (ahora.year, ahora.month):
+        # puede refrescar por HTTP y notificar a los suscriptores
+        tasas_cambio = await run_in_threadpool(services.obtener_tasas_actuales)
+    elif (anio, mes) < (ahora.year, ahora.month):
+        tasas_cambio = services.tasas_historicas_del_mes(await _indice_tasas(db), mes, anio)
+    return await db.run_sync(services.obtener_resumen, id_usuario, mes, anio, tasas_cambio)
+
+
+async def cache_control_resumen(db: AsyncSession, mes: int, anio: int) -> str:
+    # la marca de cierre está en memoria del proceso: sólo se va a la base cuando venció
+    if cierres.cache_vigente():
+        return cierres.cache_control(db.sync_session, mes, anio)
+    return await db.run_sync(cierres.cache_control, mes, anio)
+
+
+# Datos de referencia (categorías y monedas)
+async def obtener_listado_referencia(db: AsyncSession, tabla: str):
+    # con la cache vigente no se toma conexión
+    listado = await run_in_threadpool(referencias.vigente, tabla)
+    if listado is None:
+        token = await run_in_threadpool(referencias.token, tabla)
+        listado = await db.run_sync(referencias.cargar_tabla, tabla, token)
+    return listado
+
+
+# Categorías
+async def obtener_categorias(db: AsyncSession, skip: int = 0, limit: int = 10):
+    listado = await obtener_listado_referencia(db, referencias.CATEGORIAS)
+    return listado.pagina(skip, limit)
+
+async def obtener_categoria_por_id(db: AsyncSession, id_categoria: int):
+    return await db.get(CategoriaGasto, id_categoria)
+
+
+# Monedas
+async def obtener_monedas(db: AsyncSession, skip: int = 0, limit: int = 10):
+    listado = await obtener_listado_referencia(db, referencias.MONEDAS)
+    return listado.pagina(skip, limit)
+
+
+# Presupuestos
+async def obtener_presupuesto(db: AsyncSession, id_presupuesto: int):
+    return await db.get(Presupuesto, id_presupuesto)
+
+async def obtener_presupuestos_usuario(db: AsyncSession, id_usuario: int, skip: int = 0, limit: int = 10):
+    resultado = await db.execute(
+        select(Presupuesto).where(Presupuesto.id_usuario == id_usuario).offset(skip).limit(limit)
+    )
+    return resultado.scalars().all()
+
+async def obtener_presupuestos_paginados(
+    db: AsyncSession,
+    id_usuario: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    id_categoria: Optional[int] = None,
+):
+    return await db.run_sync(
+        services.obtener_presupuestos_paginados, id_usuario, cursor, limit, desde, hasta, id_categoria
+    )
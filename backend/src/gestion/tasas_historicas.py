@@ -0,0 +1,251 @@
+"""Historial de tasas de cambio diarias (tabla `tasas_cambio`) y consultas a una fecha.
+
+Las tasas son relativas al USD, igual que las del proveedor de tasas actuales.
+Cada refresco exitoso del proveedor guarda las tasas del día si cambiaron, y el
+historial anterior se puede cargar desde un archivo. Para convertir se usa la
+última tasa conocida a la fecha pedida (as-of), buscada con bisect sobre un
+índice en memoria que se arma una vez por worker.
+
+El índice se invalida en todos los workers al cargar historial y con la primera
+tasa de cada día; los cambios del mismo día se aplican en el lugar en el worker
+que los guarda y llegan a los demás a más tardar con TASAS_HISTORICAS_TTL. Las
+tasas del día no se usan para convertir hasta que termina el mes (el mes en
+curso usa las tasas actuales), y la recarga del día siguiente ya las incluye.
+
+Carga y consulta (desde backend/):
+    python -m src.gestion.tasas_historicas cargar tasas.json
+    python -m src.gestion.tasas_historicas cargar tasas.csv
+    python -m src.gestion.tasas_historicas consultar 2024-05-31
+
+Formatos aceptados:
+    JSON  {"2024-05-31": {"ARS": 890.5, "EUR": 0.92}, ...}  (cada día puede venir como {"rates": {...}})
+    CSV   fecha,codigo,tasa
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from src.gestion.models import TasaCambio
+from src.utils.cache import crear_cache
+
+TASAS_HISTORICAS_TTL = float(os.getenv("TASAS_HISTORICAS_TTL", "3600"))
+TAMANIO_LOTE = 1000
+
+Fila = Tuple[date, str, float]  # (fecha, codigo, tasa)
+
+
+def _dia(fecha) -> date:
+    return fecha.date() if isinstance(fecha, datetime) else fecha
+
+
+class IndiceTasas:
+    """Fechas y tasas ordenadas por moneda: cada consulta es un bisect por moneda."""
+
+    def __init__(self, filas: Iterable[Fila], token: str = ""):
+        self.token = token
+        self.cargado = time.monotonic()
+        self._fechas: Dict[str, List[date]] = {}
+        self._tasas: Dict[str, List[float]] = {}
+        for fecha, codigo, tasa in sorted(filas, key=lambda f: (f[1], f[0])):
+            self._fechas.setdefault(codigo, []).append(fecha)
+            self._tasas.setdefault(codigo, []).append(tasa)
+
+    def __len__(self) -> int:
+        return sum(len(fechas) for fechas in self._fechas.values())
+
+    def tasa(self, codigo: str, fecha) -> Optional[float]:
+        """La última tasa de la moneda publicada el día `fecha` o antes."""
+        fechas = self._fechas.get(codigo)
+        if not fechas:
+            return None
+        posicion = bisect_right(fechas, _dia(fecha))
+        return self._tasas[codigo][posicion - 1] if posicion else None
+
+    def tasas_al(self, fecha, codigos: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Tasas vigentes a la fecha; las monedas sin tasa hasta ese día no aparecen."""
+        tasas = {}
+        for codigo in self._fechas if codigos is None else codigos:
+            tasa = self.tasa(codigo, fecha)
+            if tasa is not None:
+                tasas[codigo] = tasa
+        return tasas
+
+    def actualizar(self, fecha, tasas: Dict[str, float]):
+        """Agrega o reemplaza las tasas de un día manteniendo el orden por fecha."""
+        fecha = _dia(fecha)
+        for codigo, tasa in tasas.items():
+            valores = self._tasas.setdefault(codigo, [])
+            fechas = self._fechas.setdefault(codigo, [])
+            posicion = bisect_left(fechas, fecha)
+            if posicion < len(fechas) and fechas[posicion] == fecha:
+                valores[posicion] = tasa
+            else:
+                # primero la tasa: quien lea en paralelo con la lista de fechas
+                # vieja sigue encontrando las tasas en sus posiciones (el día
+                # nuevo suele ser el último)
+                valores.insert(posicion, tasa)
+                fechas.insert(posicion, fecha)
+
+
+_indice: Optional[IndiceTasas] = None
+# token compartido entre workers; cambia cada vez que se cargan tasas
+_tokens = crear_cache("tasas_historicas", max_items=1, ttl=7 * 24 * 3600)
+_lock = threading.Lock()
+
+
+def token() -> str:
+    """Token vigente del índice en la cache compartida (lo crea si no hay)."""
+    with _lock:
+        actual = _tokens.get("indice")
+        if actual is None:
+            actual = uuid.uuid4().hex
+            _tokens.set("indice", actual)
+        return actual
+
+
+def cargar_indice(db: Session, token_indice: Optional[str] = None) -> IndiceTasas:
+    """Lee el historial y lo deja como índice del proceso.
+
+    `token_indice` permite resolver el token antes (fuera de la sesión), como
+    hace la versión async.
+    """
+    global _indice
+    token_indice = token_indice or token()
+    indice = IndiceTasas(db.query(TasaCambio.fecha, TasaCambio.codigo, TasaCambio.tasa), token_indice)
+    _indice = indice
+    return indice
+
+
+def vigente() -> Optional[IndiceTasas]:
+    """El índice en memoria si no venció ni fue invalidado, sin tocar la base."""
+    indice = _indice
+    if (
+        indice is None
+        or time.monotonic() - indice.cargado > TASAS_HISTORICAS_TTL
+        or _tokens.get("indice") != indice.token
+    ):
+        return None
+    return indice
+
+
+def obtener_indice(db: Session) -> IndiceTasas:
+    return vigente() or cargar_indice(db)
+
+
+def invalidar():
+    """Descarta el índice en todos los workers. Llamar después del commit."""
+    global _indice
+    _tokens.set("indice", uuid.uuid4().hex)
+    _indice = None
+
+
+def tasas_al(db: Session, fecha, codigos: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    return obtener_indice(db).tasas_al(fecha, codigos)
+
+
+def _escribir(db: Session, por_clave: Dict[Tuple[date, str], float]):
+    """Upsert por fecha y moneda, en lotes (sin commit)."""
+    claves = list(por_clave)
+    for i in range(0, len(claves), TAMANIO_LOTE):
+        lote = claves[i:i + TAMANIO_LOTE]
+        for fecha in {fecha for fecha, _ in lote}:
+            codigos = [codigo for f, codigo in lote if f == fecha]
+            db.execute(delete(TasaCambio).where(TasaCambio.fecha == fecha, TasaCambio.codigo.in_(codigos)))
+        db.execute(
+            insert(TasaCambio),
+            [{"fecha": fecha, "codigo": codigo, "tasa": por_clave[(fecha, codigo)]} for fecha, codigo in lote],
+        )
+
+
+def guardar(db: Session, filas: Iterable[Fila]) -> int:
+    """Reemplaza las tasas de los días incluidos en `filas` (upsert por fecha y moneda) y hace commit."""
+    por_clave = {(_dia(fecha), codigo): float(tasa) for fecha, codigo, tasa in filas}
+    if not por_clave:
+        return 0
+    _escribir(db, por_clave)
+    db.commit()
+    invalidar()
+    return len(por_clave)
+
+
+def guardar_del_dia(db: Session, fecha: date, tasas: Dict[str, float]) -> int:
+    """Guarda sólo las tasas del día que cambiaron; devuelve cuántas escribió.
+
+    La primera escritura del día invalida el índice en todos los workers; las
+    siguientes lo actualizan en el lugar en este worker.
+    """
+    guardadas = dict(db.execute(select(TasaCambio.codigo, TasaCambio.tasa).where(TasaCambio.fecha == fecha)).all())
+    cambios = {codigo: float(tasa) for codigo, tasa in tasas.items() if guardadas.get(codigo) != float(tasa)}
+    if not cambios:
+        return 0
+    _escribir(db, {(fecha, codigo): tasa for codigo, tasa in cambios.items()})
+    db.commit()
+    indice = vigente()
+    if not guardadas:
+        invalidar()
+    elif indice is not None:
+        indice.actualizar(fecha, cambios)
+    return len(cambios)
+
+
+def registrar_del_dia(tasas: dict):
+    """Suscriptor del proveedor de tasas: guarda las tasas de hoy si cambiaron desde el último refresco."""
+    from src.database import SessionLocal
+
+    with SessionLocal() as db:
+        guardar_del_dia(db, date.today(), tasas)
+
+
+def leer_archivo(ruta: str) -> List[Fila]:
+    if ruta.endswith(".csv"):
+        with open(ruta, newline="", encoding="utf-8") as f:
+            return [
+                (date.fromisoformat(fila["fecha"][:10]), fila["codigo"].strip().upper(), float(fila["tasa"]))
+                for fila in csv.DictReader(f)
+            ]
+    with open(ruta, encoding="utf-8") as f:
+        data = json.load(f)
+    filas = []
+    for dia, tasas in data.items():
+        fecha = date.fromisoformat(dia[:10])
+        filas.extend((fecha, codigo.upper(), float(tasa)) for codigo, tasa in tasas.get("rates", tasas).items())
+    return filas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Historial de tasas de cambio.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    cargar = comandos.add_parser("cargar", help="Carga tasas diarias desde un archivo JSON o CSV.")
+    cargar.add_argument("ruta")
+    consultar = comandos.add_parser("consultar", help="Muestra las tasas vigentes a una fecha.")
+    consultar.add_argument("fecha", type=date.fromisoformat)
+    args = parser.parse_args(argv)
+
+    from src.database import SessionLocal
+
+    with SessionLocal() as db:
+        if args.comando == "cargar":
+            print(f"{guardar(db, leer_archivo(args.ruta))} tasa(s) cargada(s).")
+        else:
+            tasas = tasas_al(db, args.fecha)
+            for codigo in sorted(tasas):
+                print(f"{codigo} {tasas[codigo]}")
+            if not tasas:
+                print("Sin tasas a esa fecha.")
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
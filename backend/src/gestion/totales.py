@@ -0,0 +1,234 @@
+"""Totales mensuales incrementales (tabla `totales_mensuales`).
+
+Cada alta, modificación o baja de ingresos/gastos aplica un delta sobre la fila
+(usuario, año, mes, moneda) dentro de la misma transacción, así el resumen de
+un mes es una búsqueda puntual sin importar cuántos registros tenga el usuario.
+El delta es un INSERT ... ON CONFLICT DO UPDATE sobre el índice único de la
+clave, así dos primeras escrituras concurrentes del mismo período no duplican
+la fila.
+
+Reconciliación (desde backend/):
+    python -m src.gestion.totales               # reconstruye y reporta diferencias
+    python -m src.gestion.totales --solo-verificar
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, extract, func
+from sqlalchemy.orm import Session
+
+from src.gestion.models import MONEDA_O_CERO, Gasto, Ingreso, Moneda, Resumen, TotalMensual
+from src.utils.dinero import CERO, normalizar
+from src.utils.fechas import rango_mes
+
+TOLERANCIA = 1e-6
+
+Clave = Tuple[int, int, int, Optional[int]]  # (id_usuario, anio, mes, id_moneda)
+
+
+def _descartar_resumen(db: Session, id_usuario: int, fecha: datetime):
+    """Borra el resumen guardado de un mes anterior: se vuelve a calcular la próxima vez que se pida."""
+    ahora = datetime.now()
+    if (fecha.year, fecha.month) == (ahora.year, ahora.month):
+        return  # el del mes en curso se recalcula en cada lectura
+    inicio, fin = rango_mes(fecha.month, fecha.year)
+    db.execute(delete(Resumen).where(Resumen.id_usuario == id_usuario, Resumen.fecha >= inicio, Resumen.fecha < fin))
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(TotalMensual)
+
+
+def _aplicar_delta(db: Session, id_usuario: int, fecha: datetime, id_moneda: Optional[int], **deltas):
+    _descartar_resumen(db, id_usuario, fecha)
+    sentencia = _insert(db).values(
+        id_usuario=id_usuario,
+        anio=fecha.year,
+        mes=fecha.month,
+        id_moneda=id_moneda,
+        **{"total_ingresos": CERO, "cantidad_ingresos": 0, "total_gastos": CERO, "cantidad_gastos": 0, **deltas},
+    )
+    db.execute(sentencia.on_conflict_do_update(
+        index_elements=[TotalMensual.id_usuario, TotalMensual.anio, TotalMensual.mes, MONEDA_O_CERO],
+        set_={campo: getattr(TotalMensual, campo) + delta for campo, delta in deltas.items()},
+    ))
+
+
+def registrar_ingreso(db: Session, ingreso: Ingreso, signo: int = 1):
+    """Suma (signo=1) o resta (signo=-1) el ingreso de los totales. No hace commit."""
+    _aplicar_delta(
+        db, ingreso.id_usuario, ingreso.fecha, ingreso.id_moneda,
+        total_ingresos=signo * ingreso.monto, cantidad_ingresos=signo,
+    )
+
+
+def registrar_gasto(db: Session, gasto: Gasto, signo: int = 1):
+    """Suma (signo=1) o resta (signo=-1) el gasto de los totales. No hace commit."""
+    _aplicar_delta(
+        db, gasto.id_usuario, gasto.fecha, None,
+        total_gastos=signo * gasto.monto, cantidad_gastos=signo,
+    )
+
+
+def _registrar_lote(db: Session, filas, clave, campo_total: str, campo_cantidad: str):
+    deltas: Dict[Clave, list] = {}
+    for fila in filas:
+        acumulado = deltas.setdefault(clave(fila), [CERO, 0])
+        acumulado[0] += normalizar(fila["monto"])
+        acumulado[1] += 1
+    for (id_usuario, anio, mes, id_moneda), (total, cantidad) in deltas.items():
+        _aplicar_delta(
+            db, id_usuario, datetime(anio, mes, 1), id_moneda,
+            **{campo_total: total, campo_cantidad: cantidad},
+        )
+
+
+def registrar_lote_ingresos(db: Session, filas: List[dict]):
+    """Aplica un solo delta por (usuario, mes, moneda) para un lote de ingresos insertados en bloque."""
+    _registrar_lote(
+        db, filas,
+        lambda f: (f["id_usuario"], f["fecha"].year, f["fecha"].month, f["id_moneda"]),
+        "total_ingresos", "cantidad_ingresos",
+    )
+
+
+def registrar_lote_gastos(db: Session, filas: List[dict]):
+    """Aplica un solo delta por (usuario, mes) para un lote de gastos insertados en bloque."""
+    _registrar_lote(
+        db, filas,
+        lambda f: (f["id_usuario"], f["fecha"].year, f["fecha"].month, None),
+        "total_gastos", "cantidad_gastos",
+    )
+
+
+def obtener_totales_mes(db: Session, id_usuario: int, mes: int, anio: int):
+    """Filas (id_moneda, nombre_moneda, total_ingresos, total_gastos) del mes."""
+    return (
+        db.query(
+            TotalMensual.id_moneda,
+            Moneda.nombre,
+            func.sum(TotalMensual.total_ingresos),
+            func.sum(TotalMensual.total_gastos),
+        )
+        .outerjoin(Moneda, Moneda.id_moneda == TotalMensual.id_moneda)
+        .filter(
+            TotalMensual.id_usuario == id_usuario,
+            TotalMensual.anio == anio,
+            TotalMensual.mes == mes,
+        )
+        .group_by(TotalMensual.id_moneda, Moneda.nombre)
+        .all()
+    )
+
+
+def _totales_desde_cero(db: Session) -> Dict[Clave, list]:
+    totales: Dict[Clave, list] = {}
+    anio_ingreso, mes_ingreso = extract("year", Ingreso.fecha), extract("month", Ingreso.fecha)
+    for id_usuario, anio, mes, id_moneda, total, cantidad in (
+        db.query(Ingreso.id_usuario, anio_ingreso, mes_ingreso, Ingreso.id_moneda,
+                 func.sum(Ingreso.monto), func.count())
+        .group_by(Ingreso.id_usuario, anio_ingreso, mes_ingreso, Ingreso.id_moneda)
+    ):
+        totales[(id_usuario, int(anio), int(mes), id_moneda)] = [normalizar(total), cantidad, CERO, 0]
+
+    anio_gasto, mes_gasto = extract("year", Gasto.fecha), extract("month", Gasto.fecha)
+    for id_usuario, anio, mes, total, cantidad in (
+        db.query(Gasto.id_usuario, anio_gasto, mes_gasto, func.sum(Gasto.monto), func.count())
+        .group_by(Gasto.id_usuario, anio_gasto, mes_gasto)
+    ):
+        totales[(id_usuario, int(anio), int(mes), None)] = [CERO, 0, normalizar(total), cantidad]
+    return totales
+
+
+def _totales_actuales(db: Session) -> Dict[Clave, list]:
+    totales: Dict[Clave, list] = {}
+    for fila in db.query(TotalMensual):
+        clave = (fila.id_usuario, fila.anio, fila.mes, fila.id_moneda)
+        acumulado = totales.setdefault(clave, [CERO, 0, CERO, 0])
+        acumulado[0] += normalizar(fila.total_ingresos)
+        acumulado[1] += fila.cantidad_ingresos
+        acumulado[2] += normalizar(fila.total_gastos)
+        acumulado[3] += fila.cantidad_gastos
+    return totales
+
+
+def reconstruir_totales(db: Session, aplicar: bool = True) -> List[dict]:
+    """Recalcula los totales desde ingresos/gastos y devuelve las diferencias encontradas.
+
+    Con aplicar=True reemplaza el contenido de la tabla en una sola transacción.
+    """
+    esperado = _totales_desde_cero(db)
+    actual = _totales_actuales(db)
+
+    diferencias = []
+    vacio = [CERO, 0, CERO, 0]
+    for clave in sorted(esperado.keys() | actual.keys(), key=lambda c: (c[0], c[1], c[2], c[3] or 0)):
+        e, a = esperado.get(clave, vacio), actual.get(clave, vacio)
+        if any(abs(x - y) > TOLERANCIA for x, y in zip(e, a)):
+            id_usuario, anio, mes, id_moneda = clave
+            diferencias.append({
+                "id_usuario": id_usuario, "anio": anio, "mes": mes, "id_moneda": id_moneda,
+                "esperado": e, "actual": a,
+            })
+
+    if aplicar:
+        db.execute(delete(TotalMensual))
+        db.add_all(
+            TotalMensual(
+                id_usuario=id_usuario, anio=anio, mes=mes, id_moneda=id_moneda,
+                total_ingresos=ti, cantidad_ingresos=ci, total_gastos=tg, cantidad_gastos=cg,
+            )
+            for (id_usuario, anio, mes, id_moneda), (ti, ci, tg, cg) in esperado.items()
+        )
+        db.commit()
+    return diferencias
+
+
+def inicializar_totales(db: Session):
+    """Llena la tabla si está vacía pero ya hay movimientos (bases creadas antes de la tabla)."""
+    if db.query(TotalMensual.id_total).first() is not None:
+        return
+    if db.query(Ingreso.id_ingreso).first() is None and db.query(Gasto.id_gasto).first() is None:
+        return
+    reconstruir_totales(db)
+
+
+def limpiar_vacios(db: Session) -> int:
+    """Borra las filas que quedaron sin ingresos ni gastos (todo lo del mes se dio de baja) y hace commit."""
+    resultado = db.execute(
+        delete(TotalMensual).where(TotalMensual.cantidad_ingresos == 0, TotalMensual.cantidad_gastos == 0)
+    )
+    db.commit()
+    return resultado.rowcount
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconstruye la tabla totales_mensuales.")
+    parser.add_argument("--solo-verificar", action="store_true", help="Reporta diferencias sin modificar la tabla.")
+    args = parser.parse_args(argv)
+
+    from src.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        diferencias = reconstruir_totales(db, aplicar=not args.solo_verificar)
+    finally:
+        db.close()
+
+    for d in diferencias:
+        print(
+            f"usuario={d['id_usuario']} {d['anio']}-{d['mes']:02d} moneda={d['id_moneda']}: "
+            f"esperado={d['esperado']} actual={d['actual']}"
+        )
+    print(f"{len(diferencias)} diferencia(s) encontrada(s).")
+    return 1 if diferencias and args.solo_verificar else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
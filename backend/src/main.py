@@ -2,9 +2,16 @@ import os
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from src.database import engine
-from src.models import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse
+from src.database import engine, SessionLocal, DB_ASYNC, cerrar_async_engine
+from src.migraciones import asegurar_esquema
+from src.utils.tasas_cambio import obtener_proveedor
+from src.gestion.totales import inicializar_totales
+from src.gestion import referencias, tasas_historicas
+from src.gestion.migrar_dinero import verificar_modo
+from src.auth import passwords
+from src.utils import metricas
+from src import tareas
 from fastapi.middleware.cors import CORSMiddleware
 
 # importamos los routers desde nuestros modulos
@@ -18,13 +25,34 @@ ROOT_PATH = os.getenv(f"ROOT_PATH_{ENV.upper()}")
 
 @asynccontextmanager
 async def db_creation_lifespan(app: FastAPI):
-    BaseModel.metadata.create_all(bind=engine)
+    # sin DDL si la base ya está en la versión de los modelos (ver src/migraciones.py)
+    asegurar_esquema(engine)
+    with SessionLocal() as db:
+        verificar_modo(db)
+        inicializar_totales(db)
+        referencias.cargar(db)
+    # cada refresco de tasas queda en el historial
+    obtener_proveedor().suscribir(tasas_historicas.registrar_del_dia)
+    # refresco de tasas, recálculos, cierres y limpieza en segundo plano
+    planificador = tareas.crear_planificador()
+    app.state.planificador = planificador
+    await planificador.iniciar()
     yield
+    await planificador.detener()
+    metricas.registro.quitar_exportador(planificador.exportar)
+    await cerrar_async_engine()
+    passwords.cerrar()
 
 
 app = FastAPI(root_path=ROOT_PATH, lifespan=db_creation_lifespan)
 
 # asociamos los routers a nuestra app
+if DB_ASYNC:
+    # se registra primero para que sus rutas tengan prioridad sobre las sync;
+    # fuera del schema porque sus contratos son idénticos a los de router.py
+    from src.gestion.router_async import router as gestion_router_async
+
+    app.include_router(gestion_router_async, include_in_schema=False)
 app.include_router(gestion_router)
 
 origins = [
@@ -37,4 +65,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
+# se agrega último para quedar por fuera de CORS y medir el request completo
+app.add_middleware(metricas.MiddlewareMetricas)
+
+
+@app.get("/metrics", include_in_schema=False)
+def exportar_metricas():
+    """Latencias por ruta y tiempo de base de datos en formato Prometheus."""
+    return PlainTextResponse(metricas.registro.exportar(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/planificador", include_in_schema=False)
+def estado_planificador(request: Request):
+    """Trabajos en segundo plano: próxima ejecución, duración, errores y si este worker es el líder."""
+    return request.app.state.planificador.estado()
@@ -0,0 +1,207 @@
+"""Versión del esquema y migración de la base, fuera del arranque de la app.
+
+La versión es una huella de la metadata (tablas, columnas, tipos e índices) y
+se guarda en la tabla `parametros` después de migrar. Al arrancar, la app sólo
+lee esa marca: si coincide con la de los modelos no ejecuta DDL, así los
+workers arrancan sin inspeccionar cada tabla ni índice.
+
+Migración (desde backend/, antes de arrancar o desplegar):
+    python -m src.migraciones            # crea tablas e índices faltantes y registra la versión
+    python -m src.migraciones --estado
+
+Con ESQUEMA_AUTO_MIGRAR=false la app no migra sola y se niega a arrancar con
+un esquema desactualizado.
+
+migrar sólo crea lo que falta. Antes de registrar la versión compara la base
+con los modelos (columnas, tipos e índices); si una tabla existente cambió, no
+la marca como al día y falla pidiendo una migración manual. Las columnas de
+montos sólo se verifican como numéricas: su tipo depende de DINERO_MODO y lo
+administra src.gestion.migrar_dinero. Con varios workers arrancando a la vez,
+migra el que toma el bloqueo "migraciones" de la tabla `bloqueos` y el resto
+espera hasta ESQUEMA_ESPERA segundos a que termine.
+
+Chequeo de punta a punta: python -m benchmarks.chequeo_migraciones
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+import warnings
+from functools import lru_cache
+from typing import List, Optional
+
+from sqlalchemy import inspect, select
+from sqlalchemy import types as sqltypes
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from src.models import BaseModel, Bloqueo, Parametro
+from src.utils.dinero import Dinero
+
+ESQUEMA_AUTO_MIGRAR = os.getenv("ESQUEMA_AUTO_MIGRAR", "true").lower() == "true"
+ESQUEMA_ESPERA = float(os.getenv("ESQUEMA_ESPERA", "120"))  # segundos esperando a otro worker que migra
+ESQUEMA_BLOQUEO_TTL = float(os.getenv("ESQUEMA_BLOQUEO_TTL", "300"))
+
+CLAVE_VERSION = "version_esquema"
+
+
+class EsquemaDesactualizado(RuntimeError):
+    """La base no tiene la versión de esquema de los modelos y la app no puede migrarla."""
+
+
+@lru_cache(maxsize=1)
+def version_modelos() -> str:
+    import src.gestion.models  # noqa: F401 registra las tablas en la metadata
+
+    partes = []
+    for tabla in sorted(BaseModel.metadata.tables.values(), key=lambda t: t.name):
+        partes.append(f"T {tabla.name}")
+        for columna in tabla.columns:
+            partes.append(
+                f"C {columna.name} {columna.type!r} pk={columna.primary_key} null={columna.nullable} "
+                f"fk={sorted(fk.target_fullname for fk in columna.foreign_keys)}"
+            )
+        for indice in sorted(tabla.indexes, key=lambda i: i.name):
+            partes.append(f"I {indice.name} {[c.name for c in indice.columns]} unique={indice.unique}")
+    return hashlib.sha256("\n".join(partes).encode()).hexdigest()[:16]
+
+
+def version_base(engine: Engine) -> Optional[str]:
+    with engine.connect() as conexion:
+        if not inspect(conexion).has_table(Parametro.__tablename__):
+            return None
+        return conexion.execute(select(Parametro.valor).where(Parametro.clave == CLAVE_VERSION)).scalar()
+
+
+def diferencias_esquema(conexion: Connection) -> List[str]:
+    """Lo que difiere entre la base y los modelos y create_all no corrige (vacío si coinciden)."""
+    inspector = inspect(conexion)
+    dialecto = conexion.dialect
+    diferencias = []
+    for tabla in BaseModel.metadata.sorted_tables:
+        if not inspector.has_table(tabla.name):
+            diferencias.append(f"falta la tabla {tabla.name}")
+            continue
+        existentes = {columna["name"]: columna for columna in inspector.get_columns(tabla.name)}
+        for columna in tabla.columns:
+            existente = existentes.pop(columna.name, None)
+            if existente is None:
+                diferencias.append(f"falta la columna {tabla.name}.{columna.name}")
+                continue
+            if isinstance(columna.type, Dinero):
+                # el modo de los montos lo controlan migrar_dinero y verificar_modo; en SQLite la
+                # columna conserva el tipo con el que se creó (FLOAT o BIGINT) al cambiar de modo
+                if not isinstance(existente["type"], (sqltypes.Integer, sqltypes.Numeric)):
+                    diferencias.append(f"{tabla.name}.{columna.name} es {existente['type']} y los modelos esperan un monto")
+                continue
+            esperado = columna.type.compile(dialect=dialecto)
+            actual = existente["type"].compile(dialect=dialecto)
+            if esperado != actual:
+                diferencias.append(f"{tabla.name}.{columna.name} es {actual} y los modelos esperan {esperado}")
+        diferencias.extend(f"columna {tabla.name}.{nombre} sobrante" for nombre in existentes)
+        with warnings.catch_warnings():
+            # los índices sobre expresiones no se reflejan; esos se crean con IF NOT EXISTS
+            warnings.filterwarnings("ignore", "Skipped unsupported reflection of expression-based index")
+            indices = {indice["name"]: indice for indice in inspector.get_indexes(tabla.name)}
+        for indice in tabla.indexes:
+            existente = indices.get(indice.name)
+            if existente is None or None in existente["column_names"]:
+                continue
+            if existente["column_names"] != [c.name for c in indice.columns]:
+                diferencias.append(f"el índice {indice.name} tiene otras columnas")
+    return diferencias
+
+
+def migrar(engine: Engine) -> str:
+    """Crea las tablas e índices que falten y registra la versión de los modelos.
+
+    Falla con EsquemaDesactualizado, sin registrar la versión, si la base
+    sigue sin coincidir con los modelos (columnas o tipos cambiados).
+    """
+    version = version_modelos()
+    BaseModel.metadata.create_all(bind=engine)
+    # create_all no agrega los índices nuevos a tablas que ya existen; IF NOT EXISTS
+    # en lugar de checkfirst porque la reflexión no ve los índices sobre expresiones
+    with engine.begin() as conexion:
+        for tabla in BaseModel.metadata.sorted_tables:
+            for indice in tabla.indexes:
+                conexion.execute(CreateIndex(indice, if_not_exists=True))
+        diferencias = diferencias_esquema(conexion)
+        if diferencias:
+            raise EsquemaDesactualizado(
+                f"La base no coincide con los modelos {version} y hace falta una migración manual: "
+                + "; ".join(diferencias)
+            )
+        conexion.execute(Parametro.__table__.delete().where(Parametro.clave == CLAVE_VERSION))
+        conexion.execute(Parametro.__table__.insert().values(clave=CLAVE_VERSION, valor=version))
+    return version
+
+
+def _migrar_con_bloqueo(engine: Engine, espera: float) -> bool:
+    """Migra si toma el bloqueo; si lo tiene otro worker, espera a que registre la versión."""
+    from src.utils.planificador import BloqueoBase
+
+    with engine.begin() as conexion:
+        conexion.execute(CreateTable(Bloqueo.__table__, if_not_exists=True))
+    bloqueo = BloqueoBase(sessionmaker(bind=engine), nombre="migraciones", ttl=ESQUEMA_BLOQUEO_TTL)
+    limite = time.monotonic() + espera
+    while True:
+        if bloqueo.adquirir():
+            try:
+                # otro worker pudo haber terminado mientras esperábamos el bloqueo
+                if version_base(engine) == version_modelos():
+                    return False
+                migrar(engine)
+                return True
+            finally:
+                bloqueo.liberar()
+        if version_base(engine) == version_modelos():
+            return False
+        if time.monotonic() > limite:
+            raise EsquemaDesactualizado(
+                f"Otro proceso está migrando el esquema y no terminó en {espera:g}s. "
+                "Migrar con: python -m src.migraciones"
+            )
+        time.sleep(0.5)
+
+
+def asegurar_esquema(engine: Engine, auto_migrar: bool = ESQUEMA_AUTO_MIGRAR, espera: float = ESQUEMA_ESPERA) -> bool:
+    """Se llama al arrancar. Devuelve True si este proceso tuvo que migrar."""
+    registrada = version_base(engine)
+    if registrada == version_modelos():
+        return False
+    if not auto_migrar:
+        raise EsquemaDesactualizado(
+            f"La base tiene la versión de esquema {registrada or 'ninguna'} y los modelos {version_modelos()}. "
+            "Migrar con: python -m src.migraciones"
+        )
+    return _migrar_con_bloqueo(engine, espera)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Crea o actualiza el esquema de la base.")
+    parser.add_argument("--estado", action="store_true", help="Informa las versiones sin modificar la base.")
+    args = parser.parse_args(argv)
+
+    from src.database import engine
+
+    registrada, actual = version_base(engine), version_modelos()
+    if args.estado:
+        print(f"Versión en la base: {registrada or 'ninguna'}")
+        print(f"Versión de los modelos: {actual}")
+        return 0 if registrada == actual else 1
+    if registrada == actual:
+        print(f"El esquema ya está en la versión {actual}.")
+        return 0
+    try:
+        print(f"Esquema migrado a la versión {migrar(engine)}.")
+    except EsquemaDesactualizado as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
-from sqlalchemy import update
-from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy import Float, String, update
+from sqlalchemy.orm import Mapped, Session, declarative_base, mapped_column
 
 Base = declarative_base()
 
@@ -67,4 +67,32 @@ class BaseModel(Base):
     def __repr__(self):
         # Define un formato de representacion como cadena para el modelo base.
         params = ", ".join(f"{k}={v}" for k, v in keyvalgen(self))
-        return f"{self.__class__.__name__}({params})"
\ No newline at end of file
+        return f"{self.__class__.__name__}({params})"
+
+
+class Parametro(BaseModel):
+    """Configuración persistida junto con los datos (ej. en qué modo se guardan los montos)."""
+
+    __tablename__ = "parametros"
+
+    clave: Mapped[str] = mapped_column(String, primary_key=True)
+    valor: Mapped[str] = mapped_column(String, nullable=False)
+
+    @classmethod
+    def leer(cls, db: Session, clave: str):
+        parametro = db.get(cls, clave)
+        return None if parametro is None else parametro.valor
+
+    @classmethod
+    def escribir(cls, db: Session, clave: str, valor: str):
+        db.merge(cls(clave=clave, valor=valor))
+
+
+class Bloqueo(BaseModel):
+    """Bloqueo con vencimiento compartido entre procesos (ej. el líder del planificador de tareas)."""
+
+    __tablename__ = "bloqueos"
+
+    nombre: Mapped[str] = mapped_column(String, primary_key=True)
+    duenio: Mapped[str] = mapped_column(String, nullable=False)
+    vence: Mapped[float] = mapped_column(Float, nullable=False)  # epoch en segundos
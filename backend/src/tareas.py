@@ -0,0 +1,73 @@
+"""Trabajos en segundo plano de la app, corridos por el planificador desde el lifespan.
+
+    tasas         refresco de tasas de cambio, en cada worker (cada uno tiene su cache)
+    presupuestos  recálculo de monto_actual, cada PRESUPUESTOS_INTERVALO_RECALCULO segundos
+    cierres       cierre de meses vencidos y sus resúmenes, según CIERRE_CRON o CIERRE_INTERVALO (opcional)
+    limpieza      borrado de totales mensuales vacíos, según LIMPIEZA_CRON
+
+Salvo `tasas`, corren sólo en el worker líder (ver src/utils/planificador.py).
+Un intervalo en 0 o un cron vacío desactiva el trabajo.
+"""
+import logging
+import os
+
+from src.database import SessionLocal
+from src.gestion import cierres, presupuestos, totales
+from src.utils import metricas
+from src.utils.planificador import Cron, Intervalo, Planificador, crear_bloqueo
+from src.utils.tasas_cambio import TASAS_INTERVALO_REFRESCO, obtener_proveedor
+
+logger = logging.getLogger(__name__)
+
+LIMPIEZA_CRON = os.getenv("LIMPIEZA_CRON", "30 3 * * *")
+
+
+def refrescar_tasas():
+    obtener_proveedor().refrescar()
+
+
+def recalcular_presupuestos():
+    with SessionLocal() as db:
+        actualizados = presupuestos.recalcular_montos(db)
+    logger.debug("Presupuestos recalculados: %s", actualizados)
+
+
+def cerrar_meses():
+    from src.gestion.services import cerrar_meses_vencidos
+
+    with SessionLocal() as db:
+        for anio, mes, cantidad in cerrar_meses_vencidos(db, meses_iniciales=cierres.CIERRE_MESES_INICIALES):
+            logger.info("Mes %04d-%02d cerrado: %s resumen(es)", anio, mes, cantidad)
+
+
+def limpiar_totales():
+    with SessionLocal() as db:
+        borrados = totales.limpiar_vacios(db)
+    if borrados:
+        logger.info("Totales mensuales vacíos borrados: %s", borrados)
+
+
+def _cron(variable: str, expresion: str) -> Cron:
+    try:
+        return Cron(expresion)
+    except ValueError as e:
+        raise ValueError(f"{variable} inválida: {e}") from e
+
+
+def crear_planificador() -> Planificador:
+    """Arma el planificador con los trabajos habilitados; una programación inválida falla acá, al arrancar."""
+    planificador = Planificador(bloqueo=crear_bloqueo(sesiones=SessionLocal))
+    if TASAS_INTERVALO_REFRESCO > 0:
+        planificador.agregar("tasas", refrescar_tasas, Intervalo(TASAS_INTERVALO_REFRESCO), lider=False)
+    if presupuestos.PRESUPUESTOS_INTERVALO_RECALCULO > 0:
+        planificador.agregar(
+            "presupuestos", recalcular_presupuestos, Intervalo(presupuestos.PRESUPUESTOS_INTERVALO_RECALCULO)
+        )
+    if cierres.CIERRE_INTERVALO > 0:
+        planificador.agregar("cierres", cerrar_meses, Intervalo(cierres.CIERRE_INTERVALO))
+    elif cierres.CIERRE_CRON:
+        planificador.agregar("cierres", cerrar_meses, _cron("CIERRE_CRON", cierres.CIERRE_CRON))
+    if LIMPIEZA_CRON:
+        planificador.agregar("limpieza", limpiar_totales, _cron("LIMPIEZA_CRON", LIMPIEZA_CRON))
+    metricas.registro.agregar_exportador(planificador.exportar)
+    return planificador
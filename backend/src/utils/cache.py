@@ -0,0 +1,288 @@
+"""Caches con TTL y etiquetas, con backends intercambiables.
+
+- `CacheTTL`: LRU acotada en memoria, propia de cada proceso.
+- `CacheSQLite`: archivo SQLite (WAL) compartido por los workers de un mismo host.
+- `CacheRedis`: cualquier cliente con la API de redis-py (redis, fakeredis o un
+  reemplazo local en pruebas), compartido entre hosts.
+
+`crear_cache(nombre, ...)` elige el backend según CACHE_BACKEND. El nombre
+separa el espacio de claves de cada cache dentro de un mismo backend compartido.
+Los valores de los backends compartidos se serializan con pickle: el archivo o
+el servidor Redis tienen que ser de confianza.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memoria")  # "memoria", "sqlite" o "redis"
+CACHE_SQLITE_RUTA = os.getenv("CACHE_SQLITE_RUTA", "cache.db")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+
+class Cache(ABC):
+    """Interfaz común: get/set/delete con TTL e invalidación por etiqueta."""
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, clave: Hashable) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, clave: Hashable, valor: Any, ttl: Optional[float] = None, etiquetas: Iterable[str] = ()):
+        ...
+
+    @abstractmethod
+    def delete(self, clave: Hashable):
+        ...
+
+    @abstractmethod
+    def invalidar_etiqueta(self, etiqueta: str):
+        """Elimina todas las entradas guardadas con esa etiqueta."""
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    def _contar(self, valor: Optional[Any]) -> Optional[Any]:
+        if valor is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return valor
+
+
+class CacheTTL(Cache):
+    """Cache LRU acotada en memoria, con vencimiento por TTL. Segura entre hilos."""
+
+    def __init__(self, max_items: int = 1024, ttl: float = 60.0):
+        super().__init__(ttl)
+        self.max_items = max_items
+        self._items: "OrderedDict[Hashable, tuple[float, Any, tuple]]" = OrderedDict()
+        self._etiquetas: "dict[str, set]" = {}
+        self._lock = threading.Lock()
+
+    def _quitar(self, clave: Hashable):
+        _, _, etiquetas = self._items.pop(clave)
+        for etiqueta in etiquetas:
+            claves = self._etiquetas.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._etiquetas[etiqueta]
+
+    def get(self, clave: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(clave)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._quitar(clave)
+                return self._contar(None)
+            self._items.move_to_end(clave)
+            return self._contar(item[1])
+
+    def set(self, clave: Hashable, valor: Any, ttl: Optional[float] = None, etiquetas: Iterable[str] = ()):
+        vence = time.monotonic() + (self.ttl if ttl is None else ttl)
+        etiquetas = tuple(etiquetas)
+        with self._lock:
+            if clave in self._items:
+                self._quitar(clave)
+            self._items[clave] = (vence, valor, etiquetas)
+            for etiqueta in etiquetas:
+                self._etiquetas.setdefault(etiqueta, set()).add(clave)
+            while len(self._items) > self.max_items:
+                self._quitar(next(iter(self._items)))
+
+    def delete(self, clave: Hashable):
+        with self._lock:
+            if clave in self._items:
+                self._quitar(clave)
+
+    def invalidar_etiqueta(self, etiqueta: str):
+        with self._lock:
+            for clave in list(self._etiquetas.get(etiqueta, ())):
+                self._quitar(clave)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._etiquetas.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class CacheSQLite(Cache):
+    """Cache en un archivo SQLite compartido por los procesos del host.
+
+    Cada hilo usa su propia conexión. El límite de entradas se aplica cada
+    `PURGA_CADA` escrituras, descartando primero las vencidas y luego las que
+    vencen antes (aproximación de LRU).
+    """
+
+    PURGA_CADA = 256
+
+    def __init__(self, ruta: str = CACHE_SQLITE_RUTA, nombre: str = "cache", max_items: int = 10000, ttl: float = 60.0):
+        super().__init__(ttl)
+        self.ruta = ruta
+        self.nombre = nombre
+        self.max_items = max_items
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._escrituras = 0
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=5.0, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "espacio TEXT, clave TEXT, valor BLOB, vence REAL, PRIMARY KEY (espacio, clave))"
+            )
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS cache_etiquetas ("
+                "espacio TEXT, etiqueta TEXT, clave TEXT, PRIMARY KEY (espacio, etiqueta, clave))"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS ix_cache_vence ON cache (espacio, vence)")
+            self._local.conexion = conexion
+        return conexion
+
+    def get(self, clave: Hashable) -> Optional[Any]:
+        fila = self._conexion().execute(
+            "SELECT valor, vence FROM cache WHERE espacio = ? AND clave = ?", (self.nombre, repr(clave))
+        ).fetchone()
+        if fila is None or fila[1] < time.time():
+            return self._contar(None)
+        return self._contar(pickle.loads(fila[0]))
+
+    def set(self, clave: Hashable, valor: Any, ttl: Optional[float] = None, etiquetas: Iterable[str] = ()):
+        vence = time.time() + (self.ttl if ttl is None else ttl)
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute(
+                "INSERT OR REPLACE INTO cache (espacio, clave, valor, vence) VALUES (?, ?, ?, ?)",
+                (self.nombre, repr(clave), pickle.dumps(valor), vence),
+            )
+            conexion.executemany(
+                "INSERT OR IGNORE INTO cache_etiquetas (espacio, etiqueta, clave) VALUES (?, ?, ?)",
+                [(self.nombre, etiqueta, repr(clave)) for etiqueta in etiquetas],
+            )
+        with self._lock:
+            self._escrituras += 1
+            purgar = self._escrituras % self.PURGA_CADA == 0
+        if purgar:
+            self.purgar()
+
+    def delete(self, clave: Hashable):
+        self._conexion().execute("DELETE FROM cache WHERE espacio = ? AND clave = ?", (self.nombre, repr(clave)))
+
+    def invalidar_etiqueta(self, etiqueta: str):
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute(
+                "DELETE FROM cache WHERE espacio = ? AND clave IN "
+                "(SELECT clave FROM cache_etiquetas WHERE espacio = ? AND etiqueta = ?)",
+                (self.nombre, self.nombre, etiqueta),
+            )
+            conexion.execute(
+                "DELETE FROM cache_etiquetas WHERE espacio = ? AND etiqueta = ?", (self.nombre, etiqueta)
+            )
+
+    def purgar(self):
+        """Quita vencidas, recorta al máximo de entradas y limpia etiquetas huérfanas."""
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute("DELETE FROM cache WHERE espacio = ? AND vence < ?", (self.nombre, time.time()))
+            conexion.execute(
+                "DELETE FROM cache WHERE espacio = ? AND clave IN "
+                "(SELECT clave FROM cache WHERE espacio = ? ORDER BY vence DESC LIMIT -1 OFFSET ?)",
+                (self.nombre, self.nombre, self.max_items),
+            )
+            conexion.execute(
+                "DELETE FROM cache_etiquetas WHERE espacio = ? AND NOT EXISTS "
+                "(SELECT 1 FROM cache WHERE cache.espacio = cache_etiquetas.espacio AND cache.clave = cache_etiquetas.clave)",
+                (self.nombre,),
+            )
+
+    def clear(self):
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute("DELETE FROM cache WHERE espacio = ?", (self.nombre,))
+            conexion.execute("DELETE FROM cache_etiquetas WHERE espacio = ?", (self.nombre,))
+
+    def __len__(self) -> int:
+        return self._conexion().execute(
+            "SELECT count(*) FROM cache WHERE espacio = ? AND vence >= ?", (self.nombre, time.time())
+        ).fetchone()[0]
+
+
+class CacheRedis(Cache):
+    """Cache sobre el protocolo de Redis. Las etiquetas son sets con las claves que agrupan."""
+
+    def __init__(self, url: str = CACHE_REDIS_URL, nombre: str = "cache", ttl: float = 60.0, cliente=None):
+        super().__init__(ttl)
+        if cliente is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("CACHE_BACKEND=redis requiere el paquete 'redis'") from e
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.nombre = nombre
+
+    def _clave(self, clave: Hashable) -> str:
+        return f"{self.nombre}:{clave!r}"
+
+    def _etiqueta(self, etiqueta: str) -> str:
+        return f"{self.nombre}#{etiqueta}"
+
+    def get(self, clave: Hashable) -> Optional[Any]:
+        valor = self.cliente.get(self._clave(clave))
+        return self._contar(None if valor is None else pickle.loads(valor))
+
+    def set(self, clave: Hashable, valor: Any, ttl: Optional[float] = None, etiquetas: Iterable[str] = ()):
+        px = max(int((self.ttl if ttl is None else ttl) * 1000), 1)
+        self.cliente.set(self._clave(clave), pickle.dumps(valor), px=px)
+        # cada set de etiqueta vence con la última de sus claves: no acumula claves ya vencidas
+        for etiqueta in etiquetas:
+            nombre = self._etiqueta(etiqueta)
+            self.cliente.sadd(nombre, self._clave(clave))
+            if self.cliente.pttl(nombre) < px:
+                self.cliente.pexpire(nombre, px)
+
+    def delete(self, clave: Hashable):
+        self.cliente.delete(self._clave(clave))
+
+    def invalidar_etiqueta(self, etiqueta: str):
+        claves = self.cliente.smembers(self._etiqueta(etiqueta))
+        self.cliente.delete(self._etiqueta(etiqueta), *claves)
+
+    def clear(self):
+        claves = list(self.cliente.scan_iter(match=f"{self.nombre}[:#]*"))
+        if claves:
+            self.cliente.delete(*claves)
+
+
+def crear_cache(nombre: str, max_items: int = 1024, ttl: float = 60.0, backend: Optional[str] = None) -> Cache:
+    """Cache con el backend configurado en CACHE_BACKEND (o el indicado)."""
+    backend = backend or CACHE_BACKEND
+    if backend == "sqlite":
+        return CacheSQLite(CACHE_SQLITE_RUTA, nombre=nombre, max_items=max_items, ttl=ttl)
+    if backend == "redis":
+        return CacheRedis(CACHE_REDIS_URL, nombre=nombre, ttl=ttl)
+    return CacheTTL(max_items=max_items, ttl=ttl)
@@ -0,0 +1,106 @@
+"""Montos de dinero: tipo de columna configurable y conversión exacta entre monedas.
+
+DINERO_MODO elige cómo se guardan los montos:
+    float     columnas Float y valores float (comportamiento original, por defecto)
+    centavos  columnas enteras en unidades menores; en Python se ven como Decimal
+              con dos decimales, así las sumas en SQL y en Python son exactas
+
+Para pasar una base existente de un modo al otro: python -m src.gestion.migrar_dinero
+"""
+import os
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Dict, Iterable, Sequence, Tuple, Union
+
+from sqlalchemy import BigInteger, Float
+from sqlalchemy.types import TypeDecorator
+
+DINERO_MODO = os.getenv("DINERO_MODO", "float")
+MODOS = ("float", "centavos")
+
+CENTAVO = Decimal("0.01")
+Monto = Union[float, int, str, Decimal]
+
+
+def a_decimal(valor: Monto) -> Decimal:
+    """Decimal redondeado al centavo (mitad al par). Los float se toman por su repr: 0.1 -> 0.10."""
+    if isinstance(valor, float):
+        valor = repr(valor)
+    return Decimal(valor).quantize(CENTAVO, rounding=ROUND_HALF_EVEN)
+
+
+def a_centavos(valor: Monto) -> int:
+    if isinstance(valor, float):
+        # atajo para los montos con hasta dos decimales; los casos de medio centavo
+        # pasan por Decimal para redondear igual que a_decimal
+        centavos = valor * 100
+        redondeado = round(centavos)
+        if abs(centavos - redondeado) < 0.25:
+            return redondeado
+    if isinstance(valor, int):
+        return valor * 100
+    return int(a_decimal(valor) * 100)
+
+
+def desde_centavos(centavos: Union[int, float]) -> Decimal:
+    # SQLite puede devolver un REAL si la columna se declaró Float antes de migrar
+    return Decimal(int(round(centavos))) / 100
+
+
+def normalizar(valor: Monto, modo: str = None) -> Union[float, Decimal]:
+    """El monto en el tipo Python del modo activo (float o Decimal)."""
+    if (modo or DINERO_MODO) == "centavos":
+        return a_decimal(valor)
+    return float(valor)
+
+
+CERO = normalizar(0)
+
+
+class Dinero(TypeDecorator):
+    """Columna de monto: Float en modo float, BigInteger de centavos en modo centavos."""
+
+    impl = Float
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(BigInteger() if DINERO_MODO == "centavos" else Float())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or DINERO_MODO != "centavos":
+            return value
+        return a_centavos(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or DINERO_MODO != "centavos":
+            return value
+        return desde_centavos(value)
+
+
+def convertir(pares: Iterable[Tuple[str, Monto]], tasas: Dict[str, float], destino: str = "ARS") -> Decimal:
+    """Suma montos en distintas monedas, expresada en `destino`.
+
+    Recibe pares (código de moneda, monto): una fila por movimiento o una fila
+    ya agrupada por moneda. Primero acumula cada moneda en centavos enteros (sin
+    error de redondeo) y después convierte una sola vez por moneda, redondeando
+    al centavo con mitad al par. Las tasas son relativas a una base común (USD).
+    """
+    por_moneda: Dict[str, int] = {}
+    for codigo, monto in pares:
+        por_moneda[codigo] = por_moneda.get(codigo, 0) + a_centavos(monto)
+
+    total = Decimal(0)
+    for codigo, centavos in por_moneda.items():
+        if codigo == destino:
+            total += Decimal(centavos) / 100
+            continue
+        tasa, tasa_destino = tasas.get(codigo), tasas.get(destino)
+        if not tasa or not tasa_destino:
+            raise KeyError(f"Tasa de cambio no encontrada para {codigo if not tasa else destino}")
+        convertido = Decimal(centavos) * Decimal(str(tasa_destino)) / (Decimal(str(tasa)) * 100)
+        total += convertido.quantize(CENTAVO, rounding=ROUND_HALF_EVEN)
+    return total.quantize(CENTAVO)
+
+
+def convertir_columnas(montos: Sequence[Monto], codigos: Sequence[str], tasas: Dict[str, float], destino: str = "ARS") -> Decimal:
+    """Igual que `convertir`, con montos y monedas en columnas paralelas."""
+    return convertir(zip(codigos, montos), tasas, destino)
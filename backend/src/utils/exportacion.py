@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence
+
+TAMANIO_BLOQUE = 64 * 1024  # bytes acumulados antes de enviar un bloque al cliente
+
+TIPOS_CONTENIDO = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _valor_json(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):  # montos en modo centavos: tienen dos decimales exactos
+        return float(valor)
+    return valor
+
+
+def _codificar(filas: Iterable[Sequence], columnas: Sequence[str], formato: str) -> Iterator[str]:
+    if formato == "csv":
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(columnas)
+        for fila in filas:
+            escritor.writerow(fila)
+            if buffer.tell() >= TAMANIO_BLOQUE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        partes, tamanio = [], 0
+        for fila in filas:
+            linea = json.dumps({c: _valor_json(v) for c, v in zip(columnas, fila)}) + "\n"
+            partes.append(linea)
+            tamanio += len(linea)
+            if tamanio >= TAMANIO_BLOQUE:
+                yield "".join(partes)
+                partes, tamanio = [], 0
+        yield "".join(partes)
+
+
+def serializar(filas: Iterable[Sequence], columnas: Sequence[str], formato: str, comprimir: bool = False) -> Iterator[bytes]:
+    """Convierte un iterable de filas en bloques de bytes CSV/NDJSON, opcionalmente en gzip.
+
+    Nunca mantiene en memoria más de un bloque, así que sirve para exportaciones de cualquier tamaño.
+    """
+    compresor = zlib.compressobj(wbits=31) if comprimir else None  # wbits=31: formato gzip
+    for texto in _codificar(filas, columnas, formato):
+        datos = texto.encode()
+        if compresor:
+            datos = compresor.compress(datos)
+        if datos:
+            yield datos
+    if compresor:
+        yield compresor.flush()
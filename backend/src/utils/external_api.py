@@ -1,11 +1,16 @@
-import requests
+import os
+
+TASAS_API_URL = os.getenv("TASAS_API_URL", "https://api.exchangerate-api.com/v4/latest/USD")
+TASAS_API_TIMEOUT = float(os.getenv("TASAS_API_TIMEOUT", "5"))
+
+def obtener_tasas_cambio(url: str = TASAS_API_URL, timeout: float = TASAS_API_TIMEOUT) -> dict:
+    # Ejemplo de una API para obtener tasas de cambio (base USD)
+    import requests  # se importa al primer uso: pesa en el arranque y con TASAS_BACKEND=archivo no se usa
+
+    response = requests.get(url, timeout=timeout)
 
-def obtener_tasas_cambio() -> dict:
-    url = "https://api.exchangerate-api.com/v4/latest/USD"  # Ejemplo de una API para obtener tasas de cambio
-    response = requests.get(url)
-    
     if response.status_code == 200:
         data = response.json()
         return data.get("rates", {})
     else:
-        raise Exception("Error al obtener las tasas de cambio de la API.")
\ No newline at end of file
+        raise Exception("Error al obtener las tasas de cambio de la API.")
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+def rango_mes(mes: int, anio: int) -> Tuple[datetime, datetime]:
+    """Devuelve el rango semiabierto [inicio, fin) del mes indicado.
+
+    Filtrar con `fecha >= inicio AND fecha < fin` permite usar los índices
+    sobre `fecha`, a diferencia de `extract("month", fecha) == mes`.
+    """
+    inicio = datetime(anio, mes, 1)
+    if mes == 12:
+        fin = datetime(anio + 1, 1, 1)
+    else:
+        fin = datetime(anio, mes + 1, 1)
+    return inicio, fin
+
+
+def meses_en_rango(desde: datetime, hasta: datetime, maximo: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Lista de (anio, mes) que tocan el rango semiabierto [desde, hasta).
+
+    Con `maximo`, ValueError si el rango toca más meses (sin generar el resto).
+    """
+    meses = []
+    anio, mes = desde.year, desde.month
+    while datetime(anio, mes, 1) < hasta:
+        if maximo is not None and len(meses) >= maximo:
+            raise ValueError(f"El rango toca más de {maximo} meses.")
+        meses.append((anio, mes))
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return meses
@@ -0,0 +1,74 @@
+import codecs
+import csv
+import json
+from typing import Iterable, Iterator, Tuple, Union
+
+FORMATOS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+class FormatoInvalido(ValueError):
+    pass
+
+
+def detectar_formato(content_type: str) -> str:
+    tipo = (content_type or "application/json").split(";")[0].strip().lower()
+    if tipo not in FORMATOS:
+        raise FormatoInvalido(f"Formato no soportado: {tipo}")
+    return FORMATOS[tipo]
+
+
+def _lineas(bloques: Iterable[bytes]) -> Iterator[str]:
+    """Decodifica los bloques a medida que llegan y los corta en líneas (con el salto)."""
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    try:
+        for bloque in bloques:
+            pendiente += decodificador.decode(bloque)
+            *completas, pendiente = pendiente.split("\n")
+            for linea in completas:
+                yield linea + "\n"
+        pendiente += decodificador.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise FormatoInvalido(f"El contenido no es UTF-8: {e}") from e
+    if pendiente:
+        yield pendiente
+
+
+def leer_filas(contenido: Union[bytes, Iterable[bytes]], formato: str) -> Iterator[Tuple[int, object]]:
+    """Genera (número de fila, datos) a partir del cuerpo recibido.
+
+    `contenido` puede ser el cuerpo entero o los bloques del stream: NDJSON y
+    CSV se leen línea por línea sin juntar todo en memoria; un arreglo JSON
+    necesita el documento completo. Las filas que no se pueden decodificar se
+    devuelven como excepción para que quien llama las reporte sin abortar el
+    resto de la importación.
+    """
+    if isinstance(contenido, bytes):
+        contenido = (contenido,)
+    lineas = _lineas(contenido)
+    if formato == "json":
+        try:
+            datos = json.loads("".join(lineas))
+        except ValueError as e:
+            raise FormatoInvalido(f"JSON inválido: {e}") from e
+        if not isinstance(datos, list):
+            raise FormatoInvalido("Se esperaba un arreglo JSON.")
+        yield from enumerate(datos, start=1)
+    elif formato == "ndjson":
+        for numero, linea in enumerate(lineas, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield numero, json.loads(linea)
+            except ValueError as e:
+                yield numero, e
+    elif formato == "csv":
+        # la fila 1 es el encabezado
+        for numero, fila in enumerate(csv.DictReader(lineas), start=2):
+            yield numero, {k: (v if v != "" else None) for k, v in fila.items()}
@@ -0,0 +1,279 @@
+"""Métricas de requests: latencia por ruta, consultas y tiempo de base por request.
+
+- `MiddlewareMetricas` (ASGI) mide cada request y lo registra por método, plantilla
+  de ruta y estado; opcionalmente agrega el encabezado `Server-Timing`.
+- Los eventos `before_cursor_execute`/`after_cursor_execute` de cualquier Engine
+  (sync o el sync_engine de uno async) suman consultas y tiempo de base al
+  request en curso, que viaja en una ContextVar hasta el threadpool.
+- `registro.exportar()` devuelve todo en formato de texto de Prometheus, más las
+  líneas de los exportadores agregados con `registro.agregar_exportador`.
+
+Detector de consultas (opt-in, para desarrollo y tests) con CONSULTAS_DETECTOR:
+    off    no hace nada (por defecto)
+    log    loguea un warning por request
+    error  levanta ConsultasExcedidas al terminar el request (TestClient la propaga)
+Se avisa cuando una misma forma de sentencia se repite CONSULTAS_REPETICIONES_MAX
+veces o más en un request (patrón N+1), o cuando el endpoint supera el límite
+declarado con `@limite_consultas(n)`.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+METRICAS_SERVER_TIMING = os.getenv("METRICAS_SERVER_TIMING", "true").lower() == "true"
+CONSULTAS_DETECTOR = os.getenv("CONSULTAS_DETECTOR", "off")  # "off", "log" o "error"
+CONSULTAS_REPETICIONES_MAX = int(os.getenv("CONSULTAS_REPETICIONES_MAX", "5"))
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma de buckets fijos al estilo Prometheus (no acumulativo internamente)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        self.cuentas = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.cuentas[bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre: str, etiquetas: str) -> List[str]:
+        lineas = []
+        acumulado = 0
+        for limite, cuenta in zip((*self.buckets, "+Inf"), self.cuentas):
+            acumulado += cuenta
+            lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+        lineas.append(f"{nombre}_sum{{{etiquetas}}} {self.suma}")
+        lineas.append(f"{nombre}_count{{{etiquetas}}} {self.total}")
+        return lineas
+
+
+def _etiquetas(**valores) -> str:
+    def escapar(valor) -> str:
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{clave}="{escapar(valor)}"' for clave, valor in valores.items())
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencia: Dict[Tuple[str, str, int], Histograma] = {}
+        self.tiempo_db: Dict[Tuple[str, str], Histograma] = {}
+        self.consultas_por_ruta: Dict[Tuple[str, str], int] = {}
+        self.consultas_total = 0
+        self.tiempo_db_total = 0.0
+        self._exportadores: List[Callable[[], List[str]]] = []
+
+    def agregar_exportador(self, funcion: Callable[[], List[str]]):
+        """Suma a `exportar()` las líneas de otro componente (ej. el planificador de tareas)."""
+        if funcion not in self._exportadores:
+            self._exportadores.append(funcion)
+
+    def quitar_exportador(self, funcion: Callable[[], List[str]]):
+        if funcion in self._exportadores:
+            self._exportadores.remove(funcion)
+
+    def registrar_consulta(self, duracion: float):
+        with self._lock:
+            self.consultas_total += 1
+            self.tiempo_db_total += duracion
+
+    def registrar_request(self, metodo: str, ruta: str, estado: int, duracion: float, consultas: int, tiempo_db: float):
+        with self._lock:
+            self.latencia.setdefault((metodo, ruta, estado), Histograma()).observar(duracion)
+            self.tiempo_db.setdefault((metodo, ruta), Histograma()).observar(tiempo_db)
+            self.consultas_por_ruta[(metodo, ruta)] = self.consultas_por_ruta.get((metodo, ruta), 0) + consultas
+
+    def exportar(self) -> str:
+        lineas = [
+            "# HELP http_solicitud_duracion_segundos Latencia de los requests por ruta.",
+            "# TYPE http_solicitud_duracion_segundos histogram",
+        ]
+        with self._lock:
+            for (metodo, ruta, estado), histograma in sorted(self.latencia.items()):
+                lineas += histograma.lineas(
+                    "http_solicitud_duracion_segundos", _etiquetas(metodo=metodo, ruta=ruta, estado=estado)
+                )
+            lineas += [
+                "# HELP http_solicitud_db_segundos Tiempo en la base de datos por request.",
+                "# TYPE http_solicitud_db_segundos histogram",
+            ]
+            for (metodo, ruta), histograma in sorted(self.tiempo_db.items()):
+                lineas += histograma.lineas("http_solicitud_db_segundos", _etiquetas(metodo=metodo, ruta=ruta))
+            lineas += [
+                "# HELP http_solicitud_consultas_db_total Consultas SQL ejecutadas por ruta.",
+                "# TYPE http_solicitud_consultas_db_total counter",
+            ]
+            for (metodo, ruta), cantidad in sorted(self.consultas_por_ruta.items()):
+                lineas.append(f"http_solicitud_consultas_db_total{{{_etiquetas(metodo=metodo, ruta=ruta)}}} {cantidad}")
+            lineas += [
+                "# HELP db_consultas_total Consultas SQL ejecutadas (incluye tareas fuera de requests).",
+                "# TYPE db_consultas_total counter",
+                f"db_consultas_total {self.consultas_total}",
+                "# HELP db_consultas_segundos_total Tiempo acumulado en consultas SQL.",
+                "# TYPE db_consultas_segundos_total counter",
+                f"db_consultas_segundos_total {self.tiempo_db_total}",
+            ]
+        for exportador in list(self._exportadores):
+            lineas += exportador()
+        return "\n".join(lineas) + "\n"
+
+
+registro = RegistroMetricas()
+
+
+class ConsultasExcedidas(Exception):
+    """Un request superó su límite de consultas o repitió la misma sentencia (N+1)."""
+
+
+_ESPACIOS = re.compile(r"\s+")
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=2048)
+def huella(sentencia: str) -> str:
+    """Forma de la sentencia: sin literales ni largos de listas IN, para agrupar repeticiones."""
+    forma = _LITERALES.sub("?", _ESPACIOS.sub(" ", sentencia).strip())
+    return _LISTAS.sub("(?, ...)", forma)
+
+
+class MedicionRequest:
+    __slots__ = ("consultas", "tiempo_db", "huellas")
+
+    def __init__(self, con_huellas: bool = False):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.huellas: Optional[Counter] = Counter() if con_huellas else None
+
+    def repetidas(self, minimo: int = CONSULTAS_REPETICIONES_MAX) -> List[Tuple[str, int]]:
+        if self.huellas is None:
+            return []
+        return [(forma, veces) for forma, veces in self.huellas.most_common() if veces >= minimo]
+
+
+_medicion_actual: ContextVar[Optional[MedicionRequest]] = ContextVar("medicion_request", default=None)
+
+
+def medicion_actual() -> Optional[MedicionRequest]:
+    return _medicion_actual.get()
+
+
+@contextmanager
+def medir_consultas() -> Iterator[MedicionRequest]:
+    """Cuenta las consultas (con huellas) ejecutadas dentro del bloque, para tests y benchmarks."""
+    medicion = MedicionRequest(con_huellas=True)
+    token = _medicion_actual.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion_actual.reset(token)
+
+
+def limite_consultas(maximo: int):
+    """Declara cuántas consultas SQL puede hacer un endpoint (lo verifica el detector)."""
+
+    def decorar(funcion):
+        funcion.limite_consultas = maximo
+        return funcion
+
+    return decorar
+
+
+def revisar_consultas(metodo: str, ruta: str, endpoint, medicion: MedicionRequest, modo: str = CONSULTAS_DETECTOR):
+    problemas = []
+    limite = getattr(endpoint, "limite_consultas", None)
+    if limite is not None and medicion.consultas > limite:
+        problemas.append(f"{medicion.consultas} consultas con un límite de {limite}")
+    for forma, veces in medicion.repetidas():
+        problemas.append(f"posible N+1, {veces} veces: {forma[:200]}")
+    if not problemas:
+        return
+    mensaje = f"{metodo} {ruta}: " + "; ".join(problemas)
+    if modo == "error":
+        raise ConsultasExcedidas(mensaje)
+    logger.warning(mensaje)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metricas_inicio"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info.pop("metricas_inicio", None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    registro.registrar_consulta(duracion)
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.consultas += 1
+        medicion.tiempo_db += duracion
+        if medicion.huellas is not None and not executemany:
+            medicion.huellas[huella(statement)] += 1
+
+
+class MiddlewareMetricas:
+    """Mide cada request HTTP y lo registra bajo la plantilla de su ruta (ej. /gastos/{id_usuario})."""
+
+    def __init__(self, app, server_timing: bool = METRICAS_SERVER_TIMING, detector: str = CONSULTAS_DETECTOR):
+        self.app = app
+        self.server_timing = server_timing
+        self.detector = detector
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = MedicionRequest(con_huellas=self.detector != "off")
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        estado = 500
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+                if self.server_timing:
+                    # en respuestas en streaming mide hasta el envío de los encabezados
+                    total_ms = (time.perf_counter() - inicio) * 1000
+                    MutableHeaders(scope=mensaje).append(
+                        "Server-Timing",
+                        f'db;dur={medicion.tiempo_db * 1000:.2f};desc="{medicion.consultas} consultas", '
+                        f"app;dur={total_ms:.2f}",
+                    )
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicion_actual.reset(token)
+            ruta = getattr(scope.get("route"), "path", None) or "sin_ruta"
+            registro.registrar_request(
+                scope["method"], ruta, estado, time.perf_counter() - inicio, medicion.consultas, medicion.tiempo_db
+            )
+
+        if self.detector != "off":
+            revisar_consultas(scope["method"], ruta, scope.get("endpoint"), medicion, self.detector)
@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import tuple_
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(fecha: datetime, id_registro: int) -> str:
+    crudo = json.dumps([fecha.isoformat(), id_registro]).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        fecha, id_registro = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return datetime.fromisoformat(fecha), int(id_registro)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(str(e)) from e
+
+
+def paginar(query, columna_fecha, columna_id, cursor: Optional[str], limit: int):
+    """Paginación por keyset sobre (fecha, id), de más reciente a más antiguo.
+
+    Devuelve (items, next_cursor); next_cursor es None en la última página.
+    """
+    if cursor:
+        fecha, id_registro = decodificar_cursor(cursor)
+        query = query.filter(tuple_(columna_fecha, columna_id) < tuple_(fecha, id_registro))
+    # se pide un registro extra para saber si hay otra página
+    items = query.order_by(columna_fecha.desc(), columna_id.desc()).limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    ultimo = items[-1]
+    return items, codificar_cursor(
+        getattr(ultimo, columna_fecha.key), getattr(ultimo, columna_id.key)
+    )
@@ -0,0 +1,377 @@
+"""Planificador de tareas en proceso, para el lifespan de la app.
+
+- Cada trabajo corre con un `Intervalo` (segundos) o un `Cron` ("m h dom mes dow").
+- Las funciones sync corren en un pool de hilos propio; las async en el loop.
+- Una ejecución no se solapa con la anterior del mismo trabajo: si sigue en
+  curso, la siguiente se saltea.
+- Los trabajos con `lider=True` corren sólo en el proceso que tiene el bloqueo
+  de líder, así varios workers de uvicorn no repiten el mismo trabajo. El
+  bloqueo se renueva periódicamente; si el líder muere, otro lo toma al vencer.
+- Las ejecuciones se miden (cantidad, errores, duración) y se exportan junto
+  con las métricas de `src.utils.metricas`.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from src.utils.metricas import Histograma, _etiquetas
+
+logger = logging.getLogger(__name__)
+
+PLANIFICADOR_WORKERS = int(os.getenv("PLANIFICADOR_WORKERS", "2"))
+PLANIFICADOR_BLOQUEO = os.getenv("PLANIFICADOR_BLOQUEO", "base")  # "base", "archivo" o "ninguno"
+PLANIFICADOR_BLOQUEO_TTL = float(os.getenv("PLANIFICADOR_BLOQUEO_TTL", "30"))
+PLANIFICADOR_BLOQUEO_ARCHIVO = os.getenv("PLANIFICADOR_BLOQUEO_ARCHIVO", "planificador.lock")
+
+BUCKETS_TRABAJOS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+class Intervalo:
+    def __init__(self, segundos: float, inmediato: bool = True):
+        self.segundos = segundos
+        self.inmediato = inmediato
+
+    def siguiente(self, desde: datetime, primera: bool = False) -> datetime:
+        if primera and self.inmediato:
+            return desde
+        return desde + timedelta(seconds=self.segundos)
+
+    def __str__(self) -> str:
+        return f"cada {self.segundos:g}s"
+
+
+class Cron:
+    """Expresión cron de cinco campos: minuto, hora, día del mes, mes y día de la semana (0 = domingo).
+
+    Admite `*`, valores, rangos `a-b`, pasos `*/n` o `a-b/n` y listas separadas por comas.
+    """
+
+    _LIMITES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expresion: str):
+        self.expresion = expresion
+        campos = expresion.split()
+        if len(campos) != 5:
+            raise ValueError(f"Expresión cron inválida (se esperan 5 campos): {expresion!r}")
+        conjuntos = [self._parsear(campo, minimo, maximo) for campo, (minimo, maximo) in zip(campos, self._LIMITES)]
+        self.minutos, self.horas, self.dias, self.meses, dias_semana = conjuntos
+        self.dias_semana = {d % 7 for d in dias_semana}
+        self._dia_libre = campos[2] == "*"
+        self._semana_libre = campos[4] == "*"
+
+    @staticmethod
+    def _parsear(campo: str, minimo: int, maximo: int) -> Set[int]:
+        valores = set()
+        for parte in campo.split(","):
+            rango, _, paso = parte.partition("/")
+            if rango == "*":
+                desde, hasta = minimo, maximo
+            elif "-" in rango:
+                desde, hasta = (int(v) for v in rango.split("-"))
+            else:
+                desde = hasta = int(rango)
+                if paso:
+                    hasta = maximo
+            if not minimo <= desde <= hasta <= maximo:
+                raise ValueError(f"Valor fuera de rango en el campo cron {campo!r}")
+            valores.update(range(desde, hasta + 1, int(paso) if paso else 1))
+        return valores
+
+    def _dia_coincide(self, fecha: datetime) -> bool:
+        en_mes = fecha.day in self.dias
+        en_semana = (fecha.weekday() + 1) % 7 in self.dias_semana
+        if self._dia_libre or self._semana_libre:
+            return en_mes and en_semana
+        return en_mes or en_semana  # como cron: si ambos están restringidos alcanza con uno
+
+    def siguiente(self, desde: datetime, primera: bool = False) -> datetime:
+        """Primer minuto que cumple la expresión, estrictamente posterior a `desde`."""
+        inicio = desde.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        dia = inicio.replace(hour=0, minute=0)
+        for _ in range(366 * 5):
+            if dia.month in self.meses and self._dia_coincide(dia):
+                for hora in sorted(self.horas):
+                    for minuto in sorted(self.minutos):
+                        candidato = dia.replace(hour=hora, minute=minuto)
+                        if candidato >= inicio:
+                            return candidato
+            dia += timedelta(days=1)
+        raise ValueError(f"La expresión cron {self.expresion!r} nunca se cumple")
+
+    def __str__(self) -> str:
+        return f"cron {self.expresion}"
+
+
+class Trabajo:
+    def __init__(self, nombre: str, funcion: Callable, programacion, lider: bool = True):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.programacion = programacion
+        self.lider = lider
+        self.en_curso = False
+        self.proxima: Optional[datetime] = None
+        self.ejecuciones = 0
+        self.errores = 0
+        self.salteadas = 0
+        self.ultima_duracion: Optional[float] = None
+        self.ultimo_inicio: Optional[datetime] = None
+        self.ultimo_error: Optional[str] = None
+        self.duracion = Histograma(BUCKETS_TRABAJOS)
+
+
+class SinBloqueo:
+    """Cada proceso es líder: para un solo worker o para pruebas."""
+
+    def adquirir(self) -> bool:
+        return True
+
+    def liberar(self):
+        pass
+
+
+class BloqueoArchivo:
+    """Líder = el proceso que tiene el flock del archivo. Sirve para los workers de un mismo host."""
+
+    def __init__(self, ruta: str = PLANIFICADOR_BLOQUEO_ARCHIVO):
+        self.ruta = ruta
+        self._archivo = None
+
+    def adquirir(self) -> bool:
+        import fcntl
+
+        if self._archivo is not None:
+            return True
+        archivo = open(self.ruta, "a+")
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return False
+        self._archivo = archivo
+        return True
+
+    def liberar(self):
+        if self._archivo is not None:
+            self._archivo.close()  # cerrar el archivo suelta el flock
+            self._archivo = None
+
+
+class BloqueoBase:
+    """Líder = dueño de una fila con vencimiento (lease) en la tabla `bloqueos` de la base.
+
+    Funciona entre hosts. El dueño la renueva antes de que venza; si deja de
+    hacerlo, cualquier otro proceso la toma después de `ttl` segundos.
+    """
+
+    def __init__(self, sesiones, nombre: str = "planificador", ttl: float = PLANIFICADOR_BLOQUEO_TTL):
+        self.sesiones = sesiones
+        self.nombre = nombre
+        self.ttl = ttl
+        self.duenio = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def adquirir(self) -> bool:
+        from sqlalchemy import or_, update
+        from sqlalchemy.exc import IntegrityError
+        from src.models import Bloqueo
+
+        ahora = time.time()
+        with self.sesiones() as db:
+            resultado = db.execute(
+                update(Bloqueo)
+                .where(Bloqueo.nombre == self.nombre, or_(Bloqueo.duenio == self.duenio, Bloqueo.vence < ahora))
+                .values(duenio=self.duenio, vence=ahora + self.ttl)
+            )
+            if resultado.rowcount:
+                db.commit()
+                return True
+            if db.get(Bloqueo, self.nombre) is not None:
+                db.rollback()
+                return False
+            try:
+                db.add(Bloqueo(nombre=self.nombre, duenio=self.duenio, vence=ahora + self.ttl))
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()  # otro proceso la creó primero
+                return False
+
+    def liberar(self):
+        from sqlalchemy import update
+        from src.models import Bloqueo
+
+        with self.sesiones() as db:
+            db.execute(
+                update(Bloqueo)
+                .where(Bloqueo.nombre == self.nombre, Bloqueo.duenio == self.duenio)
+                .values(vence=0.0)
+            )
+            db.commit()
+
+
+class Planificador:
+    def __init__(self, bloqueo=None, workers: int = PLANIFICADOR_WORKERS):
+        self.bloqueo = bloqueo or SinBloqueo()
+        self.workers = workers
+        self.trabajos: Dict[str, Trabajo] = {}
+        self.es_lider = False
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._tareas: List[asyncio.Task] = []
+        self._ejecuciones: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def agregar(self, nombre: str, funcion: Callable, programacion, lider: bool = True) -> Trabajo:
+        """Registra el trabajo. Una programación que no puede calcular su próximo turno
+        (por ejemplo un cron que nunca se cumple) falla acá, al arrancar, y no dentro de la tarea."""
+        try:
+            programacion.siguiente(datetime.now(), primera=True)
+        except ValueError as e:
+            raise ValueError(f"Trabajo {nombre} ({programacion}): {e}") from e
+        trabajo = Trabajo(nombre, funcion, programacion, lider)
+        self.trabajos[nombre] = trabajo
+        return trabajo
+
+    async def iniciar(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="planificador")
+        if any(t.lider for t in self.trabajos.values()):
+            await self._renovar_liderazgo()
+            self._tareas.append(asyncio.create_task(self._mantener_liderazgo()))
+        for trabajo in self.trabajos.values():
+            self._tareas.append(asyncio.create_task(self._programar(trabajo)))
+
+    async def detener(self):
+        tareas = self._tareas + list(self._ejecuciones)
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        self._tareas.clear()
+        if self.es_lider:
+            try:
+                await asyncio.get_running_loop().run_in_executor(self._pool, self.bloqueo.liberar)
+            except Exception as e:
+                logger.warning("No se pudo liberar el bloqueo del planificador: %s", e)
+            self.es_lider = False
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _renovar_liderazgo(self):
+        try:
+            lider = await asyncio.get_running_loop().run_in_executor(self._pool, self.bloqueo.adquirir)
+        except Exception as e:
+            logger.warning("No se pudo renovar el bloqueo del planificador: %s", e)
+            lider = False
+        if lider != self.es_lider:
+            logger.info("Planificador: %s líder", "ahora es" if lider else "deja de ser")
+        self.es_lider = lider
+
+    async def _mantener_liderazgo(self):
+        intervalo = getattr(self.bloqueo, "ttl", PLANIFICADOR_BLOQUEO_TTL) / 3
+        while True:
+            await asyncio.sleep(intervalo)
+            await self._renovar_liderazgo()
+
+    async def _programar(self, trabajo: Trabajo):
+        trabajo.proxima = trabajo.programacion.siguiente(datetime.now(), primera=True)
+        while True:
+            # asyncio.sleep usa el reloj monotónico: puede despertar antes según el reloj de pared
+            espera = (trabajo.proxima - datetime.now()).total_seconds()
+            while espera > 0:
+                await asyncio.sleep(espera)
+                espera = (trabajo.proxima - datetime.now()).total_seconds()
+            # el siguiente turno es posterior al que toca ahora (nunca se repite) y
+            # posterior a ahora (si el loop se atrasó, los turnos perdidos no se recuperan)
+            turno = trabajo.proxima
+            trabajo.proxima = trabajo.programacion.siguiente(max(turno, datetime.now()))
+            if trabajo.en_curso or (trabajo.lider and not self.es_lider):
+                trabajo.salteadas += 1
+                continue
+            # no se espera al trabajo: el próximo turno se calcula aunque siga corriendo
+            tarea = asyncio.create_task(self.ejecutar(trabajo))
+            self._ejecuciones.add(tarea)
+            tarea.add_done_callback(self._ejecuciones.discard)
+
+    async def ejecutar(self, trabajo: Trabajo):
+        trabajo.en_curso = True
+        trabajo.ultimo_inicio = datetime.now()
+        inicio = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(trabajo.funcion):
+                await trabajo.funcion()
+            else:
+                await asyncio.get_running_loop().run_in_executor(self._pool, trabajo.funcion)
+        except Exception as e:
+            trabajo.errores += 1
+            trabajo.ultimo_error = str(e)
+            logger.warning("Falló el trabajo %s: %s", trabajo.nombre, e)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock:
+                trabajo.ejecuciones += 1
+                trabajo.ultima_duracion = duracion
+                trabajo.duracion.observar(duracion)
+            trabajo.en_curso = False
+
+    def estado(self) -> dict:
+        return {
+            "lider": self.es_lider,
+            "bloqueo": type(self.bloqueo).__name__,
+            "trabajos": {
+                t.nombre: {
+                    "programacion": str(t.programacion),
+                    "solo_lider": t.lider,
+                    "en_curso": t.en_curso,
+                    "proxima": t.proxima,
+                    "ejecuciones": t.ejecuciones,
+                    "errores": t.errores,
+                    "salteadas": t.salteadas,
+                    "ultimo_inicio": t.ultimo_inicio,
+                    "ultima_duracion": t.ultima_duracion,
+                    "ultimo_error": t.ultimo_error,
+                }
+                for t in self.trabajos.values()
+            },
+        }
+
+    def exportar(self) -> List[str]:
+        """Líneas en formato Prometheus para agregar a /metrics."""
+        lineas = [
+            "# HELP planificador_lider 1 si este proceso tiene el bloqueo de líder.",
+            "# TYPE planificador_lider gauge",
+            f"planificador_lider {int(self.es_lider)}",
+            "# HELP planificador_trabajo_duracion_segundos Duración de las ejecuciones de cada trabajo.",
+            "# TYPE planificador_trabajo_duracion_segundos histogram",
+        ]
+        with self._lock:
+            for trabajo in self.trabajos.values():
+                lineas += trabajo.duracion.lineas("planificador_trabajo_duracion_segundos", _etiquetas(trabajo=trabajo.nombre))
+            for metrica, ayuda in (
+                ("errores", "Ejecuciones que terminaron con error."),
+                ("salteadas", "Turnos salteados por no ser líder o por seguir en curso."),
+            ):
+                lineas += [
+                    f"# HELP planificador_trabajo_{metrica}_total {ayuda}",
+                    f"# TYPE planificador_trabajo_{metrica}_total counter",
+                ]
+                for trabajo in self.trabajos.values():
+                    lineas.append(
+                        f"planificador_trabajo_{metrica}_total{{{_etiquetas(trabajo=trabajo.nombre)}}} {getattr(trabajo, metrica)}"
+                    )
+        return lineas
+
+
+def crear_bloqueo(tipo: str = PLANIFICADOR_BLOQUEO, sesiones=None):
+    if tipo == "archivo":
+        return BloqueoArchivo()
+    if tipo == "base":
+        if sesiones is None:
+            from src.database import SessionLocal as sesiones
+        return BloqueoBase(sesiones)
+    return SinBloqueo()
@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Protocol
+
+from src.utils.cache import Cache, crear_cache
+from src.utils.external_api import obtener_tasas_cambio
+
+logger = logging.getLogger(__name__)
+
+TASAS_BACKEND = os.getenv("TASAS_BACKEND", "http")  # "http" o "archivo"
+TASAS_ARCHIVO = os.getenv("TASAS_ARCHIVO", "tasas_cambio.json")
+TASAS_SNAPSHOT = os.getenv("TASAS_SNAPSHOT", "tasas_cambio_snapshot.json")
+TASAS_TTL = float(os.getenv("TASAS_TTL", "3600"))  # segundos en que las tasas se consideran frescas
+TASAS_MAX_STALE = float(os.getenv("TASAS_MAX_STALE", "86400"))  # segundos que se sirven tasas vencidas
+TASAS_INTERVALO_REFRESCO = float(os.getenv("TASAS_INTERVALO_REFRESCO", "1800"))
+
+
+class TasasNoDisponibles(Exception):
+    """No hay tasas en cache, ni snapshot, y el backend no respondió."""
+
+
+class BackendTasas(Protocol):
+    def obtener(self) -> dict: ...
+
+
+class BackendHTTP:
+    """Obtiene las tasas desde la API externa (base USD)."""
+
+    def obtener(self) -> dict:
+        return obtener_tasas_cambio()
+
+
+class BackendArchivo:
+    """Lee las tasas de un archivo JSON local: {"rates": {...}} o directamente {...}."""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+
+    def obtener(self) -> dict:
+        with open(self.ruta, encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("rates", data)
+
+
+class ProveedorTasas:
+    """Cache en memoria con TTL para las tasas de cambio.
+
+    - Dentro del TTL se sirven las tasas cacheadas sin tocar el backend.
+    - Vencido el TTL (pero dentro de max_stale) se sirven las tasas viejas y se
+      dispara un refresco en segundo plano (stale-while-revalidate).
+    - La última respuesta buena se persiste en disco y se usa al arrancar.
+    - Con una cache compartida, antes de ir al backend se adoptan las tasas que
+      haya obtenido otro worker, así cada vencimiento cuesta una sola consulta.
+    """
+
+    def __init__(
+        self,
+        backend: BackendTasas,
+        ttl: float = TASAS_TTL,
+        max_stale: float = TASAS_MAX_STALE,
+        ruta_snapshot: Optional[str] = TASAS_SNAPSHOT,
+        compartida: Optional[Cache] = None,
+    ):
+        self.backend = backend
+        self.compartida = compartida
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.ruta_snapshot = ruta_snapshot
+        self._tasas: dict = {}
+        self._actualizado: float = 0.0  # time.time() de la última carga exitosa
+        self._lock = threading.Lock()
+        self._refrescando = False
+        self._suscriptores: List[Callable[[dict], None]] = []
+        self._metricas = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refrescos_ok": 0,
+            "refrescos_error": 0,
+            "compartidas": 0,
+            "ultimo_error": None,
+        }
+        self._cargar_snapshot()
+
+    def _edad(self) -> float:
+        return time.time() - self._actualizado if self._actualizado else float("inf")
+
+    def _cargar_snapshot(self):
+        if not self.ruta_snapshot or not os.path.exists(self.ruta_snapshot):
+            return
+        try:
+            with open(self.ruta_snapshot, encoding="utf-8") as f:
+                data = json.load(f)
+            self._tasas = data["rates"]
+            self._actualizado = data["actualizado"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("No se pudo leer el snapshot de tasas: %s", e)
+
+    def _guardar_snapshot(self):
+        if not self.ruta_snapshot:
+            return
+        tmp = f"{self.ruta_snapshot}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"rates": self._tasas, "actualizado": self._actualizado}, f)
+            os.replace(tmp, self.ruta_snapshot)
+        except OSError as e:
+            logger.warning("No se pudo guardar el snapshot de tasas: %s", e)
+
+    def refrescar(self) -> dict:
+        """Consulta el backend y actualiza la cache. Propaga el error si falla."""
+        try:
+            tasas = self.backend.obtener()
+            if not tasas:
+                raise TasasNoDisponibles("El backend devolvió tasas vacías.")
+        except Exception as e:
+            with self._lock:
+                self._metricas["refrescos_error"] += 1
+                self._metricas["ultimo_error"] = str(e)
+            raise
+        with self._lock:
+            self._tasas = tasas
+            self._actualizado = time.time()
+            self._metricas["refrescos_ok"] += 1
+            self._guardar_snapshot()
+        if self.compartida is not None:
+            self.compartida.set(
+                "tasas", {"rates": tasas, "actualizado": self._actualizado}, ttl=self.ttl + self.max_stale
+            )
+        for funcion in self._suscriptores:
+            try:
+                funcion(tasas)
+            except Exception as e:
+                logger.warning("Fallo un suscriptor del refresco de tasas: %s", e)
+        return tasas
+
+    def suscribir(self, funcion: Callable[[dict], None]):
+        """Registra una función que recibe las tasas después de cada refresco exitoso."""
+        if funcion not in self._suscriptores:
+            self._suscriptores.append(funcion)
+
+    def _adoptar_compartidas(self):
+        """Toma las tasas de la cache compartida si son más nuevas que las propias."""
+        if self.compartida is None:
+            return
+        try:
+            data = self.compartida.get("tasas")
+        except Exception as e:
+            logger.warning("No se pudo leer la cache compartida de tasas: %s", e)
+            return
+        if data and data["actualizado"] > self._actualizado:
+            with self._lock:
+                self._tasas = data["rates"]
+                self._actualizado = data["actualizado"]
+                self._metricas["compartidas"] += 1
+
+    def _refrescar_en_segundo_plano(self):
+        with self._lock:
+            if self._refrescando:
+                return
+            self._refrescando = True
+
+        def tarea():
+            try:
+                self.refrescar()
+            except Exception as e:
+                logger.warning("Fallo el refresco de tasas en segundo plano: %s", e)
+            finally:
+                self._refrescando = False
+
+        threading.Thread(target=tarea, daemon=True).start()
+
+    def obtener(self) -> dict:
+        edad = self._edad()
+        if edad >= self.ttl:
+            self._adoptar_compartidas()
+            edad = self._edad()
+        if edad < self.ttl:
+            self._metricas["hits"] += 1
+            return self._tasas
+        if self._tasas and edad < self.ttl + self.max_stale:
+            self._metricas["stale_hits"] += 1
+            self._refrescar_en_segundo_plano()
+            return self._tasas
+
+        self._metricas["misses"] += 1
+        try:
+            return self.refrescar()
+        except Exception as e:
+            # Último recurso: cualquier tasa conocida es mejor que fallar el resumen
+            if self._tasas:
+                logger.warning("Sirviendo tasas vencidas por error del backend: %s", e)
+                return self._tasas
+            raise TasasNoDisponibles(str(e)) from e
+
+    def metricas(self) -> dict:
+        edad = self._edad()
+        return {
+            **self._metricas,
+            "backend": type(self.backend).__name__,
+            "cantidad_tasas": len(self._tasas),
+            "edad_segundos": None if edad == float("inf") else round(edad, 3),
+            "fresco": edad < self.ttl,
+            "refrescando": self._refrescando,
+        }
+
+
+def _crear_backend() -> BackendTasas:
+    if TASAS_BACKEND == "archivo":
+        return BackendArchivo(TASAS_ARCHIVO)
+    return BackendHTTP()
+
+
+_proveedor: Optional[ProveedorTasas] = None
+
+
+def obtener_proveedor() -> ProveedorTasas:
+    global _proveedor
+    if _proveedor is None:
+        _proveedor = ProveedorTasas(_crear_backend(), compartida=crear_cache("tasas", max_items=1))
+    return _proveedor
+
+
+def configurar_proveedor(proveedor: ProveedorTasas):
+    """Reemplaza el proveedor global (por ejemplo con un backend falso en pruebas)."""
+    global _proveedor
+    _proveedor = proveedor
+